@@ -0,0 +1,5 @@
+"""
+Standalone benchmarks for the cog modules.  Run any of them from the repo root, ie:
+
+    python -m benchmarks.duration
+"""
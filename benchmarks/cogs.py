@@ -0,0 +1,196 @@
+"""
+Offline benchmark suite - drives the real cogs through `benchmarks.simulation`
+
+Each scenario loads the cog(s) it needs into a fresh simulated bot, runs one operation repeatedly
+and reports the latency from the event arriving to the bot's interaction response (or for
+gateway events, to every handler finishing), the REST calls each operation cost once deferred
+edits were flushed, and the memory allocated per operation (from a separate, shorter pass under
+tracemalloc, which slows everything down).
+
+    python -m benchmarks.cogs [--ops N] [--latency SECONDS] [--rate-limit N] [scenario ...]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from typing import Awaitable, Callable
+
+import disnake
+
+from benchmarks.simulation import SimulatedDiscord, isolate
+
+# setup(sim) returns op(i), which runs one operation and returns its latency in seconds
+Scenario = Callable[[SimulatedDiscord], Awaitable[Callable[[int], Awaitable[float]]]]
+
+
+async def help_command(sim: SimulatedDiscord):
+    sim.load_extensions(
+        "cogs.help", "cogs.simplepoll", "cogs.matchmaker", "cogs.giveaway", "cogs.admin"
+    )
+
+    async def op(i: int) -> float:
+        return await sim.interact(sim.slash_command("help", sim.owner_id))
+
+    return op
+
+
+async def poll_vote(sim: SimulatedDiscord):
+    sim.load_extensions("cogs.simplepoll")
+    payload = sim.slash_command("poll", sim.owner_id, options="A, B, C, D", expires_in="1h")
+    await sim.interact(payload)
+    message_id = sim.original_message_id(payload)
+
+    async def op(i: int) -> float:
+        member_id = sim.member_ids[i % len(sim.member_ids)]
+        vote = sim.component(message_id, "poll:vote", member_id, [random.choice("ABCD")])
+        return await sim.interact(vote)
+
+    return op
+
+
+async def matchmaker_join(sim: SimulatedDiscord):
+    sim.load_extensions("cogs.matchmaker")
+    payload = sim.slash_command("matchmaker", sim.owner_id, max_players=20)
+    await sim.interact(payload)
+    message_id = sim.original_message_id(payload)
+
+    async def op(i: int) -> float:
+        # members join and leave in turn, so the queue never fills up
+        member_id = sim.member_ids[1 + (i // 2) % (len(sim.member_ids) - 1)]
+        action = "matchmaker:leave" if i % 2 else "matchmaker:join"
+        return await sim.interact(sim.component(message_id, action, member_id))
+
+    return op
+
+
+async def giveaway_join(sim: SimulatedDiscord):
+    sim.load_extensions("cogs.giveaway")
+    payload = sim.slash_command("giveaway", sim.owner_id, prize="Nitro", expires_in="1d")
+    await sim.interact(payload)
+    message_id = sim.original_message_id(payload)
+
+    async def op(i: int) -> float:
+        member_id = sim.member_ids[i % len(sim.member_ids)]
+        return await sim.interact(sim.component(message_id, "giveaway:join", member_id))
+
+    return op
+
+
+async def invite_member_join(sim: SimulatedDiscord):
+    sim.invite_uses["bench"] = 0
+    sim.load_extensions("cogs.invite_tracker")
+    await sim.ready()
+
+    async def op(i: int) -> float:
+        started = time.perf_counter()
+        await sim.member_join()
+        return time.perf_counter() - started
+
+    return op
+
+
+async def moderation_timeout(sim: SimulatedDiscord):
+    sim.load_extensions("cogs.admin")
+
+    async def op(i: int) -> float:
+        member = disnake.Object(sim.member_ids[1 + i % (len(sim.member_ids) - 1)])
+        payload = sim.slash_command("timeout", sim.owner_id, member=member, duration="10m")
+        return await sim.interact(payload)
+
+    return op
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "help": help_command,
+    "poll-vote": poll_vote,
+    "matchmaker-join": matchmaker_join,
+    "giveaway-join": giveaway_join,
+    "member-join": invite_member_join,
+    "timeout": moderation_timeout,
+}
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def flush_edits(sim: SimulatedDiscord) -> None:
+    if edits := getattr(sim.bot, "edit_scheduler", None):
+        await edits.flush(timeout=30)
+
+
+async def run(name: str, scenario: Scenario, args: argparse.Namespace) -> None:
+    rest_options = {"latency": args.latency, "jitter": args.latency / 2, "rate_limit": args.rate_limit}
+
+    sim = SimulatedDiscord(members=args.members, **rest_options)
+    op = await scenario(sim)
+    calls_before = sim.rest.calls.copy()
+
+    latencies = sorted([await op(i) * 1e3 for i in range(args.ops)])
+    await flush_edits(sim)
+
+    calls = sim.rest.calls - calls_before
+    await sim.close()
+
+    # a separate pass for allocations, tracemalloc slows down everything it traces
+    sim = SimulatedDiscord(members=args.members, **rest_options)
+    op = await scenario(sim)
+    alloc_ops = max(args.ops // 4, 1)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(alloc_ops):
+        await op(i)
+    await flush_edits(sim)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    unhandled = sim.unhandled + Counter()
+    await sim.close()
+
+    print(
+        f"{name:<16} p50 {statistics.median(latencies):7.1f} ms  "
+        f"p95 {percentile(latencies, 0.95):7.1f} ms  p99 {percentile(latencies, 0.99):7.1f} ms  "
+        f"REST/op {calls.total() / args.ops:5.2f}  "
+        f"retained {retained / alloc_ops:7.1f} blocks/op  peak {peak / 1024:8.1f} KiB"
+    )
+    for route, count in calls.most_common():
+        print(f"    {count / args.ops:6.2f}/op  {route}")
+    for route, count in unhandled.items():
+        print(f"    unhandled {count}x {route}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)} (default: all)"
+    )
+    parser.add_argument("--ops", type=int, default=100, help="operations per scenario")
+    parser.add_argument("--members", type=int, default=1000, help="members in the guild")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated REST latency (s)")
+    parser.add_argument("--rate-limit", type=int, default=5, help="requests per bucket per 5s")
+    args = parser.parse_args()
+
+    if unknown := [name for name in args.scenarios if name not in SCENARIOS]:
+        parser.error(
+            f"unknown scenario(s): {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})"
+        )
+
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        isolate(directory)
+
+        for name in args.scenarios or SCENARIOS:
+            await run(name, SCENARIOS[name], args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+Component dispatch benchmark - disnake's view store vs `cogs.utils.components.ComponentDispatcher`
+
+Registers N active three button views with each and measures the memory used, the time to register
+them and the latency from an interaction arriving to the button callback running.
+
+    python -m benchmarks.components [--views N] [--clicks N]
+"""
+
+import argparse
+import asyncio
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import disnake
+from disnake.ui.view import ViewStore
+
+from cogs.utils.components import ComponentDispatcher
+
+
+class BenchView(disnake.ui.View):
+    def __init__(self, clicked: list[float]) -> None:
+        super().__init__(timeout=None)
+        self.clicked = clicked
+
+    @disnake.ui.button(label="A", custom_id="bench:a")
+    async def a(self, button: disnake.ui.Button, inter: disnake.MessageInteraction) -> None:
+        self.clicked.append(time.perf_counter())
+
+    @disnake.ui.button(label="B", custom_id="bench:b")
+    async def b(self, button: disnake.ui.Button, inter: disnake.MessageInteraction) -> None:
+        self.clicked.append(time.perf_counter())
+
+    @disnake.ui.button(label="C", custom_id="bench:c")
+    async def c(self, button: disnake.ui.Button, inter: disnake.MessageInteraction) -> None:
+        self.clicked.append(time.perf_counter())
+
+
+def fake_interaction(message_id: int, custom_id: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        message=SimpleNamespace(id=message_id),
+        data=SimpleNamespace(
+            custom_id=custom_id, component_type=disnake.ComponentType.button, values=None
+        ),
+    )
+
+
+def rss_mib() -> float:
+    """Current resident set size, or peak RSS where /proc isn't available"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def bench(name: str, views: int, clicks: int, register, dispatch) -> None:
+    clicked: list[float] = []
+
+    gc.collect()
+    rss_before = rss_mib()
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    for message_id in range(views):
+        register(message_id, BenchView(clicked))
+
+    register_time = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = rss_mib()
+
+    latencies = []
+    for _ in range(clicks):
+        inter = fake_interaction(random.randrange(views), f"bench:{random.choice('abc')}")
+        before = len(clicked)
+        sent = time.perf_counter()
+
+        await dispatch(inter)
+        while len(clicked) == before:  # the view store runs callbacks in a task
+            await asyncio.sleep(0)
+
+        latencies.append((clicked[-1] - sent) * 1e6)
+
+    latencies.sort()
+    print(
+        f"{name:<12} register {register_time * 1e3:8.1f} ms | "
+        f"traced {memory / 2**20:7.1f} MiB | rss +{rss_after - rss_before:6.1f} MiB | "
+        f"dispatch p50 {statistics.median(latencies):7.1f} us "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:7.1f} us"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--views", type=int, default=10_000, help="active views to register")
+    parser.add_argument("--clicks", type=int, default=2_000, help="interactions to dispatch")
+    args = parser.parse_args()
+
+    dispatcher = ComponentDispatcher(SimpleNamespace(add_listener=lambda *_: None))
+
+    async def dispatch_detached(inter) -> None:
+        await dispatcher.on_message_interaction(inter)
+
+    await bench(
+        "dispatcher",
+        args.views,
+        args.clicks,
+        lambda message_id, view: dispatcher.add_view("bench", message_id, view),
+        dispatch_detached,
+    )
+    del dispatcher
+    gc.collect()
+
+    store = ViewStore(None)
+
+    async def dispatch_store(inter) -> None:
+        store.dispatch(inter)
+
+    await bench(
+        "view store",
+        args.views,
+        args.clicks,
+        lambda message_id, view: store.add_view(view, message_id),
+        dispatch_store,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
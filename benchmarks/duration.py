@@ -0,0 +1,41 @@
+"""
+Microbenchmark for `cogs.utils.duration.parse_duration`
+
+    python -m benchmarks.duration [--number N]
+"""
+
+import argparse
+import timeit
+from datetime import datetime, timezone
+
+from cogs.utils.duration import DurationError, parse_duration
+
+NOW = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+CASES = {
+    "single unit": "10m",
+    "compound": "1h30m",
+    "spaced": "2d 12h 30m 15s",
+    "invalid": "ten minutes",
+}
+
+
+def parse(text: str) -> None:
+    try:
+        parse_duration(text, now=NOW)
+    except DurationError:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=200_000, help="calls per case")
+    args = parser.parse_args()
+
+    for label, text in CASES.items():
+        seconds = timeit.timeit(lambda: parse(text), number=args.number)
+        print(f"{label:<12} {text!r:<18} {seconds / args.number * 1e9:8.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
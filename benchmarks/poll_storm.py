@@ -0,0 +1,274 @@
+"""
+Poll voting storm load generator - fires votes at a live `SimplePoll` poll
+
+Votes arrive open loop at a fixed rate (steady or poisson arrivals), regardless of how fast the
+bot answers, as `poll:vote` select interactions through `benchmarks.simulation`.  Options are
+picked uniformly or skewed towards the first options, and a fraction of the votes can come from
+members changing their vote.  With `--mode approval` each vote picks 1-3 options, with `--mode
+ranked` a member's first vote is their first choice and later ones rank another option.  Reports
+per configuration:
+
+- response latency from the interaction arriving to the bot's response (Discord gives up after 3s)
+- event loop lag, how late a 10ms timer fires while the storm is running
+- chart renders, their average time waiting for and running in a worker, message edits sent and
+  rate limits hit
+
+Charts render in `--workers` worker processes (see `cogs/utils/workers.py`), 0 renders them on the
+event loop.  Without `--votes`/`--rate` and friends, a preset set of configurations is compared.
+
+    python -m benchmarks.poll_storm [--votes N] [--rate N] [--distribution uniform|skewed]
+        [--arrival steady|poisson] [--changes FRACTION] [--mode single|approval|ranked]
+        [--workers N] [--json PATH]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+
+from benchmarks.simulation import SimulatedDiscord, isolate
+from cogs.utils.workers import DEFAULT_PROCESSES, WorkerPool
+
+INTERACTION_DEADLINE = 3.0
+LAG_INTERVAL = 0.01
+
+
+@dataclass
+class StormConfig:
+    name: str
+    votes: int = 10_000
+    rate: float = 10_000 / 60
+    distribution: str = "uniform"
+    arrival: str = "steady"
+    changes: float = 0.0
+    options: int = 4
+    mode: str = "single"
+    workers: int = DEFAULT_PROCESSES
+
+
+@dataclass
+class StormReport:
+    config: StormConfig
+    duration: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    lags: list[float] = field(default_factory=list)
+    renders: int = 0
+    render_queue: float = 0.0
+    render_time: float = 0.0
+    edits: int = 0
+    rate_limited: int = 0
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        lags = sorted(self.lags)
+
+        return {
+            **asdict(self.config),
+            "duration_s": round(self.duration, 2),
+            "latency_p50_ms": round(statistics.median(latencies) * 1e3, 1),
+            "latency_p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1e3, 1),
+            "late_responses": sum(latency > INTERACTION_DEADLINE for latency in latencies),
+            "loop_lag_p99_ms": round(lags[int(len(lags) * 0.99) - 1] * 1e3, 1) if lags else 0.0,
+            "loop_lag_max_ms": round(lags[-1] * 1e3, 1) if lags else 0.0,
+            "renders": self.renders,
+            "render_queue_ms": round(self.render_queue * 1e3, 1),
+            "render_ms": round(self.render_time * 1e3, 1),
+            "edits": self.edits,
+            "rate_limited": self.rate_limited,
+        }
+
+
+async def sample_loop_lag(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(time.perf_counter() - started - LAG_INTERVAL)
+
+
+def render_totals(workers: WorkerPool) -> tuple[int, float, float]:
+    """Chart renders so far, and their total seconds waiting for and running in a worker"""
+    if "poll_chart" not in workers.run_time:
+        return 0, 0.0, 0.0
+
+    return (
+        workers.jobs["poll_chart"],
+        workers.queued["poll_chart"].sum,
+        workers.run_time["poll_chart"].sum,
+    )
+
+
+async def storm(config: StormConfig, latency: float) -> StormReport:
+    report = StormReport(config)
+    rng = random.Random(0)
+
+    sim = SimulatedDiscord(members=config.votes, latency=latency, jitter=latency / 2)
+    sim.bot.worker_pool = workers = WorkerPool(config.workers)
+    sim.load_extensions("cogs.simplepoll")
+
+    options = [f"Option {i + 1}" for i in range(config.options)]
+    weights = [1 / (i + 1) if config.distribution == "skewed" else 1 for i in range(config.options)]
+    payload = sim.slash_command(
+        "poll", sim.owner_id, options=", ".join(options), mode=config.mode, expires_in="1d"
+    )
+    await sim.interact(payload)
+    message_id = sim.original_message_id(payload)
+
+    # only count the renders for votes, the first one may include starting a worker
+    renders_before = render_totals(workers)
+    edits_before = sim.rest.calls.copy()
+
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_loop_lag(report.lags, stop))
+    voters: list[int] = []
+    pending: list[asyncio.Task] = []
+
+    started = time.perf_counter()
+    next_at = started
+
+    try:
+        for i in range(config.votes):
+            changed = voters and (i >= len(sim.member_ids) or rng.random() < config.changes)
+            if changed:
+                member_id = rng.choice(voters)
+            else:
+                member_id = sim.member_ids[len(voters)]
+                voters.append(member_id)
+
+            option = rng.choices(options, weights)[0]
+            if config.mode == "approval":
+                picked = {option, *rng.choices(options, weights, k=rng.randint(0, 2))}
+                values = [option for option in options if option in picked]
+                vote = sim.component(message_id, "poll:vote", member_id, values)
+            elif config.mode == "ranked":
+                rank = rng.randrange(min(config.options, 5)) if changed else 0
+                vote = sim.component(message_id, f"poll:rank:{rank}", member_id, [option])
+            else:
+                vote = sim.component(message_id, "poll:vote", member_id, [option])
+            pending.append(asyncio.create_task(sim.interact(vote, settle=False)))
+
+            next_at += rng.expovariate(config.rate) if config.arrival == "poisson" else 1 / config.rate
+            if (delay := next_at - time.perf_counter()) > 0:
+                await asyncio.sleep(delay)
+
+        report.latencies = await asyncio.gather(*pending)
+        report.duration = time.perf_counter() - started
+
+        await sim.settle()
+        await sim.bot.edit_scheduler.flush(timeout=60)
+    finally:
+        stop.set()
+        await sampler
+
+    renders, queued, run_time = (
+        after - before for after, before in zip(render_totals(workers), renders_before)
+    )
+    if renders:
+        report.renders = renders
+        report.render_queue = queued / renders
+        report.render_time = run_time / renders
+
+    calls = sim.rest.calls - edits_before
+    report.edits = sum(count for route, count in calls.items() if route.startswith("PATCH"))
+    report.rate_limited = sim.rest.rate_limited
+
+    await sim.close()
+    return report
+
+
+def presets(args: argparse.Namespace) -> list[StormConfig]:
+    return [
+        StormConfig("steady-uniform", args.votes, args.rate, options=args.options),
+        StormConfig(
+            "steady-skewed", args.votes, args.rate, distribution="skewed", options=args.options
+        ),
+        StormConfig(
+            "poisson-uniform", args.votes, args.rate, arrival="poisson", options=args.options
+        ),
+        StormConfig("vote-changes", args.votes, args.rate, changes=0.3, options=args.options),
+        StormConfig("burst", args.votes // 5, args.rate * 6, options=args.options),
+    ]
+
+
+def print_table(summaries: list[dict]) -> None:
+    columns = {
+        "name": ("config", 16),
+        "votes": ("votes", 7),
+        "rate": ("rate/s", 7),
+        "latency_p50_ms": ("p50 ms", 8),
+        "latency_p99_ms": ("p99 ms", 8),
+        "late_responses": (">3s", 5),
+        "loop_lag_p99_ms": ("lag p99", 8),
+        "loop_lag_max_ms": ("lag max", 8),
+        "renders": ("renders", 8),
+        "render_queue_ms": ("wait ms", 8),
+        "render_ms": ("render", 8),
+        "edits": ("edits", 6),
+        "rate_limited": ("429s", 5),
+    }
+
+    print(" ".join(f"{title:>{width}}" for title, width in columns.values()))
+    for summary in summaries:
+        cells = []
+        for key, (_, width) in columns.items():
+            value = summary[key]
+            cells.append(f"{value:>{width}.0f}" if key == "rate" else f"{value:>{width}}")
+        print(" ".join(cells))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--votes", type=int, default=10_000, help="votes per configuration")
+    parser.add_argument("--rate", type=float, default=10_000 / 60, help="votes per second")
+    parser.add_argument("--distribution", choices=["uniform", "skewed"])
+    parser.add_argument("--arrival", choices=["steady", "poisson"])
+    parser.add_argument("--changes", type=float, help="fraction of votes that change a vote")
+    parser.add_argument("--mode", choices=["single", "approval", "ranked"], default="single")
+    parser.add_argument("--options", type=int, default=4, help="poll options (2-25)")
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_PROCESSES, help="chart worker processes (0: inline)"
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated REST latency (s)")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if args.distribution or args.arrival or args.changes is not None:
+        configs = [
+            StormConfig(
+                "custom",
+                args.votes,
+                args.rate,
+                distribution=args.distribution or "uniform",
+                arrival=args.arrival or "steady",
+                changes=args.changes or 0.0,
+                options=args.options,
+            )
+        ]
+    else:
+        configs = presets(args)
+
+    for config in configs:
+        config.mode = args.mode
+        config.workers = args.workers
+
+    summaries = []
+    with tempfile.TemporaryDirectory() as directory:
+        isolate(directory)
+
+        for config in configs:
+            print(f"{config.name}: {config.votes} votes at {config.rate:.0f}/s", flush=True)
+            summaries.append((await storm(config, args.latency)).summary())
+
+    print()
+    print_table(summaries)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,530 @@
+"""
+An offline stand-in for Discord, used to drive the real cogs in benchmarks.
+
+`SimulatedREST` replaces the bot's aiohttp session, so every REST call disnake makes (including
+interaction responses and webhook edits) is answered locally after a simulated latency.  Routes
+are rate limited per bucket with Discord's headers and 429 responses, so disnake's own rate limit
+handling runs as it would against the real API.  Every call is counted by route.
+
+`SimulatedDiscord` builds a bot with a cached guild, channel and members, loads extensions into
+it and feeds it gateway events: slash commands, component interactions and member joins.  The
+awaitable helpers return once the bot has responded and every event handler it started has
+finished.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any
+
+import aiohttp
+import disnake
+from disnake.ext import commands
+from multidict import CIMultiDict
+
+API_PREFIX = re.compile(r"^https://discord\.com/api/v\d+")
+SNOWFLAKE = re.compile(r"/\d{15,}")
+TOKEN = re.compile(r"(/(?:interactions|webhooks)/\{id\})/[^/]+")
+
+EPHEMERAL = 1 << 6
+
+
+def route_template(path: str) -> str:
+    """`/channels/123.../messages/456...` -> `/channels/{id}/messages/{id}`"""
+    return TOKEN.sub(r"\1/{token}", SNOWFLAKE.sub("/{id}", path))
+
+
+def request_payload(data: Any) -> dict:
+    """JSON body of a request, plain or multipart (`payload_json`)"""
+    if isinstance(data, aiohttp.FormData):
+        for options, _, value in data._fields:
+            if options.get("name") == "payload_json":
+                return json.loads(value)
+        return {}
+
+    return json.loads(data) if data else {}
+
+
+class SimulatedResponse:
+    def __init__(self, status: int, body: Any = None, headers: dict | None = None) -> None:
+        self.status: int = status
+        self.reason: str = "OK" if status < 400 else "Error"
+        self.headers: CIMultiDict = CIMultiDict(headers or {})
+        self._text: str = ""
+
+        if body is not None:
+            self._text = json.dumps(body)
+            self.headers["Content-Type"] = "application/json"
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        return self._text
+
+    async def json(self) -> Any:
+        return json.loads(self._text)
+
+    async def __aenter__(self) -> SimulatedResponse:
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+
+class SimulatedREST:
+    """Drop-in for the aiohttp session disnake uses.
+
+    Each route bucket (method, route and first id in the path) allows `rate_limit` requests per
+    `rate_per` seconds, interaction callbacks are not limited, just like Discord."""
+
+    def __init__(
+        self,
+        discord: SimulatedDiscord,
+        *,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        rate_limit: int = 5,
+        rate_per: float = 5.0,
+    ) -> None:
+        self.discord: SimulatedDiscord = discord
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.rate_limit: int = rate_limit
+        self.rate_per: float = rate_per
+        self.closed: bool = False
+
+        self.calls: Counter[str] = Counter()
+        self.rate_limited: int = 0
+        self._windows: dict[tuple, list] = {}
+
+    def request(self, method: str, url: str, **kwargs: Any) -> _PendingRequest:
+        return _PendingRequest(self, method, url, kwargs)
+
+    async def close(self) -> None:
+        self.closed = True
+
+    def _check_rate_limit(self, method: str, template: str, path: str) -> dict:
+        if template.startswith("/interactions/"):
+            return {}
+
+        major = next(iter(SNOWFLAKE.findall(path)), "")
+        now = time.monotonic()
+        window = self._windows.setdefault((method, template, major), [now, 0])
+
+        if now - window[0] >= self.rate_per:
+            window[:] = [now, 0]
+        window[1] += 1
+
+        reset_after = self.rate_per - (now - window[0])
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(self.rate_limit - window[1], 0)),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": f"{method}:{template}",
+            "__exceeded": window[1] > self.rate_limit,
+        }
+
+    async def handle(self, method: str, url: str, kwargs: dict) -> SimulatedResponse:
+        path = API_PREFIX.sub("", url).split("?")[0]
+        template = route_template(path)
+        self.calls[f"{method} {template}"] += 1
+
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        headers = self._check_rate_limit(method, template, path)
+        if headers.pop("__exceeded", False):
+            self.rate_limited += 1
+            retry_after = float(headers["X-RateLimit-Reset-After"])
+            headers["Via"] = "1.1 google"
+            body = {"message": "You are being rate limited.", "retry_after": retry_after, "global": False}
+            return SimulatedResponse(429, body, headers)
+
+        status, body = self.discord.handle_route(
+            method, path, request_payload(kwargs.get("data")), kwargs
+        )
+        return SimulatedResponse(status, body, headers)
+
+
+class _PendingRequest:
+    def __init__(self, rest: SimulatedREST, method: str, url: str, kwargs: dict) -> None:
+        self.args = (method, url, kwargs)
+        self.rest = rest
+        self.response: SimulatedResponse | None = None
+
+    async def __aenter__(self) -> SimulatedResponse:
+        self.response = await self.rest.handle(*self.args)
+        return self.response
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+
+class SimulatedDiscord:
+    """A bot wired to `SimulatedREST`, with one guild, one text channel and `members` members.
+    `bot_class` can be `main.MyBot` to include its instrumentation"""
+
+    def __init__(
+        self,
+        *,
+        members: int = 1000,
+        bot_class: type[commands.InteractionBot] = commands.InteractionBot,
+        **rest_options: Any,
+    ) -> None:
+        self._ids = itertools.count(disnake.utils.time_snowflake(datetime.now(timezone.utc)))
+
+        self.application_id: int = self.snowflake()
+        self.guild_id: int = self.snowflake()
+        self.channel_id: int = self.snowflake()
+        self.admin_role_id: int = self.snowflake()
+
+        self.bot = bot_class(
+            intents=disnake.Intents.all(), command_sync_flags=commands.CommandSyncFlags.none()
+        )
+        self.rest = SimulatedREST(self, **rest_options)
+        self.bot.http._HTTPClient__session = self.rest
+
+        # message payloads by id, and the message sent as each interaction's response
+        self.messages: dict[int, dict] = {}
+        self.originals: dict[str, int] = {}
+        self.component_messages: dict[int, int] = {}
+        self.invite_uses: Counter[str] = Counter()
+        self.responses: dict[int, asyncio.Future] = {}
+        self.unhandled: Counter[str] = Counter()
+
+        state = self.bot._connection
+        state.application_id = self.application_id
+        self.bot_user = self.user_payload(self.application_id, "Benchmark Bot", bot=True)
+        state.user = disnake.ClientUser(state=state, data=self.bot_user)
+
+        self.member_ids: list[int] = [self.snowflake() for _ in range(members)]
+        self.owner_id: int = self.member_ids[0]
+        self.guild = disnake.Guild(data=self.guild_payload(), state=state)
+        state._add_guild(self.guild)
+        self.channel: disnake.TextChannel = self.guild.get_channel(self.channel_id)
+
+    def snowflake(self) -> int:
+        return next(self._ids)
+
+    # payloads
+
+    def user_payload(self, user_id: int, name: str | None = None, *, bot: bool = False) -> dict:
+        return {
+            "id": str(user_id),
+            "username": name or f"member{user_id % 100000}",
+            "discriminator": "0001",
+            "avatar": None,
+            "bot": bot,
+        }
+
+    def member_payload(self, user_id: int, *, admin: bool = False) -> dict:
+        return {
+            "user": self.user_payload(user_id),
+            "roles": [str(self.admin_role_id)] if admin else [],
+            "joined_at": datetime.now(timezone.utc).isoformat(),
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+        }
+
+    def guild_payload(self) -> dict:
+        bot_member = self.member_payload(self.application_id, admin=True)
+        bot_member["user"] = self.bot_user
+
+        return {
+            "id": str(self.guild_id),
+            "name": "Benchmark Guild",
+            "owner_id": str(self.owner_id),
+            "system_channel_id": str(self.channel_id),
+            "member_count": len(self.member_ids) + 1,
+            "features": [],
+            "emojis": [],
+            "stickers": [],
+            "roles": [
+                {"id": str(self.guild_id), "name": "@everyone", "permissions": "1071698660929", "position": 0},
+                {"id": str(self.admin_role_id), "name": "Admin", "permissions": "8", "position": 1},
+            ],
+            "channels": [
+                {"id": str(self.channel_id), "type": 0, "name": "general", "position": 0, "permission_overwrites": []}
+            ],
+            "members": [bot_member]
+            + [self.member_payload(m, admin=m == self.owner_id) for m in self.member_ids],
+        }
+
+    def message_payload(self, data: dict, *, author: dict | None = None) -> dict:
+        message_id = self.snowflake()
+        message = {
+            "id": str(message_id),
+            "channel_id": str(self.channel_id),
+            "guild_id": str(self.guild_id),
+            "author": author or self.bot_user,
+            "content": "",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "components": [],
+            "pinned": False,
+            "type": 0,
+            "flags": 0,
+        }
+        self.update_message(message, data)
+        self.messages[message_id] = message
+        return message
+
+    def update_message(self, message: dict, data: dict) -> dict:
+        for field in ("content", "embeds", "components", "flags"):
+            if field in data and data[field] is not None:
+                message[field] = data[field]
+
+        if "attachments" in data:
+            message["attachments"] = [
+                {"id": str(self.snowflake()), "filename": "file", "size": 0, "url": "", "proxy_url": ""}
+                for _ in data["attachments"] or []
+            ]
+
+        message["edited_timestamp"] = datetime.now(timezone.utc).isoformat()
+        return message
+
+    def interaction_payload(self, interaction_type: int, member_id: int, data: dict) -> dict:
+        member = self.member_payload(member_id, admin=member_id == self.owner_id)
+        # interactions carry resolved permissions, Discord expands administrator to every flag
+        everything = str(disnake.Permissions.all().value)
+        member["permissions"] = everything if member_id == self.owner_id else "1071698660929"
+
+        return {
+            "id": str(self.snowflake()),
+            "application_id": str(self.application_id),
+            "type": interaction_type,
+            "token": f"token{self.snowflake()}",
+            "version": 1,
+            "guild_id": str(self.guild_id),
+            "channel_id": str(self.channel_id),
+            "member": member,
+            "app_permissions": everything,
+            "locale": "en-US",
+            "guild_locale": "en-US",
+            "data": data,
+        }
+
+    # REST
+
+    def handle_route(self, method: str, path: str, payload: dict, kwargs: dict) -> tuple[int, Any]:
+        parts = path.strip("/").split("/")
+
+        if parts[0] == "interactions" and parts[-1] == "callback":
+            return self.interaction_callback(int(parts[1]), parts[2], payload)
+
+        if parts[0] == "webhooks" and parts[3:4] == ["messages"]:
+            token, target = parts[2], parts[4]
+            message_id = self.originals.get(token) if target == "@original" else int(target)
+            message = self.messages.get(message_id)
+
+            if message is None:
+                return 404, {"message": "Unknown Message", "code": 10008}
+            if method == "GET":
+                return 200, message
+            if method == "PATCH":
+                return 200, self.update_message(message, payload)
+            if method == "DELETE":
+                self.messages.pop(message_id, None)
+                return 204, None
+
+        if parts[0] == "webhooks" and len(parts) == 3 and method == "POST":  # followup
+            return 200, self.message_payload(payload)
+
+        if parts[0] == "channels" and parts[2:3] == ["messages"]:
+            if len(parts) == 3 and method == "POST":
+                return 200, self.message_payload(payload)
+
+            message = self.messages.get(int(parts[3]))
+            if message is None:
+                return 404, {"message": "Unknown Message", "code": 10008}
+            if method == "PATCH":
+                return 200, self.update_message(message, payload)
+            if method == "DELETE":
+                self.messages.pop(int(parts[3]), None)
+                return 204, None
+
+        if parts[0] == "guilds":
+            if parts[2:] == ["invites"]:
+                return 200, self.invites_payload()
+            if parts[2] == "members" and len(parts) == 4:
+                if method == "PATCH":
+                    member = self.member_payload(int(parts[3]))
+                    member["communication_disabled_until"] = payload.get(
+                        "communication_disabled_until"
+                    )
+                    return 200, member
+                if method == "DELETE":
+                    return 204, None
+            if parts[2] == "bans":
+                return 204, None
+            if parts[2:] == ["bulk-ban"]:
+                return 200, {"banned_users": payload.get("user_ids", []), "failed_users": []}
+
+        self.unhandled[f"{method} {route_template(path)}"] += 1
+        return 404, {"message": "404: Not Found", "code": 0}
+
+    def interaction_callback(self, interaction_id: int, token: str, payload: dict) -> tuple[int, Any]:
+        response_type = payload.get("type")
+        data = payload.get("data") or {}
+        component_message = self.messages.get(self.component_messages.pop(interaction_id, 0))
+
+        if response_type in (4, 5):  # channel message (or a deferred one)
+            self.originals[token] = int(self.message_payload(data)["id"])
+        elif response_type == 7 and component_message:  # update the component's message
+            self.update_message(component_message, data)
+
+        if future := self.responses.get(interaction_id):
+            if not future.done():
+                future.set_result(time.perf_counter())
+
+        return 204, None
+
+    def invites_payload(self) -> list[dict]:
+        return [
+            {
+                "code": code,
+                "guild": {"id": str(self.guild_id), "name": "Benchmark Guild"},
+                "channel": {"id": str(self.channel_id), "name": "general", "type": 0},
+                "inviter": self.user_payload(self.owner_id),
+                "uses": uses,
+                "max_uses": 0,
+                "max_age": 0,
+                "temporary": False,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+            for code, uses in self.invite_uses.items()
+        ]
+
+    # gateway
+
+    def load_extensions(self, *names: str) -> None:
+        for name in names:
+            self.bot.load_extension(name)
+
+    async def ready(self) -> None:
+        """Mark the bot ready and wait for every `on_ready` listener"""
+        self.bot._ready.set()
+        self.bot.dispatch("ready")
+        await self.settle()
+
+    async def settle(self) -> None:
+        """Wait for every event handler the bot has started to finish"""
+        while pending := [
+            task
+            for task in asyncio.all_tasks()
+            if task.get_name().startswith("disnake: ") and not task.done()
+        ]:
+            await asyncio.wait(pending)
+
+    async def interact(self, payload: dict, *, settle: bool = True) -> float:
+        """Feed an interaction to the bot, returns seconds until its response was received.
+
+        With `settle`, also waits for every handler to finish.  Turn it off when interactions
+        are sent concurrently, otherwise each one waits for all the others"""
+        interaction_id = int(payload["id"])
+        future = self.responses[interaction_id] = asyncio.get_running_loop().create_future()
+
+        started = time.perf_counter()
+        self.bot._connection.parse_interaction_create(payload)
+        if settle:
+            await self.settle()
+
+        try:
+            return (await asyncio.wait_for(future, 10)) - started
+        finally:
+            del self.responses[interaction_id]
+
+    def slash_command(self, name: str, member_id: int, **options: Any) -> dict:
+        """Build a slash command interaction.  Members are passed as `disnake.Object`s, a
+        subcommand as `sub_command="name"`"""
+        resolved: dict[str, dict] = defaultdict(dict)
+        command_options = []
+
+        for option, value in options.items():
+            if option == "sub_command":
+                continue
+            if isinstance(value, disnake.Object):
+                resolved["users"][str(value.id)] = self.user_payload(value.id)
+                member = self.member_payload(value.id)
+                del member["user"]
+                resolved["members"][str(value.id)] = member
+                command_options.append({"name": option, "type": 6, "value": str(value.id)})
+            elif isinstance(value, int):
+                command_options.append({"name": option, "type": 4, "value": value})
+            elif isinstance(value, float):
+                command_options.append({"name": option, "type": 10, "value": value})
+            else:
+                command_options.append({"name": option, "type": 3, "value": str(value)})
+
+        if sub_command := options.get("sub_command"):
+            command_options = [{"name": sub_command, "type": 1, "options": command_options}]
+
+        data = {
+            "id": str(self.snowflake()),
+            "name": name,
+            "type": 1,
+            "options": command_options,
+            "resolved": dict(resolved),
+        }
+        return self.interaction_payload(2, member_id, data)
+
+    def component(
+        self, message_id: int, custom_id: str, member_id: int, values: list[str] | None = None
+    ) -> dict:
+        """Build a button click, or a select interaction when `values` are given"""
+        data = {"custom_id": custom_id, "component_type": 3 if values is not None else 2}
+        if values is not None:
+            data["values"] = values
+
+        payload = self.interaction_payload(3, member_id, data)
+        payload["message"] = self.messages[message_id]
+        self.component_messages[int(payload["id"])] = message_id
+        return payload
+
+    def original_message_id(self, payload: dict) -> int:
+        """Id of the message an interaction responded with"""
+        return self.originals[payload["token"]]
+
+    async def member_join(self, member_id: int | None = None, invite: str = "bench") -> int:
+        """A new member joins through `invite`, returns their id once every handler finished"""
+        member_id = member_id or self.snowflake()
+        self.invite_uses[invite] += 1
+
+        payload = self.member_payload(member_id)
+        payload["guild_id"] = str(self.guild_id)
+        self.bot._connection.parse_guild_member_add(payload)
+        await self.settle()
+
+        return member_id
+
+    async def close(self) -> None:
+        """Unload every extension and stop the bot's background tasks"""
+        for name in list(self.bot.extensions):
+            self.bot.unload_extension(name)
+
+        if edits := getattr(self.bot, "edit_scheduler", None):
+            await edits.flush(timeout=1)
+
+        if store := getattr(self.bot, "state_store", None):
+            await store.close()
+
+        if workers := getattr(self.bot, "worker_pool", None):
+            workers.close()
+
+
+def isolate(directory: str) -> None:
+    """Run from `directory` with an in-memory state store, so cog databases don't touch the repo"""
+    os.chdir(directory)
+    os.environ["STATE_STORE_URL"] = "memory://"
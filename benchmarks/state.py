@@ -0,0 +1,171 @@
+"""
+State store benchmark - throughput of each `cogs.utils.state` backend
+
+Runs the same workload against the memory, SQLite and Redis protocol stores: poll style vote
+writes into a hash, plain key writes, key reads and a full hash read.  Every backend is first
+checked to return the same results for a short script of operations.  Without `--redis` the
+Redis store talks to a small in-process stand-in server speaking the same protocol, so the
+numbers show the client and protocol overhead rather than a real server's.
+
+    python -m benchmarks.state [--ops N] [--concurrency N] [--redis redis://host:port/db]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from cogs.utils.state import RedisStore, StateStore, open_state_store
+
+
+class StandInRedis:
+    """Just enough of a Redis server for `RedisStore`, keeping everything in dicts"""
+
+    def __init__(self) -> None:
+        self.values: dict[bytes, bytes] = {}
+        self.hashes: dict[bytes, dict[bytes, bytes]] = {}
+        self.server: asyncio.base_events.Server | None = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    @staticmethod
+    def encode(reply) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, bytes):
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+        if isinstance(reply, list):
+            return b"*%d\r\n" % len(reply) + b"".join(map(StandInRedis.encode, reply))
+        return b"+%s\r\n" % reply.encode()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+
+                writer.write(self.encode(self.execute(args[0].upper().decode(), *args[1:])))
+        finally:
+            writer.close()
+
+    def execute(self, command: str, *args: bytes):
+        if command in ("PING", "SELECT"):
+            return "OK"
+        if command == "GET":
+            return self.values.get(args[0])
+        if command == "SET":
+            self.values[args[0]] = args[1]
+            return "OK"
+        if command == "DEL":
+            return sum(
+                (self.values.pop(k, None) is not None) + (self.hashes.pop(k, None) is not None)
+                for k in args
+            )
+        if command == "SCAN":  # one pass, MATCH only supports a trailing `*`
+            prefix = args[2].removesuffix(b"*").replace(b"\\", b"")
+            return [b"0", [k for k in (*self.values, *self.hashes) if k.startswith(prefix)]]
+        if command == "HGET":
+            return self.hashes.get(args[0], {}).get(args[1])
+        if command == "HSET":
+            hash_ = self.hashes.setdefault(args[0], {})
+            added = 0
+            for field, value in zip(args[1::2], args[2::2]):
+                added += field not in hash_
+                hash_[field] = value
+            return added
+        if command == "HDEL":
+            hash_ = self.hashes.get(args[0], {})
+            return sum(hash_.pop(f, None) is not None for f in args[1:])
+        if command == "HGETALL":
+            return [x for pair in self.hashes.get(args[0], {}).items() for x in pair]
+
+        raise ValueError(command)
+
+
+async def check(store: StateStore) -> list:
+    """Run a short script of operations and return everything read back"""
+    await store.set("check:a", "1")
+    await store.set("check:b", "2")
+    await store.hset("check:h", {"x": "1", "y": "2"})
+    await store.hset("check:h", {"y": "3"})
+    await store.hdel("check:h", "x")
+
+    results = [
+        await store.get("check:a"),
+        await store.get("check:missing"),
+        await store.hget("check:h", "y"),
+        await store.hgetall("check:h"),
+        sorted(await store.keys("check:")),
+    ]
+
+    await store.delete("check:a", "check:b", "check:h")
+    results.append(await store.keys("check:"))
+    return results
+
+
+async def timed(label: str, ops: int, concurrency: int, op) -> None:
+    """Run `op(i)` for `ops` values of i with up to `concurrency` running at once"""
+    started = time.perf_counter()
+
+    for start in range(0, ops, concurrency):
+        await asyncio.gather(*(op(i) for i in range(start, min(start + concurrency, ops))))
+
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<14} {ops / elapsed:>12,.0f} ops/s")
+
+
+async def bench(name: str, store: StateStore, ops: int, concurrency: int) -> None:
+    results = await check(store)
+    expected = ["1", None, "3", {"y": "3"}, ["check:a", "check:b", "check:h"], []]
+    assert results == expected, f"{name} returned {results}"
+
+    print(name)
+    await timed("vote hset", ops, concurrency, lambda i: store.hset("bench:votes", {str(i): "A"}))
+    await timed("set", ops, concurrency, lambda i: store.set(f"bench:{i}", "x" * 64))
+    await store.flush()
+    await timed("get", ops, concurrency, lambda i: store.get(f"bench:{i}"))
+
+    started = time.perf_counter()
+    votes = await store.hgetall("bench:votes")
+    assert len(votes) == ops
+    print(f"  {'hgetall':<14} {(time.perf_counter() - started) * 1e3:>12.1f} ms for {ops:,} fields")
+
+    await store.delete("bench:votes", *(f"bench:{i}" for i in range(ops)))
+    await store.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ops", type=int, default=20_000, help="operations per workload")
+    parser.add_argument("--concurrency", type=int, default=100, help="operations in flight")
+    parser.add_argument("--redis", help="benchmark a real Redis server instead of the stand-in")
+    args = parser.parse_args()
+
+    await bench("memory", open_state_store("memory://"), args.ops, args.concurrency)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'state.db')}"
+        await bench("sqlite", open_state_store(url), args.ops, args.concurrency)
+
+    if args.redis:
+        await bench("redis", open_state_store(args.redis), args.ops, args.concurrency)
+    else:
+        server = StandInRedis()
+        port = await server.start()
+        await bench("redis stand-in", RedisStore("127.0.0.1", port), args.ops, args.concurrency)
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -22,7 +22,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 
 --------------------------------------
-Disnake Basic Admin/Moderator - 0.1.0
+Disnake Basic Admin/Moderator - 0.2.1
 --------------------------------------
 A super basic Moderation cog.  By default these command are only viewable by members with the Administrator permissions.  This
 can be altered using the guild > integration tab where you can whitelist other roles or members. These commands also require 
@@ -38,47 +38,252 @@ Commands:
     - [member] : Member to be kicked.
     - (reason) : Optional reason the user was kicked
 
+`/tempban` [member] [duration] (reason)
+    - [member] : Member to be banned.
+    - [duration] : Amount of time before the member is unbanned.  (ie: 30m, 1h30m, 2d)
+    - (reason) : Optional reason the user was banned
+
 `/timeout` [member] (duration) (reason)
     - [member] : Member to be kicked.
-    - (duration) : Amount of time the member is to be timed out for.  (1s, 1m, 1h, 1d) (set to None to remove any timeout)
+    - (duration) : Amount of time the member is to be timed out for.  (1s, 1m, 1h30m, 1d, 1w) (set to None to remove any timeout)
+                   Timeouts longer than Discord's 28 day limit are renewed until they expire
     - (reason) : Optional reason the user was kicked
+
+`/bulk kick|ban|timeout` (members) (role) (joined_within) (name_pattern) ... (reason)
+    - Acts on every member matching *all* of the given filters, at least one filter is required
+    - (members) : Member mentions or ids separated by spaces or commas
+    - (role) : Members that have this role
+    - (joined_within) : Members that joined within this amount of time (ie: 30m, 1h30m, 2d)
+    - (name_pattern) : Members whose username or display name matches this regular expression
+
+    Actions run through a small pool of workers (see `BULK_CONCURRENCY`) so the bot's rate limits are
+    respected, bans use the bulk ban endpoint when the installed disnake supports it.  Progress is shown
+    in a single response that is updated as the action runs, with any failures listed at the end.
+
+`/modlog member` [member]
+    - [member] : Member to view the recorded moderation actions for
+
+Mod Log:
+Every action is recorded to a local SQLite audit log (`MODLOG_DATABASE`), indexed by member for fast
+lookups with `/modlog member`.  If a guild has a mod log channel (set in `MODLOG_CHANNELS`, or a text
+channel named `MODLOG_CHANNEL_NAME`) action embeds are buffered and posted every `MODLOG_FLUSH_INTERVAL`
+seconds, up to 10 embeds per message.  Embeds still buffered are carried over when the module is
+reloaded (see `main.MyBot.reload_extension`).
+
+Temporary bans and timeouts past the 28 day limit are stored alongside the audit log and handled by a
+single scheduler task that only wakes when the next one is due, so they survive restarts.
 """
 
+import asyncio
+import re
+import sqlite3
+from datetime import timedelta, datetime, timezone
+from typing import Awaitable, Callable
+
 import disnake
-from disnake.ext import commands
-from datetime import timedelta, datetime
+from disnake.ext import commands, tasks
+from loguru import logger
+
+from .utils.duration import parse_duration
+from .utils.scheduler import Scheduler
+
+# how many moderation requests a bulk action may have in flight at once
+BULK_CONCURRENCY = 5
+
+# max members a single bulk action can target
+BULK_ACTION_LIMIT = 1000
+
+# seconds between progress updates of a bulk action's response
+BULK_PROGRESS_INTERVAL = 2
+
+# max users per bulk ban request
+BULK_BAN_CHUNK = 200
 
+# where the moderation audit log is stored
+MODLOG_DATABASE = "modlog.db"
 
-async def get_duration(inter: disnake.GuildCommandInteraction, duration: str) -> datetime:
-    """Converts the entered text duration datetime and returns the delta between now and the future date in seconds"""
+# guild id -> mod log channel id.  Guilds not listed here use a text channel named MODLOG_CHANNEL_NAME
+# if there is one, otherwise actions are only recorded to the audit log
+MODLOG_CHANNELS: dict[int, int] = {}
+MODLOG_CHANNEL_NAME = "mod-log"
+
+# seconds between posting buffered mod log embeds
+MODLOG_FLUSH_INTERVAL = 5
+
+# longest timeout Discord accepts, with a little headroom for the request to land
+MAX_TIMEOUT = timedelta(days=28) - timedelta(minutes=5)
+
+# how long to wait before retrying a temp ban expiry or timeout renewal that failed
+EXPIRY_RETRY_DELAY = timedelta(minutes=1)
+
+
+async def get_duration(inter: disnake.GuildCommandInteraction, duration: str) -> datetime | None:
+    """Converts the entered text duration to the datetime it ends at, or None to remove a timeout"""
     if duration.lower() == "none":
         return None
 
-    time, metric = duration[:-1], duration[-1].lower()
-    now = disnake.utils.utcnow()
-    futures = {
-        "s": timedelta(seconds=int(time)),
-        "m": timedelta(minutes=int(time)),
-        "h": timedelta(hours=int(time)),
-        "d": timedelta(days=int(time)),
-    }
-
-    if not time.isdigit() or metric.isdigit():
-        return await inter.response.send_message(
-            f"⚠️ `duration` must much the correct format: `1s`, `1m`, `1h` or `1d`",
-            ephemeral=True,
+    return parse_duration(duration, name="duration").expires_at
+
+
+async def get_join_window(inter: disnake.GuildCommandInteraction, joined_within: str) -> datetime:
+    """Converts a duration to the datetime a member must have joined after"""
+    return disnake.utils.utcnow() - parse_duration(joined_within, name="joined_within").delta
+
+
+async def compile_pattern(inter: disnake.GuildCommandInteraction, pattern: str) -> re.Pattern:
+    """Compiles the name pattern or raises an error if it is not a valid regular expression"""
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"⚠️ `name_pattern` is not a valid regular expression: {e}")
+
+
+class ModLog:
+    """Buffers moderation actions, writing them to the audit log and posting their embeds to each
+    guild's mod log channel in batches"""
+
+    def __init__(self, bot: commands.InteractionBot, path: str = MODLOG_DATABASE) -> None:
+        self.bot: commands.InteractionBot = bot
+
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS mod_actions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                member_id INTEGER NOT NULL,
+                mod_id INTEGER NOT NULL,
+                action TEXT NOT NULL,
+                reason TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS mod_actions_member ON mod_actions (guild_id, member_id);
+            """
         )
 
-    if metric == "d" and time > 28:
-        time == 28
+        self.pending_rows: list[tuple] = []
+        self.pending_embeds: dict[int, list[disnake.Embed]] = {}
+
+    def close(self) -> None:
+        self.write_rows()
+        self.connection.close()
 
-    if not (future := futures.get(metric)):
-        return await inter.response.send_message(
-            f"⚠️ `duration` must include one of (`s`, `m`, `h`, `d`) to represent seconds, minutes, hours, or days",
-            ephemeral=True,
+    def record(
+        self,
+        guild: disnake.Guild,
+        member_ids: list[int],
+        mod_id: int,
+        action: str,
+        reason: str | None,
+        embed: disnake.Embed | None = None,
+    ) -> None:
+        """Buffer an action taken against one or more members"""
+        now = disnake.utils.utcnow().timestamp()
+        self.pending_rows.extend(
+            (guild.id, member_id, mod_id, action, reason, now) for member_id in member_ids
         )
 
-    return now + future
+        if embed is not None:
+            self.pending_embeds.setdefault(guild.id, []).append(embed)
+
+    def write_rows(self) -> None:
+        """Append the buffered actions to the audit log"""
+        if not self.pending_rows:
+            return
+
+        rows, self.pending_rows = self.pending_rows, []
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO mod_actions (guild_id, member_id, mod_id, action, reason, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def get_channel(self, guild: disnake.Guild) -> disnake.TextChannel | None:
+        """Get the guild's mod log channel, if it has one"""
+        if channel_id := MODLOG_CHANNELS.get(guild.id):
+            return guild.get_channel(channel_id)
+
+        return disnake.utils.get(guild.text_channels, name=MODLOG_CHANNEL_NAME)
+
+    async def flush(self) -> None:
+        """Write the audit log and post buffered embeds, 10 per message"""
+        self.write_rows()
+
+        pending, self.pending_embeds = self.pending_embeds, {}
+
+        for guild_id, embeds in pending.items():
+            guild = self.bot.get_guild(guild_id)
+            if guild is None or (channel := self.get_channel(guild)) is None:
+                continue
+
+            for i in range(0, len(embeds), 10):
+                try:
+                    await channel.send(embeds=embeds[i : i + 10])
+                except disnake.HTTPException:
+                    logger.warning(f"Unable to post to the mod log in {guild.name} ({guild.id})")
+                    break
+
+    def get_member_actions(
+        self, guild_id: int, member_id: int, limit: int = 10
+    ) -> list[tuple[str, int, str | None, float]]:
+        """Return the most recent (action, mod id, reason, timestamp) recorded for a member"""
+        self.write_rows()
+
+        return self.connection.execute(
+            "SELECT action, mod_id, reason, created_at FROM mod_actions "
+            "WHERE guild_id = ? AND member_id = ? ORDER BY id DESC LIMIT ?",
+            (guild_id, member_id, limit),
+        ).fetchall()
+
+
+class ExpiryStore:
+    """SQLite backed storage for temporary bans and long timeouts that still need to be lifted or
+    renewed"""
+
+    def __init__(self, path: str = MODLOG_DATABASE) -> None:
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS mod_expiries (
+                guild_id INTEGER NOT NULL,
+                member_id INTEGER NOT NULL,
+                action TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (guild_id, member_id, action)
+            );
+            """
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def add(self, rows: list[tuple[int, int, str, datetime]]) -> None:
+        """Store (guild id, member id, action, expires at) rows, replacing existing ones"""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO mod_expiries VALUES (?, ?, ?, ?)",
+                ((g, m, a, expires_at.timestamp()) for g, m, a, expires_at in rows),
+            )
+
+    def remove(self, guild_id: int, member_id: int, action: str) -> None:
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM mod_expiries WHERE guild_id = ? AND member_id = ? AND action = ?",
+                (guild_id, member_id, action),
+            )
+
+    def get(self, guild_id: int, member_id: int, action: str) -> datetime | None:
+        """Return when an action expires, if it is stored"""
+        row = self.connection.execute(
+            "SELECT expires_at FROM mod_expiries WHERE guild_id = ? AND member_id = ? AND action = ?",
+            (guild_id, member_id, action),
+        ).fetchone()
+
+        return datetime.fromtimestamp(row[0], tz=timezone.utc) if row else None
+
+    def load(self) -> list[tuple[int, int, str, float]]:
+        return self.connection.execute("SELECT * FROM mod_expiries").fetchall()
 
 
 class Moderation(
@@ -87,6 +292,123 @@ class Moderation(
 ):
     def __init__(self, bot: commands.InteractionBot) -> None:
         self.bot = bot
+        self.modlog: ModLog = ModLog(bot)
+        self.flush_modlog.start()
+
+        # temp bans and long timeouts, keyed by (guild id, member id, action)
+        self.expiries: ExpiryStore = ExpiryStore()
+        self.scheduler: Scheduler = Scheduler(self.on_expiry_due, name="moderation-expiries")
+
+        for guild_id, member_id, action, expires_at in self.expiries.load():
+            self.scheduler.schedule(
+                (guild_id, member_id, action),
+                self.next_wakeup(action, datetime.fromtimestamp(expires_at, tz=timezone.utc)),
+            )
+        self.scheduler.start()
+
+    def cog_unload(self) -> None:
+        self.flush_modlog.cancel()
+        self.scheduler.stop()
+        self.modlog.close()
+        self.expiries.close()
+
+    def export_state(self) -> dict:
+        """Called before the module is reloaded - mod log embeds that haven't been posted yet.
+        Actions and expiries are in the database and picked up by the new module"""
+        return {"pending_embeds": self.modlog.pending_embeds}
+
+    def import_state(self, state: dict) -> None:
+        for guild_id, embeds in state["pending_embeds"].items():
+            self.modlog.pending_embeds.setdefault(guild_id, []).extend(embeds)
+
+    @tasks.loop(seconds=MODLOG_FLUSH_INTERVAL)
+    async def flush_modlog(self) -> None:
+        await self.modlog.flush()
+
+    @flush_modlog.before_loop
+    async def before_flush_modlog(self) -> None:
+        await self.bot.wait_until_ready()
+
+    def next_wakeup(self, action: str, expires_at: datetime) -> datetime:
+        """When the scheduler next needs to act.  Timeouts are renewed before Discord's limit"""
+        if action == "timeout":
+            return min(expires_at, disnake.utils.utcnow() + MAX_TIMEOUT)
+
+        return expires_at
+
+    def schedule_expiries(
+        self, guild: disnake.Guild, member_ids: list[int], action: str, expires_at: datetime
+    ) -> None:
+        """Persist and schedule the expiry of a temp ban ("ban") or long timeout ("timeout")"""
+        self.expiries.add([(guild.id, member_id, action, expires_at) for member_id in member_ids])
+
+        wakeup = self.next_wakeup(action, expires_at)
+        for member_id in member_ids:
+            self.scheduler.schedule((guild.id, member_id, action), wakeup)
+
+    def cancel_expiry(self, guild: disnake.Guild, member_id: int, action: str) -> None:
+        if self.scheduler.cancel((guild.id, member_id, action)):
+            self.expiries.remove(guild.id, member_id, action)
+
+    async def on_expiry_due(self, key: tuple[int, int, str]) -> None:
+        """Scheduler callback - lift an expired temp ban or renew a long timeout"""
+        await self.bot.wait_until_ready()
+
+        guild_id, member_id, action = key
+        expires_at = self.expiries.get(guild_id, member_id, action)
+        guild = self.bot.get_guild(guild_id)
+
+        if expires_at is None or guild is None:
+            return self.expiries.remove(guild_id, member_id, action)
+
+        now = disnake.utils.utcnow()
+
+        if action == "ban":
+            try:
+                await guild.unban(disnake.Object(member_id), reason="Temporary ban expired")
+            except disnake.NotFound:  # already unbanned
+                pass
+            except disnake.HTTPException as e:
+                return self.retry_expiry(key, e)
+
+            self.expiries.remove(guild_id, member_id, action)
+            return self.modlog.record(
+                guild, [member_id], self.bot.user.id, "Temporary Ban Expired", None
+            )
+
+        if expires_at <= now:  # the last renewal runs out by itself
+            return self.expiries.remove(guild_id, member_id, action)
+
+        try:
+            member = guild.get_member(member_id) or await guild.fetch_member(member_id)
+            until = self.next_wakeup(action, expires_at)
+            await member.timeout(until=until, reason="Renewing long timeout")
+        except disnake.NotFound:  # left the guild, nothing to renew
+            return self.expiries.remove(guild_id, member_id, action)
+        except disnake.HTTPException as e:
+            return self.retry_expiry(key, e)
+
+        self.scheduler.schedule(key, until)
+
+    def retry_expiry(self, key: tuple[int, int, str], error: Exception) -> None:
+        """Try a failed expiry again shortly, the stored expiry is kept until it goes through"""
+        guild_id, member_id, action = key
+        logger.warning(
+            f"Unable to handle the {action} expiry of {member_id} in {guild_id} ({error}) | "
+            f"Retrying in {EXPIRY_RETRY_DELAY}"
+        )
+        self.scheduler.schedule(key, disnake.utils.utcnow() + EXPIRY_RETRY_DELAY)
+
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild: disnake.Guild, user: disnake.User) -> None:
+        """Forget a temp ban that was lifted early"""
+        self.cancel_expiry(guild, user.id, "ban")
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: disnake.Member, after: disnake.Member) -> None:
+        """Forget a long timeout that was removed in Discord rather than through the bot"""
+        if before.current_timeout is not None and after.current_timeout is None:
+            self.cancel_expiry(after.guild, after.id, "timeout")
 
     async def cog_slash_command_error(
         self, inter: disnake.GuildCommandInteraction, error: Exception
@@ -107,6 +429,9 @@ class Moderation(
                 "You cannot perform this action against the selected member", ephemeral=True
             )
 
+        if isinstance(error, commands.ConversionError):
+            return await inter.response.send_message(str(error.original), ephemeral=True)
+
         raise  # raise other exceptions
 
     def create_alert_embed(self, **kwargs) -> disnake.Embed:
@@ -159,6 +484,7 @@ class Moderation(
 
         await member.kick(reason=reason)
         await inter.response.send_message(embed=embed)
+        self.modlog.record(inter.guild, [member.id], inter.author.id, "Kick", reason, embed)
 
     @commands.slash_command(name="timeout")
     @commands.has_permissions(moderate_members=True)
@@ -182,11 +508,23 @@ class Moderation(
         reason: :type:`Optional[str]`
             Include a reason (optional)
         """
-        if member.current_timeout is None and duration is None:
-            return await inter.response.send_message(
-                f"{member.mention} is not currently timed out", ephemeral=True
+        if duration is None:
+            if member.current_timeout is None:
+                return await inter.response.send_message(
+                    f"{member.mention} is not currently timed out", ephemeral=True
+                )
+
+            embed = self.create_alert_embed(
+                member=member,
+                mod=inter.author,
+                action="Timeout Removed",
+                desc=None,
+                reason=reason,
             )
-        if member.current_timeout is None:
+            self.cancel_expiry(inter.guild, member.id, "timeout")
+            await member.timeout(duration=None, reason=reason)
+
+        else:
             embed = self.create_alert_embed(
                 member=member,
                 mod=inter.author,
@@ -195,21 +533,23 @@ class Moderation(
                 reason=reason,
             )
 
-        else:
-            if duration is None:
-                embed = self.create_alert_embed(
-                    member=member,
-                    mod=inter.author,
-                    action="Timeout Removed",
-                    desc=None,
-                    reason=reason,
-                )
+            until = self.next_wakeup("timeout", duration)
+            await member.timeout(until=until, reason=reason)
+
+            if until < duration:  # longer than Discord allows, keep renewing it until it expires
+                self.schedule_expiries(inter.guild, [member.id], "timeout", duration)
+            else:
+                self.cancel_expiry(inter.guild, member.id, "timeout")
 
-        await member.timeout(
-            duration=(duration - disnake.utils.utcnow()) if duration is not None else duration,
-            reason=reason,
-        )
         await inter.response.send_message(embed=embed)
+        self.modlog.record(
+            inter.guild,
+            [member.id],
+            inter.author.id,
+            "Timeout" if duration is not None else "Timeout Removed",
+            reason,
+            embed,
+        )
 
     @commands.slash_command(name="ban")
     @commands.has_permissions(ban_members=True)
@@ -244,6 +584,411 @@ class Moderation(
         )
         await member.ban(delete_message_days=delete_messages_days, reason=reason)
         await inter.response.send_message(embed=embed)
+        self.modlog.record(inter.guild, [member.id], inter.author.id, "Ban", reason, embed)
+
+    @commands.slash_command(name="tempban")
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    async def tempban_member(
+        self,
+        inter: disnake.GuildCommandInteraction,
+        *,
+        member: disnake.Member,
+        duration: str = commands.Param(converter=get_duration),
+        delete_messages_days: int = commands.Param(default=1, ge=0, le=7),
+        reason: str | None = None,
+    ) -> None:
+        """Temporarily ban a member
+
+        Parameters
+        ----------
+        member: :type:`disnake.Member`
+            Member to Ban
+        duration: :type:`str`
+            Amount of time before the member is unbanned (ie: 30m, 1h30m, 2d)
+        delete_message_days: :type:`int
+            Removes messages from the past {amount} days (default 1)
+        reason: :type:`Optional[str]`
+            Include a reason (optional)
+        """
+        if duration is None:
+            return await inter.response.send_message(
+                "Please provide how long the ban should last, or use `/ban` instead.",
+                ephemeral=True,
+            )
+
+        embed = self.create_alert_embed(
+            member=member,
+            mod=inter.author,
+            action="Temporary Ban",
+            desc=f"Expires {disnake.utils.format_dt(duration, 'R')}",
+            reason=reason,
+        )
+        await member.ban(delete_message_days=delete_messages_days, reason=reason)
+        self.schedule_expiries(inter.guild, [member.id], "ban", duration)
+
+        await inter.response.send_message(embed=embed)
+        self.modlog.record(
+            inter.guild, [member.id], inter.author.id, "Temporary Ban", reason, embed
+        )
+
+    def select_members(
+        self,
+        inter: disnake.GuildCommandInteraction,
+        members: str | None,
+        role: disnake.Role | None,
+        joined_after: datetime | None,
+        name_pattern: re.Pattern | None,
+    ) -> list[disnake.Member]:
+        """Return the members that match every given filter, excluding anyone the command user or
+        bot cannot act on"""
+        guild = inter.guild
+
+        if members is not None:
+            ids = {int(i) for i in re.findall(r"\d{15,20}", members)}
+            candidates = [m for i in ids if (m := guild.get_member(i))]
+        elif role is not None:
+            candidates = role.members
+        else:
+            candidates = guild.members
+
+        def matches(member: disnake.Member) -> bool:
+            if role is not None and role not in member.roles:
+                return False
+            if joined_after is not None and (
+                member.joined_at is None or member.joined_at < joined_after
+            ):
+                return False
+            if name_pattern is not None and not (
+                name_pattern.search(member.name) or name_pattern.search(member.display_name)
+            ):
+                return False
+
+            return self.can_moderate(inter, member)
+
+        return [m for m in candidates if matches(m)]
+
+    def can_moderate(self, inter: disnake.GuildCommandInteraction, member: disnake.Member) -> bool:
+        """Check the role hierarchy allows both the command user and the bot to act on the member"""
+        guild = inter.guild
+
+        if member.id in (guild.owner_id, guild.me.id, inter.author.id):
+            return False
+
+        if member.top_role >= guild.me.top_role:
+            return False
+
+        return inter.author.id == guild.owner_id or member.top_role < inter.author.top_role
+
+    async def execute_bulk(
+        self,
+        members: list[disnake.Member],
+        act: Callable[[list[disnake.Member]], Awaitable[list[disnake.Member]]],
+        batch_size: int = 1,
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> list[disnake.Member]:
+        """Run `act` over the members with at most `BULK_CONCURRENCY` calls in flight and return the
+        members it failed on.
+
+        `act` receives a batch of up to `batch_size` members and returns the ones it failed on.
+        `on_progress(done, failed)` is called after each batch"""
+
+        done = 0
+        failed: list[disnake.Member] = []
+
+        queue: asyncio.Queue[list[disnake.Member]] = asyncio.Queue()
+        for i in range(0, len(members), batch_size):
+            queue.put_nowait(members[i : i + batch_size])
+
+        async def worker() -> None:
+            nonlocal done
+
+            while not queue.empty():
+                batch = queue.get_nowait()
+                try:
+                    failed.extend(await act(batch))
+                except disnake.HTTPException:
+                    failed.extend(batch)
+
+                done += len(batch)
+                if on_progress is not None:
+                    on_progress(done, len(failed))
+
+        await asyncio.gather(*(worker() for _ in range(min(BULK_CONCURRENCY, queue.qsize()))))
+        return failed
+
+    async def run_bulk_action(
+        self,
+        inter: disnake.GuildCommandInteraction,
+        members: list[disnake.Member],
+        action: str,
+        act: Callable[[list[disnake.Member]], Awaitable[list[disnake.Member]]],
+        batch_size: int = 1,
+        reason: str | None = None,
+    ) -> list[disnake.Member] | None:
+        """Run a bulk action for a command, streaming progress into the interaction response and
+        reporting any failures once done.  Returns the members it failed on, or None if the action
+        didn't run"""
+
+        if not members:
+            return await inter.response.send_message(
+                "No members matched the given filters.", ephemeral=True
+            )
+
+        if len(members) > BULK_ACTION_LIMIT:
+            return await inter.response.send_message(
+                f"{len(members)} members matched, bulk actions are limited to {BULK_ACTION_LIMIT}. "
+                "Narrow down the filters and try again.",
+                ephemeral=True,
+            )
+
+        total = len(members)
+        progress = [0, 0]  # done, failed
+
+        def on_progress(done: int, failed: int) -> None:
+            progress[:] = done, failed
+
+        await inter.response.send_message(f"{action}: 0/{total} done")
+
+        async def report_progress() -> None:
+            while True:
+                await asyncio.sleep(BULK_PROGRESS_INTERVAL)
+                await inter.edit_original_response(
+                    f"{action}: {progress[0]}/{total} done, {progress[1]} failed"
+                )
+
+        reporter = asyncio.create_task(report_progress())
+        started = disnake.utils.utcnow()
+
+        try:
+            failed = await self.execute_bulk(members, act, batch_size, on_progress)
+        finally:
+            reporter.cancel()
+
+        elapsed = (disnake.utils.utcnow() - started).total_seconds()
+
+        embed = disnake.Embed(
+            title="Bulk Moderation Action was Taken",
+            description=f"**{action}** - {total - len(failed)}/{total} succeeded in {elapsed:.1f}s",
+            timestamp=disnake.utils.utcnow(),
+        )
+        if failed:
+            listed = ", ".join(m.mention for m in failed[:50])
+            if len(failed) > 50:
+                listed += f" and {len(failed) - 50} more"
+            embed.add_field(name="Failed", value=listed, inline=False)
+        embed.set_footer(text=f"Action taken by: {inter.author.display_name}")
+
+        await inter.edit_original_response(content=None, embed=embed)
+
+        failed_ids = {m.id for m in failed}
+        self.modlog.record(
+            inter.guild,
+            [m.id for m in members if m.id not in failed_ids],
+            inter.author.id,
+            action,
+            reason,
+            embed,
+        )
+        return failed
+
+    @commands.slash_command(name="bulk")
+    async def bulk(self, inter: disnake.GuildCommandInteraction) -> None:
+        """Admin: Moderate many members at once"""
+
+    @bulk.sub_command(name="kick")
+    @commands.has_permissions(kick_members=True)
+    @commands.bot_has_permissions(kick_members=True)
+    async def bulk_kick(
+        self,
+        inter: disnake.GuildCommandInteraction,
+        members: str | None = None,
+        role: disnake.Role | None = None,
+        joined_within: str | None = commands.Param(default=None, converter=get_join_window),
+        name_pattern: str | None = commands.Param(default=None, converter=compile_pattern),
+        reason: str | None = None,
+    ) -> None:
+        """Admin: Kick every member matching the filters
+
+        Parameters
+        ----------
+        members: :type:`Optional[str]`
+            Member mentions or ids separated by spaces
+        role: :type:`Optional[disnake.Role]`
+            Members that have this role
+        joined_within: :type:`Optional[str]`
+            Members that joined within this amount of time (ie: 30m, 1h30m, 2d)
+        name_pattern: :type:`Optional[str]`
+            Members whose name matches this regular expression
+        reason: :type:`Optional[str]`
+            Include a reason (optional)
+        """
+        if all(f is None for f in (members, role, joined_within, name_pattern)):
+            return await inter.response.send_message(
+                "Please provide at least one filter.", ephemeral=True
+            )
+
+        targets = self.select_members(inter, members, role, joined_within, name_pattern)
+
+        async def kick(batch: list[disnake.Member]) -> list[disnake.Member]:
+            await batch[0].kick(reason=reason)
+            return []
+
+        await self.run_bulk_action(inter, targets, "Kick", kick, reason=reason)
+
+    @bulk.sub_command(name="ban")
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    async def bulk_ban(
+        self,
+        inter: disnake.GuildCommandInteraction,
+        members: str | None = None,
+        role: disnake.Role | None = None,
+        joined_within: str | None = commands.Param(default=None, converter=get_join_window),
+        name_pattern: str | None = commands.Param(default=None, converter=compile_pattern),
+        delete_messages_days: int = commands.Param(default=1, ge=0, le=7),
+        reason: str | None = None,
+    ) -> None:
+        """Admin: Ban every member matching the filters
+
+        Parameters
+        ----------
+        members: :type:`Optional[str]`
+            Member mentions or ids separated by spaces
+        role: :type:`Optional[disnake.Role]`
+            Members that have this role
+        joined_within: :type:`Optional[str]`
+            Members that joined within this amount of time (ie: 30m, 1h30m, 2d)
+        name_pattern: :type:`Optional[str]`
+            Members whose name matches this regular expression
+        delete_message_days: :type:`int`
+            Removes messages from the past {amount} days (default 1)
+        reason: :type:`Optional[str]`
+            Include a reason (optional)
+        """
+        if all(f is None for f in (members, role, joined_within, name_pattern)):
+            return await inter.response.send_message(
+                "Please provide at least one filter.", ephemeral=True
+            )
+
+        targets = self.select_members(inter, members, role, joined_within, name_pattern)
+
+        # newer disnake versions expose Discord's bulk ban endpoint (up to 200 users per request)
+        if hasattr(inter.guild, "bulk_ban"):
+
+            async def ban(batch: list[disnake.Member]) -> list[disnake.Member]:
+                result = await inter.guild.bulk_ban(
+                    batch,
+                    clean_history_duration=timedelta(days=delete_messages_days),
+                    reason=reason,
+                )
+                failed_ids = {user.id for user in result.failed}
+                return [m for m in batch if m.id in failed_ids]
+
+            return await self.run_bulk_action(
+                inter, targets, "Ban", ban, BULK_BAN_CHUNK, reason=reason
+            )
+
+        async def ban(batch: list[disnake.Member]) -> list[disnake.Member]:
+            await batch[0].ban(delete_message_days=delete_messages_days, reason=reason)
+            return []
+
+        await self.run_bulk_action(inter, targets, "Ban", ban, reason=reason)
+
+    @bulk.sub_command(name="timeout")
+    @commands.has_permissions(moderate_members=True)
+    @commands.bot_has_permissions(moderate_members=True)
+    async def bulk_timeout(
+        self,
+        inter: disnake.GuildCommandInteraction,
+        duration: str = commands.Param(converter=get_duration),
+        members: str | None = None,
+        role: disnake.Role | None = None,
+        joined_within: str | None = commands.Param(default=None, converter=get_join_window),
+        name_pattern: str | None = commands.Param(default=None, converter=compile_pattern),
+        reason: str | None = None,
+    ) -> None:
+        """Admin: Timeout every member matching the filters
+
+        Parameters
+        ----------
+        duration: :type:`str`
+            Amount of time to timeout the members, set to None to remove
+        members: :type:`Optional[str]`
+            Member mentions or ids separated by spaces
+        role: :type:`Optional[disnake.Role]`
+            Members that have this role
+        joined_within: :type:`Optional[str]`
+            Members that joined within this amount of time (ie: 30m, 1h30m, 2d)
+        name_pattern: :type:`Optional[str]`
+            Members whose name matches this regular expression
+        reason: :type:`Optional[str]`
+            Include a reason (optional)
+        """
+        if all(f is None for f in (members, role, joined_within, name_pattern)):
+            return await inter.response.send_message(
+                "Please provide at least one filter.", ephemeral=True
+            )
+
+        targets = self.select_members(inter, members, role, joined_within, name_pattern)
+
+        until = self.next_wakeup("timeout", duration) if duration is not None else None
+
+        async def timeout(batch: list[disnake.Member]) -> list[disnake.Member]:
+            await batch[0].timeout(until=until, reason=reason)
+            return []
+
+        failed = await self.run_bulk_action(
+            inter, targets, "Timeout" if duration else "Timeout Removed", timeout, reason=reason
+        )
+
+        if failed is None:
+            return
+
+        failed_ids = {m.id for m in failed}
+        succeeded = [m.id for m in targets if m.id not in failed_ids]
+
+        if until is not None and until < duration:
+            # longer than Discord allows, keep renewing them until it expires
+            self.schedule_expiries(inter.guild, succeeded, "timeout", duration)
+        else:
+            # removed, or short enough for Discord - drop any long timeout still being renewed
+            for member_id in succeeded:
+                self.cancel_expiry(inter.guild, member_id, "timeout")
+
+    @commands.slash_command(name="modlog")
+    async def modlog_command(self, inter: disnake.GuildCommandInteraction) -> None:
+        """Admin: View recorded moderation actions"""
+
+    @modlog_command.sub_command(name="member")
+    async def modlog_member(
+        self, inter: disnake.GuildCommandInteraction, member: disnake.User
+    ) -> None:
+        """Admin: View the recorded moderation actions for a member
+
+        Parameters
+        ----------
+        member: :type:`disnake.User`
+            Member to view the actions for
+        """
+        actions = self.modlog.get_member_actions(inter.guild.id, member.id)
+
+        if not actions:
+            return await inter.response.send_message(
+                f"No moderation actions have been recorded for {member.mention}", ephemeral=True
+            )
+
+        embed = disnake.Embed(title=f"Moderation history for {member}")
+        for action, mod_id, reason, created_at in actions:
+            timestamp = datetime.fromtimestamp(created_at, tz=timezone.utc)
+            embed.add_field(
+                name=action,
+                value=f"{disnake.utils.format_dt(timestamp, 'f')} by <@{mod_id}>\n"
+                f"Reason: {reason or 'None Provided'}",
+                inline=False,
+            )
+
+        await inter.response.send_message(embed=embed, ephemeral=True)
 
 
 def setup(bot: commands.InteractionBot) -> None:
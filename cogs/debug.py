@@ -0,0 +1,186 @@
+"""
+MIT License
+
+Copyright (c) 2022 DLCHAMP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+------------------------------
+Disnake Debug - 0.3.0
+------------------------------
+Owner only tools for looking into the bot's performance.
+
+Commands:
+`/debug profile` [action] (sample_rate) (limit)
+- [required] action: `start` or `stop` the gateway event profiler, `show` its top entries or `reset` it
+- (optional) sample_rate: Share of events and listener calls to time when starting, 0-1 (default: 1)
+- (optional) limit: Number of entries to show per table (default: 15)
+
+`/debug rest` (limit)
+- (optional) limit: Number of callbacks and routes to show (default: 15)
+
+`/debug reload` [extension]
+- [required] extension: The loaded extension to reload (ie: cogs.simplepoll)
+
+The profiler (see `cogs/utils/profiler.py`) counts every gateway event the bot receives and
+every event it dispatches, and times parsing and each listener.  It is only installed while
+running, so leaving it stopped costs nothing.
+
+`/debug rest` shows the REST calls, 429s and budgets per cog when the bot accounts for them
+(see `cogs/utils/rest.py`, `main.MyBot` does).
+
+`/debug reload` reloads a single extension to ship a fix without restarting.  With `main.MyBot`
+the live state of its cogs (active polls, queues, caches) is carried over to the new code, the
+same happens when the bot's `reload=True` watcher picks up a changed file.
+"""
+
+import io
+
+import disnake
+from disnake.ext import commands
+
+from .utils.profiler import EventProfiler, get_event_profiler
+from .utils.rest import get_rest_accounting
+
+# longest report sent inline, anything longer is attached as a file
+MAX_INLINE_REPORT = 1900
+
+
+class Debug(
+    commands.Cog,
+    slash_command_attrs={"default_member_permissions": disnake.Permissions(administrator=True)},
+):
+    def __init__(self, bot: commands.InteractionBot) -> None:
+        self.bot = bot
+        self.profiler: EventProfiler = get_event_profiler(bot)
+
+    def cog_unload(self) -> None:
+        self.profiler.stop()
+
+    async def cog_slash_command_error(
+        self, inter: disnake.GuildCommandInteraction, error: Exception
+    ) -> None:
+        if isinstance(error, commands.NotOwner):
+            return await inter.response.send_message(
+                "Only the bot owner can use this command.", ephemeral=True
+            )
+
+        raise
+
+    @commands.slash_command(name="debug")
+    @commands.is_owner()
+    async def debug(self, inter: disnake.ApplicationCommandInteraction) -> None:
+        pass
+
+    @debug.sub_command(name="profile")
+    async def profile(
+        self,
+        inter: disnake.ApplicationCommandInteraction,
+        action: str = commands.Param(choices=["start", "stop", "show", "reset"]),
+        sample_rate: float = commands.Param(default=1.0, gt=0, le=1),
+        limit: int = commands.Param(default=15, ge=1, le=100),
+    ) -> None:
+        """Profile gateway events and listeners
+
+        Parameters
+        ----------
+        action: :type:`str`
+            start or stop the profiler, show its top entries or reset it
+        sample_rate: :type:`float`
+            Share of events and listener calls to time when starting, 0-1 (default: 1)
+        limit: :type:`int`
+            Number of entries to show per table (default: 15)
+        """
+        if action == "start":
+            self.profiler.start(sample_rate)
+            return await inter.response.send_message(
+                f"Profiling gateway events, timing {sample_rate:.0%} of them.", ephemeral=True
+            )
+
+        if action == "reset":
+            self.profiler.reset()
+            return await inter.response.send_message("Profiler reset.", ephemeral=True)
+
+        if action == "stop":
+            self.profiler.stop()
+
+        await self.send_report(inter, self.profiler.report(limit), "profile.txt")
+
+    @debug.sub_command(name="rest")
+    async def rest(
+        self,
+        inter: disnake.ApplicationCommandInteraction,
+        limit: int = commands.Param(default=15, ge=1, le=100),
+    ) -> None:
+        """Show REST calls, rate limits and budgets per cog
+
+        Parameters
+        ----------
+        limit: :type:`int`
+            Number of callbacks and routes to show (default: 15)
+        """
+        if (accounting := get_rest_accounting(self.bot)) is None:
+            return await inter.response.send_message(
+                "REST calls are not accounted for on this bot.", ephemeral=True
+            )
+
+        await self.send_report(inter, accounting.report(limit), "rest.txt")
+
+    @debug.sub_command(name="reload")
+    async def reload(self, inter: disnake.ApplicationCommandInteraction, extension: str) -> None:
+        """Reload an extension, keeping the state of its cogs
+
+        Parameters
+        ----------
+        extension: :type:`str`
+            The loaded extension to reload (ie: cogs.simplepoll)
+        """
+        try:
+            migrated = self.bot.reload_extension(extension)
+        except commands.ExtensionError as e:
+            return await inter.response.send_message(
+                f"Failed to reload `{extension}`: {e}", ephemeral=True
+            )
+
+        await inter.response.send_message(
+            f"Reloaded `{extension}`"
+            + (f", carried over the state of {', '.join(migrated)}." if migrated else "."),
+            ephemeral=True,
+        )
+
+    @reload.autocomplete("extension")
+    async def extension_autocomplete(
+        self, inter: disnake.ApplicationCommandInteraction, extension: str
+    ) -> list[str]:
+        return [name for name in sorted(self.bot.extensions) if extension in name][:25]
+
+    async def send_report(
+        self, inter: disnake.ApplicationCommandInteraction, report: str, filename: str
+    ) -> None:
+        """Reply with the report in a code block, or attached as a file if it is too long"""
+        if len(report) <= MAX_INLINE_REPORT:
+            return await inter.response.send_message(f"```\n{report}\n```", ephemeral=True)
+
+        await inter.response.send_message(
+            file=disnake.File(io.BytesIO(report.encode()), filename=filename), ephemeral=True
+        )
+
+
+def setup(bot: commands.InteractionBot) -> None:
+    bot.add_cog(Debug(bot))
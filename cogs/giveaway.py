@@ -22,7 +22,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 
 ------------------------------
-Disnake Simple Giveaway - 0.1.0
+Disnake Simple Giveaway - 0.4.0
 ------------------------------
 A simple giveaway module that allows users to create giveaways within a channel.  Other members will
 have the opportunity to sign up for the giveaway via a simple button click.  All members that sign up 
@@ -30,130 +30,619 @@ will be stored and randomly selected from when the giveaway host selects the [Se
 At this time a winner will be selected at random and announced via an updated embed.
 
 Command user will also set the amount of time the sign ups are open via the `expires_in` argument.
-Should follow the simple format (s, m, h, d) for seconds, minutes, hours, days.  (example: 5d) for 5 days
+Should follow the simple format (s, m, h, d, w) for seconds, minutes, hours, days, weeks and can be combined.
+(example: 5d for 5 days, or 1d12h for a day and a half)
+
+Once the giveaway expires a winner is drawn automatically if the host hasn't already done so.
+Giveaways and their entries are stored in a small SQLite database (see `GIVEAWAY_DATABASE`) so
+pending giveaways survive a restart.  They're reloaded and their buttons re-attached once the bot
+is ready.  Reloading the module (see `main.MyBot.reload_extension`) hands active giveaways straight
+over to the new code.
+
+Multiple winners can be drawn with the `winners` argument, and members holding a role listed in
+`BONUS_ENTRY_ROLES` get extra weight in the draw.  Every draw is seeded and the seed is shown on the
+result so a draw can be reproduced.  After the draw the host has `REROLL_PERIOD` to [Reroll] a
+replacement winner, previous winners are never drawn again.  Giveaways with
+`WORKER_DRAW_THRESHOLD` entries or more are drawn in the bot's worker pool (see `cogs/utils/workers.py`).
 
 Commands:
-`/giveaway` [prize] (title) (description) (expires_in)
+`/giveaway` [prize] (title) (description) (expires_in) (winners)
 - [required] prize: Prize that is being given away
 - (optional) title: Title of the giveaway. If no title provided, the default "Giveaway Time!" will be used
 - (optional) description: Description of the giveaway
 - (optional) expires_in: Amount of time users will have to sign up for this giveaway. Defaults to 5d
+- (optional) winners: How many winners to draw. Defaults to 1
 
 """
 
 import asyncio
+import itertools
+import json
 import random
-from datetime import datetime, timedelta
+import secrets
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Iterator, Sequence
 
 import disnake
 from disnake.ext import commands
+from loguru import logger
+
+from .utils.components import ComponentDispatcher, get_component_dispatcher
+from .utils.duration import parse_duration
+from .utils.edits import EditScheduler, get_edit_scheduler
+from .utils.scheduler import Scheduler
+from .utils.workers import WorkerPool, get_worker_pool
+
+# minimum amount of seconds between edits of the "N entries" footer.  Joins that happen
+# in between are coalesced into a single edit
+FOOTER_UPDATE_INTERVAL = 5
+
+# where giveaways and their entries are persisted
+GIVEAWAY_DATABASE = "giveaways.db"
+
+# role id -> bonus entries.  A member's weight in the draw is 1 plus the bonus of each listed
+# role they have when they join (ex: {123456789012345678: 2} gives that role 3x the odds)
+BONUS_ENTRY_ROLES: dict[int, int] = {}
+
+# how long the host can reroll winners after the draw
+REROLL_PERIOD = timedelta(days=1)
+
+# seconds of cosmetic countdown shown when the host clicks [Select Winner].  The countdown is a
+# single embed edit with a relative timestamp and the draw is handed to the scheduler, nothing
+# sleeps.  Set to 0 to draw immediately
+DRAW_COUNTDOWN = 0
+
+# max ids per member lookup when resolving entrants that aren't cached
+MEMBER_LOOKUP_CHUNK = 100
+
+# giveaways with at least this many entries are drawn in the bot's worker pool, smaller draws
+# take less time than sending the entries over
+WORKER_DRAW_THRESHOLD = 50_000
+
+
+class WinnerDraw:
+    """Draws winners without replacement from a giveaway's entries.
+
+    Unweighted entries use a sparse Fisher-Yates shuffle where only swapped slots are stored,
+    so each winner costs O(1) without copying the entries.  Weighted entries use a Fenwick tree
+    over the weights, built once in O(n), then O(log n) per winner.
+
+    The draw is driven by a seeded `random.Random`, the same seed and entries always produce
+    the same order of winners.
+    """
+
+    def __init__(
+        self,
+        entry_ids: Sequence[int],
+        weights: Sequence[int] | None = None,
+        *,
+        seed: int | str,
+    ) -> None:
+        self.entry_ids: Sequence[int] = entry_ids
+        self.random: random.Random = random.Random(seed)
+        self.remaining: int = len(entry_ids)
+
+        self._swaps: dict[int, int] = {}
+        self._weights: list[int] | None = None
+
+        if weights is not None:
+            self._build_tree(weights)
+
+    def __iter__(self) -> Iterator[int]:
+        while self.remaining:
+            yield self.entry_ids[self._next_index()]
+
+    def _build_tree(self, weights: Sequence[int]) -> None:
+        size = len(weights)
+        tree = [0]
+        tree.extend(weights)
+
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+
+        self._weights = list(weights)
+        self._tree = tree
+        self._total = sum(self._weights)
+        self._top = 1 << (size.bit_length() - 1) if size else 0
+
+    def _next_index(self) -> int:
+        self.remaining -= 1
+
+        if self._weights is None:
+            # swap the picked slot with the last remaining slot, storing only what moved
+            pick = self.random.randrange(self.remaining + 1)
+            index = self._swaps.get(pick, pick)
+            self._swaps[pick] = self._swaps.pop(self.remaining, self.remaining)
+            return index
+
+        # walk down the tree to the entry that owns `target`
+        target = self.random.randrange(self._total)
+        tree = self._tree
+        position, step = 0, self._top
+
+        while step:
+            upper = position + step
+            if upper < len(tree) and tree[upper] <= target:
+                position = upper
+                target -= tree[upper]
+            step >>= 1
+
+        # remove the winner's weight so it can't be drawn again
+        weight = self._weights[position]
+        self._weights[position] = 0
+        self._total -= weight
+
+        upper = position + 1
+        while upper < len(tree):
+            tree[upper] -= weight
+            upper += upper & -upper
+
+        return position
+
+
+def draw_order(
+    entry_ids: Sequence[int], weights: Sequence[int] | None, seed: int | str, limit: int
+) -> list[int]:
+    """The first `limit` entrants drawn with `seed`.  Runs in the bot's worker pool for big
+    giveaways"""
+    return list(itertools.islice(WinnerDraw(entry_ids, weights, seed=seed), limit))
+
+
+class GiveawayStore:
+    """SQLite backed storage for active giveaways and their entries"""
+
+    def __init__(self, path: str = GIVEAWAY_DATABASE) -> None:
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS giveaways (
+                message_id INTEGER PRIMARY KEY,
+                channel_id INTEGER NOT NULL,
+                guild_id INTEGER NOT NULL,
+                author_id INTEGER NOT NULL,
+                prize TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                embed TEXT NOT NULL,
+                winners INTEGER NOT NULL DEFAULT 1,
+                seed INTEGER NOT NULL DEFAULT 0,
+                winner_ids TEXT NOT NULL DEFAULT '[]',
+                drawn_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS giveaway_entries (
+                message_id INTEGER NOT NULL,
+                member_id INTEGER NOT NULL,
+                weight INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (message_id, member_id)
+            );
+            """
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def add_giveaway(self, view: "GiveawayView") -> None:
+        """Store a newly created giveaway"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO giveaways "
+                "(message_id, channel_id, guild_id, author_id, prize, expires_at, embed, winners, seed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    view.message.id,
+                    view.message.channel.id,
+                    view.guild.id,
+                    view.author_id,
+                    view.prize,
+                    view.expires_at.timestamp(),
+                    json.dumps(view.embed.to_dict()),
+                    view.winners,
+                    view.seed,
+                ),
+            )
+
+    def add_entries(self, message_id: int, entries: list[tuple[int, int]]) -> None:
+        """Store a batch of new (member id, weight) entries for a giveaway"""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO giveaway_entries VALUES (?, ?, ?)",
+                ((message_id, member_id, weight) for member_id, weight in entries),
+            )
+
+    def set_winners(
+        self, message_id: int, winners: int, winner_ids: list[int], drawn_at: datetime
+    ) -> None:
+        """Record the winners drawn so far for a giveaway, the first `winners` of them are the
+        main winners and the rest rerolls"""
+        with self.connection:
+            self.connection.execute(
+                "UPDATE giveaways SET winners = ?, winner_ids = ?, drawn_at = ? "
+                "WHERE message_id = ?",
+                (winners, json.dumps(winner_ids), drawn_at.timestamp(), message_id),
+            )
+
+    def remove_giveaway(self, message_id: int) -> None:
+        """Remove a giveaway and its entries once it has ended"""
+        with self.connection:
+            self.connection.execute("DELETE FROM giveaways WHERE message_id = ?", (message_id,))
+            self.connection.execute(
+                "DELETE FROM giveaway_entries WHERE message_id = ?", (message_id,)
+            )
+
+    def load_giveaways(self) -> list[sqlite3.Row]:
+        """Return every stored giveaway row"""
+        return self.connection.execute("SELECT * FROM giveaways").fetchall()
+
+    def load_entries(self, message_id: int) -> list[sqlite3.Row]:
+        """Return the stored entries for a giveaway in the order they joined"""
+        return self.connection.execute(
+            "SELECT member_id, weight FROM giveaway_entries WHERE message_id = ? ORDER BY rowid",
+            (message_id,),
+        ).fetchall()
 
 
 class GiveawayView(disnake.ui.View):
 
-    message: disnake.Message
+    message: disnake.Message | disnake.PartialMessage
 
     def __init__(
         self,
-        author: disnake.Member,
+        cog: "GiveAway",
+        author_id: int,
+        guild: disnake.Guild,
         embed: disnake.Embed,
         expires_at: datetime,
         prize: str,
+        winners: int = 1,
+        seed: int | None = None,
     ) -> None:
         super().__init__(timeout=None)
 
-        self.author: disnake.Member = author
+        self.cog: GiveAway = cog
+        self.author_id: int = author_id
+        self.guild: disnake.Guild = guild
         self.embed: disnake.Embed = embed
         self.expires_at: datetime = expires_at
         self.prize: str = prize
+        self.winners: int = winners
+        self.seed: int = secrets.randbits(63) if seed is None else seed
+
+        # entrants are stored by id only, the set gives O(1) duplicate checks and the lists
+        # keep a stable order and weight for drawing.  Members are only resolved for winners
+        self.entries: set[int] = set()
+        self.entry_ids: list[int] = []
+        self.entry_weights: list[int] = []
+        self.weighted: bool = False
+
+        self.winner_ids: list[int] = []
+        self.drawn_at: datetime | None = None
+
+        # entries not yet written to the store, flushed along with the footer
+        self._unsaved: list[tuple[int, int]] = []
+        self._footer_task: asyncio.Task | None = None
+        self._draw_task: asyncio.Task | None = None
+        self._reroll_lock: asyncio.Lock = asyncio.Lock()
 
-        self.members: list[disnake.Member] = []
+        # reroll is only shown once a winner has been drawn
+        self.remove_item(self.reroll)
+
+    @property
+    def store(self) -> GiveawayStore:
+        return self.cog.store
+
+    @property
+    def edits(self) -> EditScheduler:
+        return self.cog.edits
 
     def stop(self) -> None:
-        self.members.clear()
+        if self._footer_task is not None:
+            self._footer_task.cancel()
+            self._footer_task = None
+
+        if not self.is_finished():
+            self.cog.untrack(self.message.id)
+            self.store.remove_giveaway(self.message.id)
+
+        self.entries.clear()
+        self.entry_ids.clear()
+        self.entry_weights.clear()
+        self._unsaved.clear()
         super().stop()
 
-    async def update_embed(self) -> None:
-        """Each time someone joins the giveaway, we'll update the message"""
-        self.embed.set_footer(text=f"{len(self.members)} entries")
+    def add_entry(self, member_id: int, weight: int = 1) -> bool:
+        """Add a member id to the entries, returns False if the member has already entered"""
+        if member_id in self.entries:
+            return False
+
+        self.entries.add(member_id)
+        self.entry_ids.append(member_id)
+        self.entry_weights.append(weight)
+        self.weighted = self.weighted or weight != 1
+        self._unsaved.append((member_id, weight))
+        return True
+
+    def save_entries(self) -> None:
+        """Write any entries that haven't been stored yet"""
+        if self._unsaved:
+            self.store.add_entries(self.message.id, self._unsaved)
+            self._unsaved = []
+
+    def schedule_footer_update(self) -> None:
+        """Schedule a footer update if one is not already pending.  Any joins before it
+        fires are picked up by that same edit"""
+        if self._footer_task is None:
+            self._footer_task = asyncio.create_task(self._flush_footer())
+
+    async def _flush_footer(self) -> None:
+        """Wait out the coalescing interval, then push the current entry count"""
+        await asyncio.sleep(FOOTER_UPDATE_INTERVAL)
+        self._footer_task = None
+
+        if self.is_finished() or self.drawn_at is not None:
+            return
+
+        self.save_entries()
+        await self.update_embed()
+
+    def flush(self) -> None:
+        """Save entries and push a pending footer update right away, ie: when shutting down"""
+        self.save_entries()
+
+        if self._footer_task is not None:
+            self._footer_task.cancel()
+            self._footer_task = None
+
+            if not self.is_finished() and self.drawn_at is None:
+                self.update_embed()
+
+    def update_embed(self) -> asyncio.Future:
+        """Update the message footer with the current entry count.  Optional, the edit waits
+        while the cog is over its REST budget"""
+        self.embed.set_footer(text=f"{len(self.entry_ids)} entries")
 
-        await self.message.edit(embed=self.embed)
+        return self.edits.edit(self.message, embed=self.embed, optional=True)
 
     def is_expired(self) -> bool:
         """Check if the giveaway is expired or not"""
         return disnake.utils.utcnow() >= self.expires_at
 
-    def select_a_winner(self) -> disnake.Member:
-        """Randomly select a winner from the participants and return the selected member"""
-
-        count = len(self.members)
-        if count == 0:
+    async def resolve_members(self, member_ids: list[int]) -> dict[int, disnake.Member]:
+        """Resolve entrant ids to members in bulk.  Ids missing from the result are no longer
+        in the guild.
+
+        Cached members are used directly, anything else is looked up in chunks with a single
+        gateway member request per chunk rather than a fetch per member"""
+        found = {}
+        missing = []
+
+        for member_id in member_ids:
+            if member := self.guild.get_member(member_id):
+                found[member_id] = member
+            else:
+                missing.append(member_id)
+
+        # a chunked guild has every member cached, so missing ids have left
+        if missing and not self.guild.chunked:
+            for i in range(0, len(missing), MEMBER_LOOKUP_CHUNK):
+                chunk = missing[i : i + MEMBER_LOOKUP_CHUNK]
+                for member in await self.guild.query_members(user_ids=chunk, limit=len(chunk)):
+                    found[member.id] = member
+
+        return found
+
+    async def draw_candidates(self, count: int) -> AsyncIterator[int]:
+        """Entrants in draw order that haven't already won.  Big giveaways are drawn in the bot's
+        worker pool, enough for `count` winners first and twice as many each time that runs out"""
+        weights = self.entry_weights if self.weighted else None
+        seed = f"{self.seed}:{len(self.winner_ids)}"
+        previous = set(self.winner_ids)
+
+        if len(self.entry_ids) < WORKER_DRAW_THRESHOLD:
+            for member_id in WinnerDraw(self.entry_ids, weights, seed=seed):
+                if member_id not in previous:
+                    yield member_id
             return
 
-        random.shuffle(self.members)
-        sample_size = count if count < 5 else 5
+        # later batches redraw from the start, they have to see the same entries
+        entry_ids, weights = list(self.entry_ids), weights and list(weights)
+        drawn, limit = 0, len(previous) + count * 2
+
+        while drawn < len(entry_ids):
+            order = await self.cog.workers.submit(
+                "giveaway_draw", draw_order, entry_ids, weights, seed, limit
+            )
+            for member_id in order[drawn:]:
+                if member_id not in previous:
+                    yield member_id
+
+            drawn, limit = len(order), limit * 2
+
+    async def select_winners(self, count: int) -> list[disnake.Member]:
+        """Draw up to `count` winners that haven't already won, skipping entrants that have
+        since left the guild.
+
+        Each round is seeded from the giveaway seed and the number of winners drawn before it,
+        so rerolls are reproducible as well"""
+
+        candidates = self.draw_candidates(count)
+        winners = []
+
+        while len(winners) < count:
+            # over-draw a little so a few entrants that left don't cost another lookup
+            needed = count - len(winners)
+            batch = []
+            async for member_id in candidates:
+                batch.append(member_id)
+                if len(batch) == min(needed * 2, MEMBER_LOOKUP_CHUNK):
+                    break
+
+            if not batch:
+                break
+
+            members = await self.resolve_members(batch)
+
+            # keep draw order so the result only depends on the seed and membership
+            for member_id in batch:
+                if member := members.get(member_id):
+                    winners.append(member)
+                    if len(winners) == count:
+                        break
+
+        return winners
+
+    def create_winner_embed(self) -> disnake.Embed:
+        """Create the embed announcing the winners drawn so far"""
+        mentions = ", ".join(f"<@{member_id}>" for member_id in self.winner_ids[: self.winners])
+
+        embed = disnake.Embed(
+            title=self.embed.title,
+            description=f"Thank you to all {len(self.entry_ids)} members that joined our giveaway.\n\n"
+            f"Congrats to {mentions}! You won {self.prize}\n\n"
+            "Please reach out to an admin or moderator to claim your prize!",
+        )
+
+        if rerolls := self.winner_ids[self.winners :]:
+            embed.add_field(
+                name="Rerolled winners:",
+                value="\n".join(f"<@{member_id}>" for member_id in rerolls),
+            )
+
+        embed.set_footer(text=f"Draw seed: {self.seed}")
+        return embed
+
+    async def draw(self) -> list[disnake.Member]:
+        """Draw the winners, announce them in the giveaway message and leave only the [Reroll]
+        button.  Returns an empty list, and cancels the giveaway, if nobody entered"""
+
+        if self.drawn_at is not None:  # already drawn by the host or the scheduler
+            return []
+
+        self.drawn_at = disnake.utils.utcnow()
+        self.save_entries()
 
-        group = random.sample(self.members, k=sample_size)
-        return random.choice(group)
+        winners = await self.select_winners(self.winners)
 
-    @disnake.ui.button(label="Join Giveaway!", style=disnake.ButtonStyle.primary)
+        if not winners:
+            embed = disnake.Embed(
+                title=self.embed.title,
+                description="This giveaway has been cancelled as nobody joined",
+            )
+            self.clear_items()
+            await self.edits.edit(self.message, embed=embed, components=[])
+            self.stop()
+            return winners
+
+        # fewer may have been drawn than asked for, later rerolls must not count as main winners
+        self.winners = len(winners)
+        self.winner_ids.extend(member.id for member in winners)
+        self.store.set_winners(self.message.id, self.winners, self.winner_ids, self.drawn_at)
+        self.cog.schedule_close(self)
+
+        self.clear_items()
+        self.add_item(self.reroll)
+        await self.edits.edit(
+            self.message, embed=self.create_winner_embed(), components=self.children
+        )
+
+        return winners
+
+    async def on_stale_interaction(self, inter: disnake.MessageInteraction) -> None:
+        """Called by the component dispatcher for a button the view no longer has, ie: a late
+        Join click on a message that doesn't show the draw yet"""
+        await inter.response.send_message("This giveaway has ended.", ephemeral=True)
+
+    async def close(self) -> None:
+        """The reroll period is over, remove the button and forget the giveaway"""
+        self.clear_items()
+        await self.edits.edit(self.message, components=[])
+        self.stop()
+
+    @disnake.ui.button(
+        label="Join Giveaway!", style=disnake.ButtonStyle.primary, custom_id="giveaway:join"
+    )
     async def join(self, button: disnake.ui.Button, inter: disnake.MessageInteraction) -> None:
 
         if self.is_expired():
             self.join.disabled = True
-            await self.message.edit(view=self)
-            return await inter.response.send_message(
+            await inter.response.send_message(
                 "The join period for this giveaway has ended.", ephemeral=True
             )
+            return await self.edits.edit(self.message, components=self.children)
+
+        weight = 1 + sum(BONUS_ENTRY_ROLES.get(role.id, 0) for role in inter.author.roles)
 
-        if inter.author in self.members:
+        if not self.add_entry(inter.author.id, weight):
             return await inter.response.send_message(
                 "Sorry.  You're not allowed to enter more than once.", ephemeral=True
             )
 
-        self.members.append(inter.author)
-
-        await self.update_embed()
+        # respond first so the interaction is acknowledged well within the deadline
         await inter.response.send_message(
             "Congrats! You have been entered in to the giveaway!", ephemeral=True
         )
+        self.schedule_footer_update()
 
-    @disnake.ui.button(label="Select Winner", style=disnake.ButtonStyle.secondary)
+    @disnake.ui.button(
+        label="Select Winner",
+        style=disnake.ButtonStyle.secondary,
+        custom_id="giveaway:select_winner",
+    )
     async def select_winner(
         self, button: disnake.ui.Button, inter: disnake.MessageInteraction
     ) -> None:
 
-        if inter.author.id != self.author.id:
+        if inter.author.id != self.author_id:
             return await inter.response.send_message(
                 "Only the giveaway owner can do this.", ephemeral=True
             )
 
-        await inter.response.defer(with_message=True, ephemeral=True)
-        await asyncio.sleep(
-            1 if len(self.members) < 10 else 3 if 20 < len(self.members) < 50 else 5
-        )
+        if self.drawn_at is not None or self._draw_task is not None:
+            return await inter.response.send_message(
+                "The winners are already being drawn.", ephemeral=True
+            )
 
-        winner = self.select_a_winner()
-        if winner is None:
-            return await self.cancel.callback(inter)
+        if DRAW_COUNTDOWN:
+            # show the countdown with one edit and let the scheduler do the draw
+            draw_at = disnake.utils.utcnow() + timedelta(seconds=DRAW_COUNTDOWN)
+            self.expires_at = min(self.expires_at, draw_at)
+            self.cog.scheduler.schedule(self.message.id, draw_at)
 
-        embed = disnake.Embed(
-            title=self.embed.title,
-            description=f"Thank you to all {len(self.members)} members that joined our giveaway.\n\n"
-            f"Congrats to {winner.mention}! You are the lucky winner of {self.prize}\n\n"
-            "Please reach out to an admin or moderator to claim your prize!",
-        )
+            self.join.disabled = True
+            self.select_winner.disabled = True
+            self.embed.add_field(name="Drawing:", value=disnake.utils.format_dt(draw_at, "R"))
+
+            await inter.response.send_message(
+                f"Winners will be drawn {disnake.utils.format_dt(draw_at, 'R')}", ephemeral=True
+            )
+            return await self.edits.edit(
+                self.message, embed=self.embed, components=self.children
+            )
+
+        await inter.response.send_message("Drawing the winners...", ephemeral=True)
+        self._draw_task = asyncio.create_task(self.report_draw(inter))
+
+    async def report_draw(self, inter: disnake.MessageInteraction) -> None:
+        """Draw in the background and let the host know who won"""
+        winners = await self.draw()
+        if not winners:
+            return await inter.edit_original_response(
+                "Giveaway was cancelled due to nobody joining"
+            )
 
-        await self.message.edit(embed=embed, view=self.clear_items())
         await inter.edit_original_response(
-            f"Giveaway has closed and {winner.mention} was selected!"
+            f"Giveaway has closed and {', '.join(w.mention for w in winners)} "
+            f"{'was' if len(winners) == 1 else 'were'} selected!"
         )
-        self.stop()
 
-    @disnake.ui.button(label="Cancel", style=disnake.ButtonStyle.red)
+    @disnake.ui.button(
+        label="Cancel", style=disnake.ButtonStyle.red, custom_id="giveaway:cancel"
+    )
     async def cancel(self, button: disnake.ui.Button, inter: disnake.MessageInteraction) -> None:
 
-        if inter.author.id != self.author.id:
+        if inter.author.id != self.author_id:
             return await inter.response.send_message(
                 "Only the giveaway owner can do this.", ephemeral=True
             )
@@ -163,45 +652,224 @@ class GiveawayView(disnake.ui.View):
             description=f"This giveaway has been cancelled by {inter.author.mention}",
         )
 
-        await self.message.edit(embed=embed, view=self.clear_items())
-
-        if (
-            inter.response._response_type is None
-        ):  # making sure it was the button that called this function
-            await inter.response.send_message("Giveaway has been cancelled", ephemeral=True)
-        else:  # select winners has no members, so we just cancel the giveaway and send this message to the command user
-            await inter.edit_original_response("Giveaway was cancelled due to nobody joining")
+        self.clear_items()
+        await self.edits.edit(self.message, embed=embed, components=[])
+        await inter.response.send_message("Giveaway has been cancelled", ephemeral=True)
         self.stop()
 
+    @disnake.ui.button(
+        label="Reroll", style=disnake.ButtonStyle.secondary, custom_id="giveaway:reroll"
+    )
+    async def reroll(self, button: disnake.ui.Button, inter: disnake.MessageInteraction) -> None:
+        """Draw one replacement winner, excluding everyone that has already won"""
 
-async def get_future_time(inter: disnake.GuildCommandInteraction, expires_in: str) -> str:
-    """Verifies the argument value for expires_in is correct and returns the converted future datetime object, or
-    raises an error"""
+        if inter.author.id != self.author_id:
+            return await inter.response.send_message(
+                "Only the giveaway owner can do this.", ephemeral=True
+            )
 
-    time, metric = expires_in[:-1], expires_in[-1].lower()
+        # the draw excludes previous winners, a second reroll has to wait for this one's result
+        if self._reroll_lock.locked():
+            return await inter.response.send_message(
+                "A reroll is already in progress.", ephemeral=True
+            )
 
-    if not time.isdigit() or metric.isdigit():
-        raise Exception(f"⚠️ `expires_in` must much the correct format: `1s`, `1m`, `1h`, or `1d`")
+        async with self._reroll_lock:
+            await inter.response.defer(with_message=True, ephemeral=True)
 
-    now = disnake.utils.utcnow()
-    futures = {
-        "s": timedelta(seconds=int(time)),
-        "m": timedelta(minutes=int(time)),
-        "h": timedelta(hours=int(time)),
-        "d": timedelta(days=int(time)),
-    }
+            winners = await self.select_winners(1)
+            if not winners:
+                return await inter.edit_original_response("There is nobody left to draw from.")
+
+            self.winner_ids.append(winners[0].id)
+            self.store.set_winners(self.message.id, self.winners, self.winner_ids, self.drawn_at)
+
+        await self.edits.edit(self.message, embed=self.create_winner_embed())
+        await inter.edit_original_response(f"Rerolled! {winners[0].mention} was selected!")
 
-    if not (future := futures.get(metric)):
-        raise Exception(
-            f"⚠️ `expires_in` must include one of `s`, `m`, `h` to represent seconds, minutes, or hours"
-        )
 
-    return now + future
+async def get_future_time(inter: disnake.GuildCommandInteraction, expires_in: str) -> datetime:
+    """Verifies the argument value for expires_in is correct and returns the converted future datetime object, or
+    raises an error"""
+    return parse_duration(expires_in, name="expires_in").expires_at
 
 
 class GiveAway(commands.Cog):
     def __init__(self, bot: commands.InteractionBot) -> None:
         self.bot = bot
+        self.store: GiveawayStore = GiveawayStore()
+        self.edits: EditScheduler = get_edit_scheduler(bot)
+        self.components: ComponentDispatcher = get_component_dispatcher(bot)
+        self.workers: WorkerPool = get_worker_pool(bot)
+
+        # active giveaways by message id.  A single scheduler draws them at their expiry and
+        # closes them once their reroll period is over
+        self.views: dict[int, GiveawayView] = {}
+        self.scheduler: Scheduler = Scheduler(self.on_giveaway_due, name="giveaway-draws")
+        self._restored: bool = False
+
+    def cog_unload(self) -> None:
+        self.scheduler.stop()
+
+        for message_id, view in self.views.items():
+            # pending footer updates and draws write to the store, stop them before it is closed
+            for task in (view._footer_task, view._draw_task):
+                if task is not None:
+                    task.cancel()
+            view._footer_task = view._draw_task = None
+
+            view.save_entries()
+            self.components.remove_view(message_id)
+
+        self.store.close()
+
+    async def save_state(self) -> None:
+        """Called on shutdown - store entries that haven't been yet and send pending entry
+        counts"""
+        for view in self.views.values():
+            view.flush()
+
+    def export_state(self) -> dict:
+        """Called before the module is reloaded - hand the active giveaways over to the new
+        module.  Entries are saved when the cog is unloaded, a pending footer update is redone by
+        the new view"""
+        giveaways = []
+
+        for view in self.views.values():
+            footer_pending = view._footer_task is not None
+            if footer_pending:
+                view._footer_task.cancel()
+                view._footer_task = None
+
+            giveaways.append(
+                {
+                    "message": view.message,
+                    "author_id": view.author_id,
+                    "guild": view.guild,
+                    "embed": view.embed,
+                    "expires_at": view.expires_at,
+                    "prize": view.prize,
+                    "winners": view.winners,
+                    "seed": view.seed,
+                    "entry_ids": view.entry_ids,
+                    "entry_weights": view.entry_weights,
+                    "winner_ids": view.winner_ids,
+                    "drawn_at": view.drawn_at,
+                    "disabled": [item.custom_id for item in view.children if item.disabled],
+                    "footer_pending": footer_pending,
+                }
+            )
+
+        return {"restored": self._restored, "giveaways": giveaways}
+
+    def import_state(self, state: dict) -> None:
+        """Called once the module is reloaded - rebuild the active giveaways with the new views"""
+        self._restored = state["restored"]
+
+        for giveaway in state["giveaways"]:
+            view = GiveawayView(
+                self,
+                giveaway["author_id"],
+                giveaway["guild"],
+                embed=giveaway["embed"],
+                expires_at=giveaway["expires_at"],
+                prize=giveaway["prize"],
+                winners=giveaway["winners"],
+                seed=giveaway["seed"],
+            )
+            view.message = giveaway["message"]
+
+            for member_id, weight in zip(giveaway["entry_ids"], giveaway["entry_weights"]):
+                view.add_entry(member_id, weight)
+            view._unsaved.clear()
+
+            if giveaway["drawn_at"] is not None:
+                view.drawn_at = giveaway["drawn_at"]
+                view.winner_ids = giveaway["winner_ids"]
+                view.clear_items()
+                view.add_item(view.reroll)
+            elif giveaway["footer_pending"]:
+                view.schedule_footer_update()
+
+            for item in view.children:
+                item.disabled = item.custom_id in giveaway["disabled"]
+
+            self.track(view)
+
+    def track(self, view: GiveawayView) -> None:
+        """Keep a reference to an active giveaway and schedule its draw"""
+        self.views[view.message.id] = view
+        self.components.add_view("giveaway", view.message.id, view)
+
+        if view.drawn_at is None:
+            self.scheduler.schedule(view.message.id, view.expires_at)
+        else:
+            self.schedule_close(view)
+
+        self.scheduler.start()
+
+    def schedule_close(self, view: GiveawayView) -> None:
+        """Schedule the end of a drawn giveaway's reroll period"""
+        self.scheduler.schedule(view.message.id, view.drawn_at + REROLL_PERIOD)
+
+    def untrack(self, message_id: int) -> None:
+        """Forget a giveaway that has been closed or cancelled"""
+        self.views.pop(message_id, None)
+        self.components.remove_view(message_id)
+        self.scheduler.cancel(message_id)
+
+    async def on_giveaway_due(self, message_id: int) -> None:
+        """Scheduler callback - draw a giveaway that has expired, or close one whose reroll
+        period is over"""
+        if (view := self.views.get(message_id)) is None:
+            return
+
+        if view.drawn_at is None:
+            await view.draw()
+        else:
+            await view.close()
+
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        """Reload pending giveaways from the store and start tracking their views again"""
+        if self._restored:
+            return
+        self._restored = True
+
+        for row in self.store.load_giveaways():
+            message_id = row["message_id"]
+            guild = self.bot.get_guild(row["guild_id"])
+            channel = guild.get_channel(row["channel_id"]) if guild else None
+
+            if channel is None:  # guild or channel is gone, nothing to draw for
+                self.store.remove_giveaway(message_id)
+                continue
+
+            view = GiveawayView(
+                self,
+                row["author_id"],
+                guild,
+                embed=disnake.Embed.from_dict(json.loads(row["embed"])),
+                expires_at=datetime.fromtimestamp(row["expires_at"], tz=timezone.utc),
+                prize=row["prize"],
+                winners=row["winners"],
+                seed=row["seed"],
+            )
+            view.message = channel.get_partial_message(message_id)
+
+            for entry in self.store.load_entries(message_id):
+                view.add_entry(entry["member_id"], entry["weight"])
+            view._unsaved.clear()
+
+            if row["drawn_at"] is not None:
+                view.drawn_at = datetime.fromtimestamp(row["drawn_at"], tz=timezone.utc)
+                view.winner_ids = json.loads(row["winner_ids"])
+                view.clear_items()
+                view.add_item(view.reroll)
+
+            self.track(view)
+
+        logger.info(f"Restored {len(self.views)} pending giveaway(s)")
 
     async def cog_slash_command_error(
         self, inter: disnake.GuildCommandInteraction, error: Exception
@@ -222,6 +890,7 @@ class GiveAway(commands.Cog):
         ),
         title: str = "Giveaway Time!",
         description: str | None = None,
+        winners: int = commands.Param(default=1, ge=1, le=20),
     ) -> None:
         """
         Create a new giveaway
@@ -231,11 +900,13 @@ class GiveAway(commands.Cog):
         prize: :type:`str`
             What is being given away?
         expires_in: :type:`str`
-            Amount of time this giveaway is active (s/seconds, m/minutes, h/hours, d/days) (default: 5d)
+            Amount of time this giveaway is active (ie: 30m, 1h30m, 2d) (default: 5d)
         title: :type:`str`
             Title this giveaway
         description: :type:`str|None`
             Description for this giveaway
+        winners: :type:`int`
+            How many winners to draw (default: 1)
         """
 
         if description:
@@ -250,12 +921,25 @@ class GiveAway(commands.Cog):
             color=disnake.Color.random(),
         )
         embed.add_field(name="Prize:", value=prize)
+        if winners > 1:
+            embed.add_field(name="Winners:", value=str(winners))
         embed.set_footer(text="0 entries")
 
-        view = GiveawayView(inter.author, embed=embed, expires_at=expires_in, prize=prize)
-        await inter.response.send_message(embed=embed, view=view)
+        view = GiveawayView(
+            self,
+            inter.author.id,
+            inter.guild,
+            embed=embed,
+            expires_at=expires_in,
+            prize=prize,
+            winners=winners,
+        )
+        await inter.response.send_message(embed=embed, components=view.children)
         view.message = await inter.original_message()
 
+        self.store.add_giveaway(view)
+        self.track(view)
+
 
 def setup(bot: commands.InteractionBot) -> None:
     bot.add_cog(GiveAway(bot))
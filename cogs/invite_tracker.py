@@ -23,7 +23,7 @@ SOFTWARE.
 
 
 ---------------------------------------------------
-Disnake Invite Tracker with Welcome Embed - 0.1.2
+Disnake Invite Tracker with Welcome Embed - 0.2.0
 ---------------------------------------------------
 
 A simple Invite tracker that keeps a cache of all guilds and their invites.
@@ -36,19 +36,41 @@ a welcome message to the system channel or first channel that it has permission
 to view/send messages in with an embed that welcomes the new member and shows 
 who created the invite that was used.
 
+A `member_invite` event is dispatched with the member and the invite they used.  If the
+raid guard module is loaded, welcome messages are skipped while a raid is active.  The cache is
+carried over when the module is reloaded (see `main.MyBot.reload_extension`).
+
+Fetching every guild's invites once the bot is ready takes a while on large bots.  On a graceful
+shutdown the cache is saved to the bot's state store (see `cogs/utils/state.py`) and a restart
+within `SNAPSHOT_MAX_AGE` restores it instead.
+
 This module also includes a simple command to show all invites with the url, creator, and uses
 for each invite.  This will create a slash command called `/invites` that is useable for any
 member that has `manage_guild` permissions
 """
 
+import json
+import time
+
 import disnake
 from disnake.ext import commands
 from loguru import logger
 
+from .utils.state import StateStore, get_state_store
+
+# state store key of a guild's invite cache snapshot taken on shutdown, keyed by guild so shards
+# sharing a store only restore (and consume) their own guilds
+SNAPSHOT_KEY = "invites:snapshot:{}"
+
+# seconds a snapshot is used for after shutting down, restarts that take longer fetch every
+# guild's invites again
+SNAPSHOT_MAX_AGE = 300
+
 
 class InviteTracker:
-    def __init__(self, bot):
+    def __init__(self, bot, store: StateStore | None = None):
         self.bot = bot
+        self.store: StateStore | None = store
         self.cache: dict[int, dict[str, disnake.Invite]] = {}
 
         self.bot.add_listener(self.populate_invite_cache, "on_ready")
@@ -58,9 +80,21 @@ class InviteTracker:
         self.bot.add_listener(self.remove_invite_from_cache, "on_invite_delete")
 
     async def populate_invite_cache(self) -> None:
-        """Populates the InviteTracker's cache on bot ready"""
+        """Populates the InviteTracker's cache on bot ready.  Guilds in a recent snapshot are
+        restored from it rather than fetching their invites"""
+        started = time.monotonic()
+        snapshot = await self.load_snapshot([guild.id for guild in self.bot.guilds])
+        restored = 0
 
         for guild in self.bot.guilds:
+            if (invites := snapshot.get(guild.id)) is not None:
+                self.cache[guild.id] = {
+                    data["code"]: disnake.Invite(state=self.bot._connection, data=data, guild=guild)
+                    for data in invites
+                }
+                restored += 1
+                continue
+
             try:
                 self.cache[guild.id] = {}
                 for invite in await guild.invites():
@@ -72,6 +106,52 @@ class InviteTracker:
                 )
                 continue
 
+        logger.info(
+            f"Cached invites of {len(self.bot.guilds)} guild(s) in "
+            f"{time.monotonic() - started:.2f}s, {restored} restored from the snapshot"
+        )
+
+    async def save_snapshot(self) -> None:
+        """Store the cache so a quick restart can skip fetching every guild's invites"""
+        if self.store is None:
+            return
+
+        saved_at = time.time()
+        for guild_id, invites in self.cache.items():
+            data = [
+                {
+                    "code": invite.code,
+                    "uses": invite.uses,
+                    "max_uses": invite.max_uses,
+                    "max_age": invite.max_age,
+                    "temporary": invite.temporary,
+                    "created_at": invite.created_at.isoformat() if invite.created_at else None,
+                    "inviter": invite.inviter._to_minimal_user_json() if invite.inviter else None,
+                }
+                for invite in invites.values()
+            ]
+            await self.store.set(
+                SNAPSHOT_KEY.format(guild_id), json.dumps({"saved_at": saved_at, "invites": data})
+            )
+
+    async def load_snapshot(self, guild_ids: list[int]) -> dict[int, list[dict]]:
+        """Return the cached invites by guild id from the last snapshot of the given guilds, if it
+        is recent enough.  A snapshot is only used once, later reconnects fetch the invites again"""
+        if self.store is None:
+            return {}
+
+        guilds = {}
+        for guild_id in guild_ids:
+            if (data := await self.store.get(key := SNAPSHOT_KEY.format(guild_id))) is None:
+                continue
+
+            await self.store.delete(key)
+            snapshot = json.loads(data)
+            if time.time() - snapshot["saved_at"] <= SNAPSHOT_MAX_AGE:
+                guilds[guild_id] = snapshot["invites"]
+
+        return guilds
+
     async def add_guild_to_cache(self, guild: disnake.Guild) -> None:
         """Adds a guild and it's current invites the cache"""
 
@@ -107,23 +187,44 @@ class InviteTracker:
                 self.cache[invite.guild.id].pop(invite.code)
 
     async def get_invite(self, guild: disnake.Guild) -> disnake.Invite | None:
-        """Get an invite from the cache"""
+        """Get the invite a new member used, the cached invite whose uses went up.  Every cached
+        count is brought up to date, so joins missed while the bot was down (ie: since the
+        snapshot) are only counted against the next join once"""
+        cached_invites = self.cache.setdefault(guild.id, {})
+        used = None
 
         for guild_invite in await guild.invites():
-            for cached_invite in self.cache[guild.id].values():
-                if (
-                    cached_invite.uses < guild_invite.uses
-                    and guild_invite.code == cached_invite.code
-                ):
-                    cached_invite.uses += 1
+            cached_invite = cached_invites.get(guild_invite.code)
+
+            if cached_invite is None:  # created while the bot wasn't watching
+                cached_invites[guild_invite.code] = cached_invite = guild_invite
+                if guild_invite.uses and used is None:
+                    used = guild_invite
 
-                    return cached_invite
+            elif cached_invite.uses < guild_invite.uses:
+                cached_invite.uses = guild_invite.uses
+                if used is None:
+                    used = cached_invite
+
+        return used
 
 
 class Invites(commands.Cog):
     def __init__(self, bot: commands.InteractionBot):
         self.bot: commands.InteractionBot = bot
-        self.invite_cache: InviteTracker = InviteTracker(bot)
+        self.invite_cache: InviteTracker = InviteTracker(bot, get_state_store(bot))
+
+    async def save_state(self) -> None:
+        """Called on shutdown - snapshot the invite cache for a quick restart"""
+        await self.invite_cache.save_snapshot()
+
+    def export_state(self) -> dict:
+        """Called before the module is reloaded - keep the invite cache, the bot is already
+        ready and won't populate it again"""
+        return {"cache": self.invite_cache.cache}
+
+    def import_state(self, state: dict) -> None:
+        self.invite_cache.cache = state["cache"]
 
     def get_channel(self, guild: disnake.Guild) -> disnake.TextChannel:
         """Gets the guild's system channel, if present, or it selects the first `disnake.TextChannel` the bot
@@ -152,6 +253,14 @@ class Invites(commands.Cog):
         guild = member.guild
 
         if invite := await self.invite_cache.get_invite(guild):
+            # let other modules (ie: raid guard) know which invite was used
+            bot.dispatch("member_invite", member, invite)
+
+            # don't amplify a raid with a welcome message for every account
+            raid_guard = bot.get_cog("RaidGuard")
+            if raid_guard is not None and raid_guard.is_raided(guild.id):
+                return
+
             embed = disnake.Embed(description=f"**Welcome {member.mention}!**")
             embed.set_thumbnail(
                 url=bot.user.avatar.url
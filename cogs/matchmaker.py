@@ -22,7 +22,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 
 ------------------------------
-Disnake - Matchmaker - 0.2.0
+Disnake - Matchmaker - 0.4.0
 ------------------------------
 A very simple random team generator module
 
@@ -42,17 +42,28 @@ the selected map that the match will be played on.
 
 Maps should be entered as a comma separated list (ie:  Breeze, Fracture, Icebox, ...)
 You can also include a thumbnail and/or image to be displayed for this match making event.
-"""
 
+Open queues are saved when the bot shuts down gracefully and reopened once it is back, and handed
+over to the new code when the module is reloaded (see `main.MyBot.reload_extension`).
+"""
 
+import json
 import math
 import random
 
 import disnake
 from disnake.ext import commands
+from loguru import logger
+
+from .utils.components import ComponentDispatcher, get_component_dispatcher
+from .utils.edits import EditScheduler, get_edit_scheduler
+from .utils.state import StateStore, get_state_store
 
 
 class TeamBuilder(disnake.ui.View):
+
+    message: disnake.Message | disnake.PartialMessage
+
     def __init__(
         self,
         leader: disnake.Member,
@@ -60,9 +71,13 @@ class TeamBuilder(disnake.ui.View):
         thumbnail: disnake.Attachment | None,
         max_players: int = 10,
         maps: list[str] | None = None,
+        *,
+        edits: EditScheduler,
     ) -> None:
         super().__init__(timeout=None)
 
+        self.edits: EditScheduler = edits
+
         self.leader: disnake.Member = leader
         self.image: disnake.Attachment | None = image
         self.thumbnail: disnake.Attachment | None = thumbnail
@@ -77,6 +92,18 @@ class TeamBuilder(disnake.ui.View):
         self.queue.clear()
         super().stop()
 
+    def to_dict(self) -> dict:
+        """The queue's state, to reopen it after a restart"""
+        return {
+            "guild_id": self.leader.guild.id,
+            "channel_id": self.message.channel.id,
+            "leader_id": self.leader.id,
+            "queue": [member.id for member in self.queue],
+            "max_players": self.max_players,
+            "maps": self.maps,
+            "embed": self.embed.to_dict(),
+        }
+
     def update_queue_embed(self) -> None:
         """Update the state of the queue embed - update as queue changes"""
 
@@ -107,7 +134,9 @@ class TeamBuilder(disnake.ui.View):
         self.play.disabled = True if len(self.queue) < 2 else False
         self.leave.disabled = True if len(self.queue) == 0 else False
 
-    @disnake.ui.button(label="Join Queue", style=disnake.ButtonStyle.primary)
+    @disnake.ui.button(
+        label="Join Queue", style=disnake.ButtonStyle.primary, custom_id="matchmaker:join"
+    )
     async def join(self, button: disnake.ui.Button, inter: disnake.MessageInteraction) -> None:
         """Add the interaction user to the queue if they are not already in it"""
 
@@ -121,10 +150,12 @@ class TeamBuilder(disnake.ui.View):
         self.update_buttons()
         self.update_queue_embed()
 
-        await inter.message.edit(embed=self.embed, view=self)
-        return await inter.response.send_message("Ayyyyy! You joined the queue!.", ephemeral=True)
+        await inter.response.send_message("Ayyyyy! You joined the queue!.", ephemeral=True)
+        self.edits.edit(inter.message, embed=self.embed, components=self.children)
 
-    @disnake.ui.button(label="Leave Queue", style=disnake.ButtonStyle.secondary)
+    @disnake.ui.button(
+        label="Leave Queue", style=disnake.ButtonStyle.secondary, custom_id="matchmaker:leave"
+    )
     async def leave(self, button: disnake.ui.Button, inter: disnake.MessageInteraction) -> None:
         """Remove the interaction user from the queue if they area in it"""
 
@@ -138,13 +169,15 @@ class TeamBuilder(disnake.ui.View):
         self.update_buttons()
         self.update_queue_embed()
 
-        await inter.message.edit(embed=self.embed, view=self)
-        return await inter.response.send_message(
+        await inter.response.send_message(
             "I removed you from the queue, but I really think you should reconsider joining 😀",
             ephemeral=True,
         )
+        self.edits.edit(inter.message, embed=self.embed, components=self.children)
 
-    @disnake.ui.button(label="Play", style=disnake.ButtonStyle.success)
+    @disnake.ui.button(
+        label="Play", style=disnake.ButtonStyle.success, custom_id="matchmaker:play"
+    )
     async def play(self, button: disnake.ui.Button, inter: disnake.MessageInteraction) -> None:
         """Performs the match making process by generating the teams and selecting a map (if available)"""
 
@@ -172,10 +205,15 @@ class TeamBuilder(disnake.ui.View):
         embed.add_field(name="Team One:", value="\n".join(team_one), inline=True)
         embed.add_field(name="Team Two:", value="\n".join(team_two), inline=True)
 
-        await inter.response.edit_message(None, embed=embed, view=self.clear_items())
+        # a queue update still waiting to go out would overwrite the teams
+        self.edits.cancel(inter.message.id)
+        self.clear_items()
+        await inter.response.edit_message(None, embed=embed, components=[])
         self.stop()
 
-    @disnake.ui.button(label="Cancel", style=disnake.ButtonStyle.danger)
+    @disnake.ui.button(
+        label="Cancel", style=disnake.ButtonStyle.danger, custom_id="matchmaker:cancel"
+    )
     async def cancel(self, button: disnake.ui.Button, inter: disnake.MessageInteraction) -> None:
         """Cancels matchmaking, clear the queue and buttons, and stops the view"""
 
@@ -185,8 +223,10 @@ class TeamBuilder(disnake.ui.View):
                 ephemeral=True,
             )
 
+        self.edits.cancel(inter.message.id)
+        self.clear_items()
         await inter.response.edit_message(
-            "Matchmaking has been cancelled.", embed=None, view=self.clear_items()
+            "Matchmaking has been cancelled.", embed=None, components=[]
         )
         self.stop()
 
@@ -194,6 +234,106 @@ class TeamBuilder(disnake.ui.View):
 class MatchMaker(commands.Cog):
     def __init__(self, bot: commands.InteractionBot) -> None:
         self.bot: commands.InteractionBot = bot
+        self.edits: EditScheduler = get_edit_scheduler(bot)
+        self.components: ComponentDispatcher = get_component_dispatcher(bot)
+        self.store: StateStore = get_state_store(bot)
+        self._restored: bool = False
+
+    async def save_state(self) -> None:
+        """Called on shutdown - save the open queues, they are reopened once the bot is ready"""
+        for message_id, view in self.lobbies().items():
+            await self.store.set(f"lobby:{message_id}", json.dumps(view.to_dict()))
+
+    def lobbies(self) -> dict[int, TeamBuilder]:
+        """Open queues by message id"""
+        return {
+            message_id: view
+            for message_id, view in self.components.views.items()
+            if isinstance(view, TeamBuilder) and not view.is_finished()
+        }
+
+    def export_state(self) -> dict:
+        """Called before the module is reloaded - hand the open queues over to the new module"""
+        return {
+            "restored": self._restored,
+            "lobbies": [
+                {
+                    "message": view.message,
+                    "leader": view.leader,
+                    "image": view.image,
+                    "thumbnail": view.thumbnail,
+                    "max_players": view.max_players,
+                    "maps": view.maps,
+                    "queue": view.queue,
+                    "embed": view.embed,
+                }
+                for view in self.lobbies().values()
+            ],
+        }
+
+    def import_state(self, state: dict) -> None:
+        """Called once the module is reloaded - replace the open queues' views with new ones"""
+        self._restored = state["restored"]
+
+        for lobby in state["lobbies"]:
+            view = TeamBuilder(
+                lobby["leader"],
+                lobby["image"],
+                lobby["thumbnail"],
+                lobby["max_players"],
+                lobby["maps"],
+                edits=self.edits,
+            )
+            view.queue = lobby["queue"]
+            view.embed = lobby["embed"]
+            view.update_buttons()
+
+            view.message = lobby["message"]
+            self.components.add_view("matchmaker", view.message.id, view)
+
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        """Reopen the queues saved on the last shutdown"""
+        if self._restored:
+            return
+        self._restored = True
+
+        restored = 0
+        for key in await self.store.keys("lobby:"):
+            if (raw := await self.store.get(key)) is None:
+                continue
+
+            data = json.loads(raw)
+            if (channel := self.bot.get_channel(data["channel_id"])) is None:
+                # with a shared store it may be another shard's lobby, only clean up after
+                # channels that are gone from guilds this process has
+                if self.bot.get_guild(data.get("guild_id", 0)) is not None:
+                    await self.store.delete(key)
+                continue
+
+            await self.store.delete(key)
+
+            # members that left the guild meanwhile are dropped from the queue
+            members = [
+                await channel.guild.get_or_fetch_member(member_id)
+                for member_id in (data["leader_id"], *data["queue"])
+            ]
+            if (leader := members[0]) is None:
+                continue
+
+            view = TeamBuilder(
+                leader, None, None, data["max_players"], data["maps"], edits=self.edits
+            )
+            view.queue = [member for member in members[1:] if member is not None]
+            view.embed = disnake.Embed.from_dict(data["embed"])
+            view.update_buttons()
+            view.update_queue_embed()
+
+            view.message = channel.get_partial_message(int(key.partition(":")[2]))
+            self.components.add_view("matchmaker", view.message.id, view)
+            restored += 1
+
+        logger.info(f"Reopened {restored} matchmaking queue(s)")
 
     @commands.slash_command(name="matchmaker")
     async def matchmaker(
@@ -239,13 +379,16 @@ class MatchMaker(commands.Cog):
 
         message += f"{inter.author.mention} is looking to play some games!.  Click to join the queue below!"
 
-        view = TeamBuilder(inter.author, image, thumbnail, max_players, maps)
+        view = TeamBuilder(inter.author, image, thumbnail, max_players, maps, edits=self.edits)
         view.queue.append(inter.author)
 
         view.update_buttons()
         view.update_queue_embed()
 
-        await inter.response.send_message(message, embed=view.embed, view=view)
+        await inter.response.send_message(message, embed=view.embed, components=view.children)
+
+        view.message = await inter.original_message()
+        self.components.add_view("matchmaker", view.message.id, view)
 
 
 def setup(bot: commands.InteractionBot) -> None:
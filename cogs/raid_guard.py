@@ -0,0 +1,288 @@
+"""
+MIT License
+
+Copyright (c) 2022 DLCHAMP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+------------------------------
+Disnake Raid Guard - 0.1.1
+------------------------------
+Watches member joins for raids and can respond automatically.
+
+Join rates are tracked per guild and per invite code with exponentially decaying counters, so each
+join costs O(1) no matter how busy the guild is.  A raid is flagged when either
+- the guild's join rate passes `GUILD_JOIN_THRESHOLD` with mostly new accounts joining, or
+- `INVITE_NEW_ACCOUNT_THRESHOLD` new accounts join through the same invite in a short time
+
+While a raid is active (until `RAID_COOLDOWN` passes without another anomaly) welcome messages from
+the invite tracker are suppressed, if `RAID_LOCKDOWN` is enabled the guild's invites are paused, and
+if `RAID_TIMEOUT` is set (off by default) new accounts that joined during the raid are timed out
+through the Moderation cog when it is loaded.  A `raid_detected` event is dispatched with the guild
+and reason so other modules can react.
+
+Per invite counts rely on the invite tracker module, which dispatches `member_invite` once it has
+worked out which invite a new member used.
+
+Memory is bounded by `MAX_TRACKED_GUILDS` and `MAX_TRACKED_INVITES`, the least recently active
+entries are dropped first.  Join rates and active raids are carried over when the module is
+reloaded (see `main.MyBot.reload_extension`).
+"""
+
+import math
+import time
+from collections import OrderedDict, deque
+from datetime import timedelta
+from typing import Generic, TypeVar
+
+import disnake
+from disnake.ext import commands
+from loguru import logger
+
+# counters halve every JOIN_HALF_LIFE seconds, roughly "joins in the last minute" at 30s
+JOIN_HALF_LIFE = 30
+
+# decayed guild join count that is considered a flood, if at least NEW_ACCOUNT_RATIO of the
+# joins are new accounts
+GUILD_JOIN_THRESHOLD = 10
+NEW_ACCOUNT_RATIO = 0.5
+
+# decayed count of new accounts joining through a single invite that is considered a raid
+INVITE_NEW_ACCOUNT_THRESHOLD = 5
+
+# accounts younger than this are considered new
+NEW_ACCOUNT_AGE = timedelta(days=7)
+
+# how long a raid stays active after the last anomaly, in seconds
+RAID_COOLDOWN = 300
+
+# timeout new accounts that join during a raid for this long, ie: timedelta(hours=1).  None leaves
+# them be
+RAID_TIMEOUT: timedelta | None = None
+
+# pause the guild's invites when a raid is detected
+RAID_LOCKDOWN = False
+
+# bounds on tracked state
+MAX_TRACKED_GUILDS = 10_000
+MAX_TRACKED_INVITES = 50_000
+RECENT_JOINS = 200
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class DecayingCounter:
+    """A counter that decays exponentially over time, an O(1) stand in for a sliding window"""
+
+    __slots__ = ("value", "updated")
+
+    def __init__(self) -> None:
+        self.value: float = 0.0
+        self.updated: float = 0.0
+
+    def current(self, now: float) -> float:
+        """Return the decayed value at `now`"""
+        return self.value * math.exp2((self.updated - now) / JOIN_HALF_LIFE)
+
+    def hit(self, now: float) -> float:
+        """Count one event at `now` and return the new value"""
+        self.value = self.current(now) + 1
+        self.updated = now
+        return self.value
+
+
+class LRUDict(OrderedDict, Generic[K, V]):
+    """An OrderedDict that drops its least recently used key once it grows past `max_size`"""
+
+    def __init__(self, max_size: int) -> None:
+        super().__init__()
+        self.max_size: int = max_size
+
+    def touch(self, key: K, factory: type[V]) -> V:
+        """Return the value for key, creating it if needed, and mark it as recently used"""
+        try:
+            self.move_to_end(key)
+            return self[key]
+        except KeyError:
+            value = self[key] = factory()
+            if len(self) > self.max_size:
+                self.popitem(last=False)
+            return value
+
+
+class GuildStats:
+    """Join statistics for a single guild"""
+
+    __slots__ = ("joins", "new_joins", "recent", "raid_until", "reason")
+
+    def __init__(self) -> None:
+        self.joins: DecayingCounter = DecayingCounter()
+        self.new_joins: DecayingCounter = DecayingCounter()
+        # (member, joined at) for recent new accounts, used to act on a raid wave
+        self.recent: deque[tuple[disnake.Member, float]] = deque(maxlen=RECENT_JOINS)
+        self.raid_until: float = 0.0
+        self.reason: str | None = None
+
+
+class RaidGuard(commands.Cog):
+    def __init__(self, bot: commands.InteractionBot) -> None:
+        self.bot: commands.InteractionBot = bot
+
+        self.guilds: LRUDict[int, GuildStats] = LRUDict(MAX_TRACKED_GUILDS)
+        self.invites: LRUDict[str, DecayingCounter] = LRUDict(MAX_TRACKED_INVITES)
+
+    def export_state(self) -> dict:
+        """Called before the module is reloaded - the join rates and active raids as plain values,
+        least recently active first, so the new module rebuilds them with its own classes"""
+        return {
+            "guilds": [
+                (
+                    guild_id,
+                    (stats.joins.value, stats.joins.updated),
+                    (stats.new_joins.value, stats.new_joins.updated),
+                    list(stats.recent),
+                    stats.raid_until,
+                    stats.reason,
+                )
+                for guild_id, stats in self.guilds.items()
+            ],
+            "invites": [
+                (code, (counter.value, counter.updated)) for code, counter in self.invites.items()
+            ],
+        }
+
+    def import_state(self, state: dict) -> None:
+        for guild_id, joins, new_joins, recent, raid_until, reason in state["guilds"]:
+            stats = self.guilds.touch(guild_id, GuildStats)
+            stats.joins.value, stats.joins.updated = joins
+            stats.new_joins.value, stats.new_joins.updated = new_joins
+            stats.recent.extend(recent)
+            stats.raid_until = raid_until
+            stats.reason = reason
+
+        for code, (value, updated) in state["invites"]:
+            counter = self.invites.touch(code, DecayingCounter)
+            counter.value, counter.updated = value, updated
+
+    def is_raided(self, guild_id: int) -> bool:
+        """Check if the guild currently has an active raid"""
+        stats = self.guilds.get(guild_id)
+        return stats is not None and stats.raid_until > time.monotonic()
+
+    def is_new_account(self, member: disnake.Member) -> bool:
+        return disnake.utils.utcnow() - member.created_at < NEW_ACCOUNT_AGE
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: disnake.Member) -> None:
+        """Update the guild's join rates and check for a join flood"""
+        now = time.monotonic()
+        stats = self.guilds.touch(member.guild.id, GuildStats)
+
+        joins = stats.joins.hit(now)
+        if not self.is_new_account(member):
+            return
+
+        new_joins = stats.new_joins.hit(now)
+        stats.recent.append((member, now))
+
+        if stats.raid_until > now:
+            # already in a raid, deal with this account along with the rest of the wave
+            return await self.trigger(member.guild, stats, stats.reason)
+
+        if joins >= GUILD_JOIN_THRESHOLD and new_joins / joins >= NEW_ACCOUNT_RATIO:
+            await self.trigger(
+                member.guild, stats, f"{joins:.0f} recent joins, {new_joins:.0f} new accounts"
+            )
+
+    @commands.Cog.listener()
+    async def on_member_invite(self, member: disnake.Member, invite: disnake.Invite) -> None:
+        """Dispatched by the invite tracker once the invite used by a new member is known"""
+        if not self.is_new_account(member):
+            return
+
+        count = self.invites.touch(invite.code, DecayingCounter).hit(time.monotonic())
+
+        if count >= INVITE_NEW_ACCOUNT_THRESHOLD:
+            stats = self.guilds.touch(member.guild.id, GuildStats)
+            await self.trigger(
+                member.guild, stats, f"{count:.0f} new accounts joined via invite {invite.code}"
+            )
+
+    async def trigger(self, guild: disnake.Guild, stats: GuildStats, reason: str) -> None:
+        """Start, or extend, a raid for the guild and act on the new accounts that joined"""
+        now = time.monotonic()
+        started = stats.raid_until <= now
+        stats.raid_until = now + RAID_COOLDOWN
+
+        if started:
+            stats.reason = reason
+            logger.warning(f"Raid detected in {guild.name} ({guild.id}): {reason}")
+            self.bot.dispatch("raid_detected", guild, reason)
+
+            if RAID_LOCKDOWN:
+                try:
+                    await guild.edit(invites_disabled=True, reason=f"Raid detected: {reason}")
+                except disnake.HTTPException:
+                    logger.warning(f"Unable to pause invites in {guild.name} ({guild.id})")
+
+        await self.timeout_recent(stats, now - RAID_COOLDOWN)
+
+    async def timeout_recent(self, stats: GuildStats, since: float) -> None:
+        """Timeout the new accounts that joined since `since`, and clear them from the wave"""
+        moderation = self.bot.get_cog("Moderation")
+        if RAID_TIMEOUT is None or moderation is None:
+            return
+
+        members = [member for member, joined in stats.recent if joined >= since]
+        stats.recent.clear()
+
+        if not members:
+            return
+
+        async def timeout(batch: list[disnake.Member]) -> list[disnake.Member]:
+            await batch[0].timeout(duration=RAID_TIMEOUT, reason=f"Raid: {stats.reason}")
+            return []
+
+        failed = await moderation.execute_bulk(members, timeout)
+        if failed:
+            logger.warning(f"Raid timeout failed for {len(failed)} member(s)")
+
+        failed_ids = {m.id for m in failed}
+        timed_out = [m for m in members if m.id not in failed_ids]
+
+        if timed_out:
+            embed = disnake.Embed(
+                title="Raid Detected",
+                description=f"Timed out {len(timed_out)} new account(s)",
+                timestamp=disnake.utils.utcnow(),
+            )
+            embed.add_field(name="Reason", value=stats.reason, inline=False)
+            moderation.modlog.record(
+                timed_out[0].guild,
+                [m.id for m in timed_out],
+                self.bot.user.id,
+                "Raid Timeout",
+                stats.reason,
+                embed,
+            )
+
+
+def setup(bot: commands.InteractionBot) -> None:
+    bot.add_cog(RaidGuard(bot))
@@ -0,0 +1,6 @@
+"""
+Shared helpers used by the cog modules.
+
+This is a package rather than a module so `MyBot.load_extensions` skips it when
+loading everything in the cogs directory.
+"""
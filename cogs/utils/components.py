@@ -0,0 +1,126 @@
+"""
+A single dispatcher for message component interactions.
+
+Views sent normally are kept in disnake's view store, which re-checks every stored view on each
+component interaction.  With thousands of active polls, lobbies and giveaways that adds up.  Instead
+the views here are sent *detached* (`components=view.children` rather than `view=view`) and tracked
+in a dict keyed by message id.  Interactions are routed by the custom_id prefix (the part before the
+first `:`) to a handler, the default handler looks the view up by message id and calls the item's
+callback directly.
+
+    dispatcher = get_component_dispatcher(bot)
+    message = await channel.send(components=view.children)
+    dispatcher.add_view("poll", message.id, view)
+
+Because disnake never sees these views, edits must pass `components=view.children` too, passing
+`view=` would add the view to disnake's store.
+"""
+
+from __future__ import annotations
+
+from typing import Awaitable, Callable
+
+import disnake
+from loguru import logger
+
+from .metrics import attributed, mark_failed, origin_for, tracked
+from .monitor import instrumented
+
+Handler = Callable[[disnake.MessageInteraction], Awaitable[None]]
+
+# finished views are swept from the store once it doubles in size since the last sweep
+MIN_SWEEP_SIZE = 1024
+
+
+class ComponentDispatcher:
+    """Routes component interactions by custom_id prefix"""
+
+    def __init__(self, bot: disnake.Client) -> None:
+        self.bot: disnake.Client = bot
+        self.handlers: dict[str, Handler] = {}
+        self.views: dict[int, disnake.ui.View] = {}
+
+        self.dispatched: int = 0
+        self._sweep_at: int = MIN_SWEEP_SIZE
+
+        bot.add_listener(self.on_message_interaction, "on_message_interaction")
+
+    def add_handler(self, prefix: str, handler: Handler) -> None:
+        """Route interactions whose custom_id starts with `prefix:` to `handler`"""
+        self.handlers[prefix] = handler
+
+    def remove_handler(self, prefix: str) -> None:
+        self.handlers.pop(prefix, None)
+
+    def add_view(self, prefix: str, message_id: int, view: disnake.ui.View) -> None:
+        """Track a detached view sent with `message_id`.  Its items' custom_ids must start with
+        `prefix:`"""
+        self.handlers.setdefault(prefix, self.dispatch_view)
+        self.views[message_id] = view
+
+        if len(self.views) > self._sweep_at:
+            self.sweep()
+
+    def remove_view(self, message_id: int) -> None:
+        self.views.pop(message_id, None)
+
+    def sweep(self) -> None:
+        """Drop views that have been stopped"""
+        self.views = {k: v for k, v in self.views.items() if not v.is_finished()}
+        self._sweep_at = max(MIN_SWEEP_SIZE, 2 * len(self.views))
+
+    async def on_message_interaction(self, inter: disnake.MessageInteraction) -> None:
+        prefix = inter.data.custom_id.partition(":")[0]
+
+        if (handler := self.handlers.get(prefix)) is not None:
+            self.dispatched += 1
+            name = f"component {inter.data.custom_id}"
+
+            # REST calls are charged to the cog that defines the view (or the custom handler)
+            owner = self.views.get(inter.message.id) if handler == self.dispatch_view else handler
+            with attributed(origin_for(self.bot, owner, name)):
+                await tracked(
+                    self.bot, "component", name, instrumented(self.bot, handler(inter), name)
+                )
+
+    async def dispatch_view(self, inter: disnake.MessageInteraction) -> None:
+        """Default handler - call the matching item of the view tracked for the message"""
+        view = self.views.get(inter.message.id)
+
+        if view is None or view.is_finished():
+            self.views.pop(inter.message.id, None)
+            return await inter.response.send_message(
+                "This is no longer active.", ephemeral=True
+            )
+
+        custom_id = inter.data.custom_id
+        for item in view.children:
+            if getattr(item, "custom_id", None) == custom_id:
+                break
+        else:
+            # a click on a message that hasn't caught up with the view yet, ie: Join after the
+            # draw.  Views can explain with `on_stale_interaction`, the click is answered either way
+            if (on_stale := getattr(view, "on_stale_interaction", None)) is not None:
+                return await on_stale(inter)
+
+            logger.warning(f"No item with custom_id {custom_id!r} on {view!r}")
+            return await inter.response.send_message("This is no longer active.", ephemeral=True)
+
+        item.refresh_state(inter)
+
+        try:
+            if await view.interaction_check(inter):
+                await item.callback(inter)
+        except Exception as e:
+            mark_failed()
+            await view.on_error(e, item, inter)
+
+
+def get_component_dispatcher(bot: disnake.Client) -> ComponentDispatcher:
+    """Return the bot's shared component dispatcher, creating it on first use"""
+    dispatcher = getattr(bot, "component_dispatcher", None)
+
+    if dispatcher is None:
+        dispatcher = bot.component_dispatcher = ComponentDispatcher(bot)
+
+    return dispatcher
@@ -0,0 +1,72 @@
+"""
+Duration parsing shared by the cogs' `expires_in` / `duration` arguments.
+
+Durations are one or more `<number><unit>` parts, largest unit first, with optional spaces
+between them.  Units are w (weeks), d (days), h (hours), m (minutes) and s (seconds).
+
+    5m, 1h30m, 2d 12h, 1w
+
+The whole grammar is a single precompiled regular expression, so parsing is one `fullmatch`.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import disnake
+
+_DURATION = re.compile(
+    r"\s*"
+    r"(?:(?P<weeks>\d{1,9})\s*w\s*)?"
+    r"(?:(?P<days>\d{1,9})\s*d\s*)?"
+    r"(?:(?P<hours>\d{1,9})\s*h\s*)?"
+    r"(?:(?P<minutes>\d{1,9})\s*m\s*)?"
+    r"(?:(?P<seconds>\d{1,9})\s*s\s*)?",
+    re.IGNORECASE,
+)
+
+FORMAT_HINT = "`30s`, `5m`, `1h30m`, `2d`, or `1w`"
+
+
+class DurationError(ValueError):
+    """Raised when a duration string can't be parsed"""
+
+
+class Duration(NamedTuple):
+    """A parsed duration and the point in time it ends"""
+
+    delta: timedelta
+    expires_at: datetime
+
+
+def parse_duration(
+    text: str,
+    *,
+    name: str = "duration",
+    max_duration: timedelta | None = None,
+    now: datetime | None = None,
+) -> Duration:
+    """Parse a duration string relative to `now` (defaults to the current UTC time).
+
+    `name` is the argument name used in error messages.  Raises `DurationError` if the text
+    isn't a valid, non-zero duration or is longer than `max_duration`"""
+
+    match = _DURATION.fullmatch(text)
+    if match is None or match.lastindex is None:
+        raise DurationError(f"⚠️ `{name}` must match the correct format: {FORMAT_HINT}")
+
+    try:
+        delta = timedelta(**{unit: int(value) for unit, value in match.groupdict().items() if value})
+        expires_at = (now or disnake.utils.utcnow()) + delta
+    except OverflowError:
+        raise DurationError(f"⚠️ `{name}` is too long") from None
+
+    if not delta:
+        raise DurationError(f"⚠️ `{name}` must be longer than 0 seconds")
+
+    if max_duration is not None and delta > max_duration:
+        raise DurationError(f"⚠️ `{name}` can't be longer than {max_duration}")
+
+    return Duration(delta, expires_at)
@@ -0,0 +1,291 @@
+"""
+A shared, rate limit aware scheduler for message edits.
+
+Views that edit their message on every click (poll charts, queue lists, entry counters) can easily
+edit faster than Discord allows.  Instead of editing directly they submit the state they want the
+message to have.  Only the latest pending edit per message is kept (last write wins), and edits are
+sent as each channel's bucket has room, so under load intermediate states are skipped rather than
+queued up behind the rate limit.
+
+Edits are sent under the origin of the callback that submitted them, so their REST calls are
+charged to it.  Edits submitted with `optional=True` are held back while that cog is over its
+REST budget (see utils/rest.py).
+
+Use `get_edit_scheduler(bot)` to get the bot's scheduler, it is created on first use.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import inspect
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Union
+
+import disnake
+from loguru import logger
+
+from .metrics import Origin, attributed, current_origin
+
+if TYPE_CHECKING:
+    from .rest import RestAccounting
+
+# edits allowed per channel every EDIT_PER seconds, Discord's message edit bucket is 5 per 5s
+EDIT_RATE = 5
+EDIT_PER = 5.0
+
+Render = Callable[[], Union[dict[str, Any], Awaitable[dict[str, Any]]]]
+Editable = Union[disnake.Message, disnake.PartialMessage, disnake.InteractionMessage]
+
+
+class TokenBucket:
+    """Allows `rate` actions every `per` seconds, refilling continuously"""
+
+    __slots__ = ("rate", "per", "tokens", "updated")
+
+    def __init__(self, rate: int, per: float) -> None:
+        self.rate: int = rate
+        self.per: float = per
+        self.tokens: float = rate
+        self.updated: float = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) * self.per / self.rate
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.rate
+
+
+@dataclass
+class PendingEdit:
+    message: Editable
+    fields: dict[str, Any] = field(default_factory=dict)
+    render: Render | None = None
+    waiters: list[asyncio.Future] = field(default_factory=list)
+    origin: Origin | None = None
+    # only if every state merged into it was submitted as optional
+    optional: bool = False
+
+
+class EditScheduler:
+    """Coalesces message edits per message and paces them per channel"""
+
+    def __init__(
+        self, rate: int = EDIT_RATE, per: float = EDIT_PER, budget: RestAccounting | None = None
+    ) -> None:
+        self.rate: int = rate
+        self.per: float = per
+        self.budget: RestAccounting | None = budget
+
+        self.pending: dict[int, PendingEdit] = {}
+        # message ids waiting on each channel, in the order they were first submitted
+        self.channels: dict[int, deque[int]] = {}
+        self.buckets: dict[int, TokenBucket] = {}
+        # edits being sent, by message id.  A message's next edit waits for its previous one
+        self.sending: dict[int, asyncio.Task] = {}
+
+        self.submitted: int = 0
+        self.sent: int = 0
+        self.dropped: int = 0
+        self.failed: int = 0
+
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of messages with an edit waiting to be sent"""
+        return len(self.pending)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queue_depth": self.queue_depth,
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def edit(
+        self,
+        message: Editable,
+        *,
+        render: Render | None = None,
+        optional: bool = False,
+        **fields: Any,
+    ) -> asyncio.Future:
+        """Schedule an edit of `message`.
+
+        `fields` are passed to `message.edit`.  `render`, if given, is called right before the edit
+        is sent and returns more fields, so expensive payloads (ie: charts) are only built for the
+        edit that actually goes out.  Fields from later calls override earlier ones and a later
+        `render` replaces an earlier one.
+
+        `optional` edits only refresh what is shown (ie: a chart or a counter).  They wait while
+        the submitting cog is over its REST budget, unless merged with an edit that isn't.
+
+        Returns a future that resolves to True once an edit including this state is sent, or False
+        if it failed.  Awaiting it is optional"""
+
+        future = asyncio.get_running_loop().create_future()
+        self.submitted += 1
+
+        if (pending := self.pending.get(message.id)) is not None:
+            self.dropped += 1
+            pending.optional = pending.optional and optional
+        else:
+            pending = self.pending[message.id] = PendingEdit(message, optional=optional)
+            self.channels.setdefault(message.channel.id, deque()).append(message.id)
+
+        pending.origin = current_origin()
+        if pending.optional and self.budget is not None and pending.origin is not None:
+            if self.budget.over_budget(pending.origin.cog):
+                self.budget.record_shed(pending.origin.cog)
+
+        pending.message = message
+        pending.fields.update(fields)
+        if render is not None:
+            pending.render = render
+        pending.waiters.append(future)
+
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            # started from a fresh context, so the edits it sends later aren't attributed to
+            # whichever callback happened to submit the first one (see utils/metrics.py)
+            self._task = contextvars.Context().run(
+                asyncio.create_task, self._run(), name="edit-scheduler"
+            )
+
+        return future
+
+    def cancel(self, message_id: int) -> None:
+        """Drop a pending edit, ie: when the message was deleted"""
+        if pending := self.pending.pop(message_id, None):
+            self.channels[pending.message.channel.id].remove(message_id)
+            self._resolve(pending, False)
+
+    async def flush(self, timeout: float | None = None) -> None:
+        """Wait for every pending edit to be sent"""
+        waiters = [w for pending in self.pending.values() for w in pending.waiters]
+        waiters.extend(self.sending.values())
+        if waiters:
+            await asyncio.wait(waiters, timeout=timeout)
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """Send every pending edit as fast as the channels allow, ie: when shutting down.  Optional
+        edits are no longer held back by budgets from here on"""
+        self.budget = None
+        self._wakeup.set()
+        await self.flush(timeout)
+
+    async def _run(self) -> None:
+        # buckets that refilled while idle behave like new ones, no need to keep them around
+        now = time.monotonic()
+        self.buckets = {k: b for k, b in self.buckets.items() if not b.is_full(now)}
+
+        while self.pending:
+            self._wakeup.clear()
+            now = time.monotonic()
+            next_wait = None
+
+            for channel_id, queue in list(self.channels.items()):
+                if not queue:
+                    del self.channels[channel_id]
+                    continue
+
+                bucket = self.buckets.get(channel_id)
+                if bucket is None:
+                    bucket = self.buckets[channel_id] = TokenBucket(self.rate, self.per)
+
+                if (wait := bucket.wait_time(now)) > 0:
+                    next_wait = wait if next_wait is None else min(next_wait, wait)
+                    continue
+
+                # skip messages whose previous edit is still in flight, they keep collecting
+                # state until it is done (its completion wakes us up), and held back edits
+                for _ in range(len(queue)):
+                    if (wait := self._held_for(queue[0])) == 0:
+                        break
+                    if wait is not None:
+                        next_wait = wait if next_wait is None else min(next_wait, wait)
+                    queue.rotate(-1)
+                else:
+                    continue
+
+                bucket.consume(now)
+                message_id = queue.popleft()
+                pending = self.pending.pop(message_id)
+                self.sending[message_id] = asyncio.create_task(self._send(pending))
+
+                if queue:
+                    next_wait = 0
+
+            if self.pending:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=next_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _held_for(self, message_id: int) -> float | None:
+        """0 if the message's edit can be sent now, None while its previous edit is in flight,
+        otherwise the seconds until its cog is within its REST budget"""
+        if message_id in self.sending:
+            return None
+
+        pending = self.pending[message_id]
+        if not pending.optional or self.budget is None or pending.origin is None:
+            return 0.0
+
+        return self.budget.wait_time(pending.origin.cog)
+
+    async def _send(self, pending: PendingEdit) -> None:
+        fields = {}
+
+        try:
+            with attributed(pending.origin):
+                if pending.render is not None:
+                    rendered = pending.render()
+                    fields = await rendered if inspect.isawaitable(rendered) else rendered
+
+                fields.update(pending.fields)
+                await pending.message.edit(**fields)
+        except Exception:
+            self.failed += 1
+            logger.exception(f"Scheduled edit of message {pending.message.id} failed")
+            return self._resolve(pending, False)
+        finally:
+            self.sending.pop(pending.message.id, None)
+            self._wakeup.set()
+
+        self.sent += 1
+        self._resolve(pending, True)
+
+    def _resolve(self, pending: PendingEdit, result: bool) -> None:
+        for waiter in pending.waiters:
+            if not waiter.done():
+                waiter.set_result(result)
+
+
+def get_edit_scheduler(bot: disnake.Client) -> EditScheduler:
+    """Return the bot's shared edit scheduler, creating it on first use"""
+    scheduler = getattr(bot, "edit_scheduler", None)
+
+    if scheduler is None:
+        # optional edits are held back by the bot's REST budgets, if it has any
+        budget = getattr(bot, "rest_accounting", None)
+        scheduler = bot.edit_scheduler = EditScheduler(budget=budget)
+
+    return scheduler
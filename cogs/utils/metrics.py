@@ -0,0 +1,305 @@
+"""
+Latency, error and REST call metrics for listeners, slash commands and component callbacks,
+served in the Prometheus text format.
+
+Wrap a callback with `Metrics.track(kind, name, coro)` (`main.MyBot` does this for every
+listener and slash command, the component dispatcher for component callbacks).  Each call
+records into per callback histograms:
+
+- `discord_callback_duration_seconds{kind,name}` - wall time, including awaited REST calls
+- `discord_callback_rest_calls{kind,name}` - REST calls made while it ran
+- `discord_callback_errors_total{kind,name}` - calls that raised or were marked failed
+
+REST calls are counted by `Metrics.install(bot)`, which wraps the bot's HTTP client and the
+webhook adapter used for interaction responses, and charges each call to the innermost tracked
+callback running in the current context.  Errors that are handled before they reach the
+wrapper (ie: a view's `on_error`) can be recorded with `mark_failed()`.
+
+REST calls are also charged to an `Origin`, the cog and callback they were made for.  The
+wrappers above set it with `attributed(...)`, it carries over to tasks started from the callback
+and the edit scheduler sends each edit under the origin that submitted it (see utils/rest.py).
+
+`MetricsServer` serves everything, plus any extra collectors (ie: the loop monitor), on
+`http://host:port/metrics`.  Tracking a call costs a few microseconds.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, Iterator, NamedTuple, TypeVar
+
+import disnake
+from aiohttp import web
+from disnake.ext import commands
+from disnake.webhook.async_ import async_context
+from loguru import logger
+
+T = TypeVar("T")
+
+# upper bounds of the histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REST_CALL_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds: tuple[float, ...] = bounds
+        self.counts: list[int] = [0] * (len(bounds) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[tuple[str, int]]:
+        """(le, cumulative count) pairs as Prometheus expects them"""
+        total = 0
+        for bound, count in zip((*self.bounds, float("inf")), self.counts):
+            total += count
+            yield ("+Inf" if bound == float("inf") else repr(bound)), total
+
+
+@dataclass
+class MetricFamily:
+    """One metric for exposition.  Samples are (name suffix, labels, value)"""
+
+    name: str
+    type: str
+    help: str
+    samples: list[tuple[str, dict[str, str], float]] = field(default_factory=list)
+
+    @classmethod
+    def from_histogram(
+        cls, name: str, help: str, histograms: dict[tuple[str, ...], Histogram], label_names: tuple
+    ) -> MetricFamily:
+        family = cls(name, "histogram", help)
+
+        for label_values, histogram in histograms.items():
+            labels = dict(zip(label_names, label_values))
+            for le, count in histogram.cumulative():
+                family.samples.append(("_bucket", {**labels, "le": le}, count))
+            family.samples.append(("_sum", labels, histogram.sum))
+            family.samples.append(("_count", labels, histogram.count))
+
+        return family
+
+
+class _Observation:
+    __slots__ = ("rest_calls", "failed")
+
+    def __init__(self) -> None:
+        self.rest_calls: int = 0
+        self.failed: bool = False
+
+
+_current: ContextVar[_Observation | None] = ContextVar("metrics_observation", default=None)
+
+
+def mark_failed() -> None:
+    """Count the tracked callback running in this context as failed"""
+    if (observation := _current.get()) is not None:
+        observation.failed = True
+
+
+def count_rest_call() -> None:
+    if (observation := _current.get()) is not None:
+        observation.rest_calls += 1
+
+
+class Origin(NamedTuple):
+    """What a REST call is made for - a cog (or "bot") and the callback within it"""
+
+    cog: str
+    name: str
+
+
+_origin: ContextVar[Origin | None] = ContextVar("rest_origin", default=None)
+
+
+def current_origin() -> Origin | None:
+    return _origin.get()
+
+
+@contextmanager
+def attributed(origin: Origin | None) -> Iterator[None]:
+    """Charge REST calls made in this block, and tasks started from it, to `origin`"""
+    token = _origin.set(origin)
+    try:
+        yield
+    finally:
+        _origin.reset(token)
+
+
+def origin_for(bot: disnake.Client, callback: Any, name: str) -> Origin:
+    """The origin of `callback` (a bound method, function or view) - the cog it is a method of,
+    or the cog defined in the same module, "bot" otherwise"""
+    owner = getattr(callback, "__self__", callback)
+
+    if isinstance(owner, commands.Cog):
+        return Origin(owner.qualified_name, name)
+
+    module = getattr(owner, "__module__", None)
+    for cog in getattr(bot, "cogs", {}).values():
+        if type(cog).__module__ == module:
+            return Origin(cog.qualified_name, name)
+
+    return Origin("bot", name)
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.durations: dict[tuple[str, str], Histogram] = {}
+        self.rest_calls: dict[tuple[str, str], Histogram] = {}
+        self.errors: dict[tuple[str, str], int] = {}
+        self.collectors: list[Callable[[], Iterable[MetricFamily]]] = []
+
+    async def track(self, kind: str, name: str, coro: Awaitable[T]) -> T:
+        """Await `coro`, recording its duration, REST calls and whether it failed"""
+        observation = _Observation()
+        parent = _current.get()
+        token = _current.set(observation)
+        started = time.perf_counter()
+
+        try:
+            return await coro
+        except Exception:
+            observation.failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+
+            # calls made by a nested callback count towards the outer one as well
+            if parent is not None:
+                parent.rest_calls += observation.rest_calls
+
+            self.record(kind, name, elapsed, observation.rest_calls, observation.failed)
+
+    def record(self, kind: str, name: str, seconds: float, rest_calls: int, failed: bool) -> None:
+        key = (kind, name)
+
+        if (duration := self.durations.get(key)) is None:
+            duration = self.durations[key] = Histogram(DURATION_BUCKETS)
+            self.rest_calls[key] = Histogram(REST_CALL_BUCKETS)
+            self.errors[key] = 0
+
+        duration.observe(seconds)
+        self.rest_calls[key].observe(rest_calls)
+        if failed:
+            self.errors[key] += 1
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """Include the families returned by `collector` in every exposition"""
+        self.collectors.append(collector)
+
+    def install(self, bot: disnake.Client) -> None:
+        """Count the bot's REST calls, including interaction responses and webhook edits"""
+
+        def counted(request):
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                count_rest_call()
+                return await request(*args, **kwargs)
+
+            return wrapper
+
+        bot.http.request = counted(bot.http.request)
+
+        # interaction responses go through the (shared) webhook adapter, not the bot's client
+        adapter = async_context.get()
+        if not getattr(adapter, "_metrics_counted", False):
+            adapter.request = counted(adapter.request)
+            adapter._metrics_counted = True
+
+    def families(self) -> Iterable[MetricFamily]:
+        labels = ("kind", "name")
+
+        yield MetricFamily.from_histogram(
+            "discord_callback_duration_seconds",
+            "Time taken by listeners, slash commands and component callbacks",
+            self.durations,
+            labels,
+        )
+        yield MetricFamily.from_histogram(
+            "discord_callback_rest_calls",
+            "REST calls made per callback",
+            self.rest_calls,
+            labels,
+        )
+        yield MetricFamily(
+            "discord_callback_errors_total",
+            "counter",
+            "Callbacks that raised or were marked failed",
+            [("", dict(zip(labels, key)), count) for key, count in self.errors.items()],
+        )
+
+        for collector in self.collectors:
+            try:
+                yield from collector()
+            except Exception:
+                logger.exception(f"Metrics collector {collector!r} failed")
+
+    def render(self) -> str:
+        """Everything in the Prometheus text exposition format"""
+        lines = []
+
+        for family in self.families():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.type}")
+
+            for suffix, labels, value in family.samples:
+                if labels:
+                    rendered = ",".join(f'{k}="{escape_label(v)}"' for k, v in labels.items())
+                    lines.append(f"{family.name}{suffix}{{{rendered}}} {value}")
+                else:
+                    lines.append(f"{family.name}{suffix} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def tracked(bot: disnake.Client, kind: str, name: str, coro: Awaitable[T]) -> Awaitable[T]:
+    """Track `coro` if the bot has `metrics`, otherwise return it as is"""
+    metrics: Metrics | None = getattr(bot, "metrics", None)
+
+    return coro if metrics is None else metrics.track(kind, name, coro)
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsServer:
+    """Serves `metrics.render()` on `http://host:port/metrics`"""
+
+    def __init__(self, metrics: Metrics, host: str = "127.0.0.1", port: int = 9100) -> None:
+        self.metrics: Metrics = metrics
+        self.host: str = host
+        self.port: int = port
+        self._runner: web.AppRunner | None = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=self.metrics.render().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
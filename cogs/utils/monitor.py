@@ -0,0 +1,263 @@
+"""
+Event loop lag and slow callback instrumentation.
+
+Anything that blocks the event loop (chart rendering, big loops over members, sync I/O) stalls
+every other cog and, long enough, the gateway heartbeat.  `LoopMonitor` watches for that:
+
+- a task measures loop lag, how late a timer fires, every `LAG_INTERVAL` seconds
+- coroutines wrapped with `timed` (listeners, slash commands and component callbacks in
+  `main.MyBot`) are timed per step, each step being one uninterrupted run on the loop.  A step
+  longer than `SLOW_CALLBACK_THRESHOLD` is logged with the callback's name
+- a watchdog thread notices when the loop hasn't ticked for `SLOW_CALLBACK_THRESHOLD` and
+  captures the loop thread's stack, so the log shows what was blocking, even outside any
+  wrapped callback
+
+`stats()` returns the numbers, `collect()` the same as families for `metrics.Metrics`.  Cogs
+can name their own hot paths with `instrumented(bot, coro, name)`, which is a no-op for bots
+without a monitor.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Any, Awaitable, Coroutine, Generator, TypeVar
+
+import disnake
+from loguru import logger
+
+from .metrics import MetricFamily
+
+T = TypeVar("T")
+
+# seconds between loop lag samples, and how long a single step may block the loop
+LAG_INTERVAL = 0.25
+SLOW_CALLBACK_THRESHOLD = 0.1
+
+# upper bounds (seconds) of the loop lag histogram buckets
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class _Timed:
+    """Awaitable proxy that times every step of the wrapped coroutine"""
+
+    __slots__ = ("coro", "name", "monitor")
+
+    def __init__(self, coro: Coroutine[Any, Any, T], name: str, monitor: LoopMonitor) -> None:
+        self.coro = coro
+        self.name = name
+        self.monitor = monitor
+
+    def __await__(self) -> Generator[Any, Any, T]:
+        monitor = self.monitor
+        value, error = None, None
+
+        while True:
+            outer = monitor.current
+            monitor.current = self.name
+            monitor.claimed = False
+            started = time.perf_counter()
+
+            try:
+                if error is not None:
+                    yielded = self.coro.throw(error)
+                else:
+                    yielded = self.coro.send(value)
+            except StopIteration as e:
+                return e.value
+            finally:
+                elapsed = time.perf_counter() - started
+                monitor.current = outer
+
+                # nested wrappers time the same step, only the innermost one reports it
+                if not monitor.claimed:
+                    monitor.claimed = True
+                    if elapsed >= monitor.threshold:
+                        monitor.report_slow(self.name, elapsed)
+
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+class LoopMonitor:
+    def __init__(
+        self, *, threshold: float = SLOW_CALLBACK_THRESHOLD, interval: float = LAG_INTERVAL
+    ) -> None:
+        self.threshold: float = threshold
+        self.interval: float = interval
+
+        # name of the wrapped callback running right now, read by the watchdog thread
+        self.current: str | None = None
+        self.claimed: bool = True
+
+        self.lag: float = 0.0
+        self.max_lag: float = 0.0
+        self.lag_buckets: list[int] = [0] * (len(LAG_BUCKETS) + 1)
+        self.lag_sum: float = 0.0
+        self.lag_count: int = 0
+
+        self.slow_callbacks: Counter[str] = Counter()
+        self.blocked_seconds: Counter[str] = Counter()
+        self.stalls: int = 0
+
+        self._heartbeat: float = time.monotonic()
+        self._stall_stack: str | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def timed(self, coro: Coroutine[Any, Any, T], name: str) -> Awaitable[T]:
+        """Wrap `coro` so steps blocking the loop for too long are reported under `name`"""
+        return _Timed(coro, name, self)
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+
+        self._loop_thread = threading.get_ident()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._sample_lag(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _sample_lag(self) -> None:
+        while True:
+            started = time.monotonic()
+            self._heartbeat = started
+            await asyncio.sleep(self.interval)
+
+            lag = max(time.monotonic() - started - self.interval, 0.0)
+            self.lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.lag_sum += lag
+            self.lag_count += 1
+
+            for i, bound in enumerate(LAG_BUCKETS):
+                if lag <= bound:
+                    self.lag_buckets[i] += 1
+                    break
+            else:
+                self.lag_buckets[-1] += 1
+
+    def _watch(self) -> None:
+        """Watchdog thread - grab the loop thread's stack while it is stalled"""
+        stalled_since = None
+
+        while not self._stopped.wait(self.threshold / 2):
+            overdue = time.monotonic() - self._heartbeat - self.interval
+
+            if overdue < self.threshold:
+                stalled_since = None
+                continue
+
+            if stalled_since == self._heartbeat:  # already captured this stall
+                continue
+            stalled_since = self._heartbeat
+
+            if (frame := sys._current_frames().get(self._loop_thread)) is None:
+                continue
+
+            self.stalls += 1
+            self._stall_stack = format_loop_stack(frame)
+
+            if self.current is None:  # nothing wrapped is running, log it from here
+                logger.warning(
+                    f"Event loop blocked for over {overdue * 1e3:.0f}ms\n{self._stall_stack}"
+                )
+
+    def report_slow(self, name: str, elapsed: float) -> None:
+        self.slow_callbacks[name] += 1
+        self.blocked_seconds[name] += elapsed
+
+        stack, self._stall_stack = self._stall_stack, None
+        logger.warning(
+            f"{name} blocked the event loop for {elapsed * 1e3:.0f}ms"
+            + (f", it was at:\n{stack}" if stack else "")
+        )
+
+    def collect(self) -> list[MetricFamily]:
+        """Metric families for `Metrics.add_collector`"""
+        lag = MetricFamily("discord_loop_lag_seconds", "histogram", "How late a timer fires")
+        cumulative = 0
+        for bound, count in zip((*LAG_BUCKETS, float("inf")), self.lag_buckets):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lag.samples.append(("_bucket", {"le": le}, cumulative))
+        lag.samples.append(("_sum", {}, self.lag_sum))
+        lag.samples.append(("_count", {}, self.lag_count))
+
+        return [
+            lag,
+            MetricFamily(
+                "discord_loop_stalls_total",
+                "counter",
+                "Times the event loop was blocked past the slow callback threshold",
+                [("", {}, self.stalls)],
+            ),
+            MetricFamily(
+                "discord_slow_callbacks_total",
+                "counter",
+                "Steps of a callback that blocked the event loop past the threshold",
+                [("", {"name": name}, count) for name, count in self.slow_callbacks.items()],
+            ),
+            MetricFamily(
+                "discord_blocked_seconds_total",
+                "counter",
+                "Time callbacks spent blocking the event loop in slow steps",
+                [("", {"name": name}, secs) for name, secs in self.blocked_seconds.items()],
+            ),
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        """Current loop lag, the max since the last call, and totals per slow callback"""
+        max_lag, self.max_lag = self.max_lag, self.lag
+
+        return {
+            "loop_lag": self.lag,
+            "loop_lag_max": max_lag,
+            "loop_lag_buckets": dict(zip((*LAG_BUCKETS, float("inf")), self.lag_buckets)),
+            "loop_lag_sum": self.lag_sum,
+            "loop_lag_count": self.lag_count,
+            "loop_stalls": self.stalls,
+            "slow_callbacks": dict(self.slow_callbacks),
+            "blocked_seconds": dict(self.blocked_seconds),
+        }
+
+
+def format_loop_stack(frame) -> str:
+    """Format a stack of the loop thread, without the event loop's and this module's frames"""
+    stack = traceback.extract_stack(frame)
+
+    for i in range(len(stack) - 1, -1, -1):
+        if stack[i].filename.endswith(("asyncio/events.py", "asyncio\\events.py")):
+            stack = stack[i + 1 :]
+            break
+
+    return "".join(traceback.format_list([f for f in stack if f.filename != __file__]))
+
+
+def callback_name(callback: Any, default: str) -> str:
+    """`Cog.method` for bound methods, the function name otherwise"""
+    if owner := getattr(callback, "__self__", None):
+        return f"{type(owner).__name__}.{callback.__name__}"
+
+    return getattr(callback, "__qualname__", default)
+
+
+def instrumented(bot: disnake.Client, coro: Coroutine[Any, Any, T], name: str) -> Awaitable[T]:
+    """Time `coro` under `name` if the bot has a `loop_monitor`, otherwise return it as is"""
+    monitor: LoopMonitor | None = getattr(bot, "loop_monitor", None)
+
+    return coro if monitor is None else monitor.timed(coro, name)
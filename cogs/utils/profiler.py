@@ -0,0 +1,230 @@
+"""
+An opt-in profiler for gateway events.
+
+With every intent enabled the bot parses and dispatches a lot of events nothing listens to
+(presence and typing updates, voice states...) and a few hot listeners can dominate the rest.
+While running, `EventProfiler` records for each gateway event
+
+- how often it was received and the time spent parsing it into disnake objects
+- how often it was dispatched (including events disnake derives, ie: `member_join`)
+
+and for each listener the calls and time it spent running on the event loop (the sum of its
+steps, time spent awaiting REST calls and sleeps is not counted).
+
+Profiling is installed onto the bot when started and removed when stopped, so it costs nothing
+while off.  With `sample_rate` below 1 only that share of events and listener calls is timed
+(counts stay exact) and times are scaled up to estimates.
+
+    profiler = get_event_profiler(bot)
+    profiler.start(sample_rate=0.1)
+    ...
+    print(profiler.report())
+"""
+
+from __future__ import annotations
+
+import functools
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Generator
+
+import disnake
+
+from .monitor import callback_name
+
+
+@dataclass
+class Entry:
+    calls: int = 0
+    sampled: int = 0
+    seconds: float = 0.0
+
+    @property
+    def estimated_seconds(self) -> float:
+        """Time scaled up from the sampled calls to all calls"""
+        return self.seconds * self.calls / self.sampled if self.sampled else 0.0
+
+
+class _Profiled:
+    """Awaitable proxy that adds up the time the wrapped coroutine runs on the loop"""
+
+    __slots__ = ("coro", "entry")
+
+    def __init__(self, coro, entry: Entry) -> None:
+        self.coro = coro
+        self.entry = entry
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        value, error = None, None
+        entry = self.entry
+        entry.sampled += 1
+
+        while True:
+            started = time.perf_counter()
+            try:
+                if error is not None:
+                    yielded = self.coro.throw(error)
+                else:
+                    yielded = self.coro.send(value)
+            except StopIteration as e:
+                return e.value
+            finally:
+                entry.seconds += time.perf_counter() - started
+
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+class EventProfiler:
+    def __init__(self, bot: disnake.Client) -> None:
+        self.bot: disnake.Client = bot
+        self.sample_rate: float = 1.0
+        self.started_at: float | None = None
+        self.stopped_at: float | None = None
+
+        # by gateway event name (ie: PRESENCE_UPDATE), by dispatched event and by listener
+        self.parsed: defaultdict[str, Entry] = defaultdict(Entry)
+        self.dispatched: defaultdict[str, int] = defaultdict(int)
+        self.listeners: defaultdict[tuple[str, str], Entry] = defaultdict(Entry)
+
+        self._parsers: dict[str, Callable] | None = None
+        self._dispatch_original: Callable[..., None] | None = None
+        self._run_event_original: Callable[..., Any] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._parsers is not None
+
+    def _sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def start(self, sample_rate: float = 1.0) -> None:
+        """Start (or keep) profiling, timing `sample_rate` of the events and listener calls"""
+        self.sample_rate = sample_rate
+        if self.running:
+            return
+
+        self.started_at, self.stopped_at = time.monotonic(), None
+        state = self.bot._connection
+
+        # the gateway looks its parsers up in this dict for every event it receives
+        self._parsers = dict(state.parsers)
+        for event, parser in self._parsers.items():
+            state.parsers[event] = self._wrap_parser(event, parser)
+
+        # the connection state keeps its own reference to the bot's dispatch.  On the bot,
+        # instance attributes shadow its methods until stop() removes them
+        self._dispatch_original = state.dispatch
+        self._run_event_original = self.bot._run_event
+        state.dispatch = self.bot.dispatch = self._dispatch
+        self.bot._run_event = self._run_event
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+
+        state = self.bot._connection
+        state.parsers.update(self._parsers)
+        state.dispatch = self._dispatch_original
+        self._parsers = None
+        self.stopped_at = time.monotonic()
+
+        del self.bot.dispatch
+        del self.bot._run_event
+
+    def reset(self) -> None:
+        self.parsed.clear()
+        self.dispatched.clear()
+        self.listeners.clear()
+        self.started_at = time.monotonic() if self.running else None
+
+    def _wrap_parser(self, event: str, parser: Callable[[Any], None]) -> Callable[[Any], None]:
+        entry = self.parsed[event]
+
+        def parse(data: Any) -> None:
+            entry.calls += 1
+            if not self._sampled():
+                return parser(data)
+
+            started = time.perf_counter()
+            try:
+                return parser(data)
+            finally:
+                entry.sampled += 1
+                entry.seconds += time.perf_counter() - started
+
+        return parse
+
+    def _dispatch(self, event: str, *args: Any, **kwargs: Any) -> None:
+        self.dispatched[event] += 1
+        self._dispatch_original(event, *args, **kwargs)
+
+    async def _run_event(self, coro, event_name: str, *args: Any, **kwargs: Any) -> None:
+        entry = self.listeners[(event_name, callback_name(coro, event_name))]
+        entry.calls += 1
+
+        if not self._sampled():
+            return await self._run_event_original(coro, event_name, *args, **kwargs)
+
+        # the bot names and attributes listeners by their callback, pass the original's identity on
+        @functools.wraps(coro)
+        async def profiled(*args: Any, **kwargs: Any) -> None:
+            await _Profiled(coro(*args, **kwargs), entry)
+
+        if (owner := getattr(coro, "__self__", None)) is not None:
+            profiled.__self__ = owner
+
+        await self._run_event_original(profiled, event_name, *args, **kwargs)
+
+    def report(self, limit: int = 15) -> str:
+        """The top gateway events and listeners by (estimated) time, as a text table"""
+        if self.started_at is None:
+            return "The profiler has not been started."
+
+        elapsed = (self.stopped_at or time.monotonic()) - self.started_at
+        lines = [
+            f"{'running' if self.running else 'stopped'}, {elapsed:.0f}s profiled, "
+            f"sample rate {self.sample_rate:g}",
+            "",
+            f"{'gateway event':<32} {'count':>8} {'parse ms':>10} {'us/event':>9}",
+        ]
+
+        parsed = sorted(self.parsed.items(), key=lambda kv: kv[1].estimated_seconds, reverse=True)
+        for event, entry in [(e, v) for e, v in parsed if v.calls][:limit]:
+            per_event = entry.seconds / entry.sampled * 1e6 if entry.sampled else 0.0
+            lines.append(
+                f"{event[:32]:<32} {entry.calls:>8} {entry.estimated_seconds * 1e3:>10.1f} "
+                f"{per_event:>9.1f}"
+            )
+
+        lines += ["", f"{'dispatched event':<32} {'count':>8}"]
+        dispatched = sorted(self.dispatched.items(), key=lambda kv: kv[1], reverse=True)
+        for event, count in dispatched[:limit]:
+            lines.append(f"{event[:32]:<32} {count:>8}")
+
+        lines += ["", f"{'listener':<44} {'calls':>8} {'loop ms':>10} {'us/call':>9}"]
+        listeners = sorted(
+            self.listeners.items(), key=lambda kv: kv[1].estimated_seconds, reverse=True
+        )
+        for (event, name), entry in listeners[:limit]:
+            per_call = entry.seconds / entry.sampled * 1e6 if entry.sampled else 0.0
+            lines.append(
+                f"{name[:44]:<44} {entry.calls:>8} {entry.estimated_seconds * 1e3:>10.1f} "
+                f"{per_call:>9.1f}"
+            )
+
+        return "\n".join(lines)
+
+
+def get_event_profiler(bot: disnake.Client) -> EventProfiler:
+    """Return the bot's event profiler, creating it (stopped) on first use"""
+    profiler = getattr(bot, "event_profiler", None)
+
+    if profiler is None:
+        profiler = bot.event_profiler = EventProfiler(bot)
+
+    return profiler
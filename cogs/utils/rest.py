@@ -0,0 +1,254 @@
+"""
+REST call accounting and per cog budgets.
+
+Every cog shares the bot's rate limits, `RestAccounting` shows which one is using them up.
+Once installed it counts each REST call (including interaction responses) by the cog and
+callback it was made for (the `Origin`, see utils/metrics.py) and its route, ie:
+
+    SimplePoll  component poll:vote  PATCH /channels/{channel_id}/messages/{message_id}
+
+along with the 429s each of them got back and the seconds disnake waited out before retrying.
+
+Cogs can be given a budget of REST calls per `BUDGET_WINDOW`, interaction responses aside
+(every interaction needs one and they aren't subject to the global rate limit).  Essential work
+always goes through, but a cog over its budget sheds what can wait: the edit scheduler holds back edits
+submitted with `optional=True` (chart refreshes, entry counters) until the cog is within its
+budget again, only the latest state of each message is sent by then.
+
+    accounting = RestAccounting(parse_budgets("SimplePoll=120, Giveaway=60"))
+    accounting.install(bot)
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+import disnake
+from disnake.webhook.async_ import async_context
+
+from .edits import TokenBucket
+from .metrics import MetricFamily, Origin, current_origin
+
+# budgets are in REST calls per this many seconds, refilling continuously
+BUDGET_WINDOW = 60.0
+
+UNATTRIBUTED = Origin("bot", "unattributed")
+
+# (cog, origin name, route)
+CallKey = tuple[str, str, str]
+
+# the call being made in this context, read when disnake logs that it was rate limited
+_request: ContextVar[tuple[RestAccounting, CallKey] | None] = ContextVar(
+    "rest_request", default=None
+)
+
+
+class RestAccounting:
+    def __init__(
+        self, budgets: dict[str, int] | None = None, window: float = BUDGET_WINDOW
+    ) -> None:
+        self.window: float = window
+        self.budgets: dict[str, TokenBucket] = {
+            cog: TokenBucket(calls, window) for cog, calls in (budgets or {}).items()
+        }
+
+        self.calls: Counter[CallKey] = Counter()
+        self.rate_limits: Counter[CallKey] = Counter()
+        self.retry_after: defaultdict[CallKey, float] = defaultdict(float)
+        self.global_rate_limits: int = 0
+        self.shed: Counter[str] = Counter()
+
+    def install(self, bot: disnake.Client) -> None:
+        """Account for the bot's REST calls, including interaction responses and webhook edits"""
+        bot.rest_accounting = self
+
+        request = bot.http.request
+
+        async def counted(route, *args: Any, **kwargs: Any) -> Any:
+            return await self.call(request, route, *args, **kwargs)
+
+        bot.http.request = counted
+
+        # interaction responses go through the (shared) webhook adapter, not the bot's client.
+        # Calls through it are charged to the bot that installed last
+        adapter = async_context.get()
+        adapter._rest_accounting = self
+        if not getattr(adapter, "_rest_counted", False):
+            adapter_request = adapter.request
+
+            async def adapter_counted(route, *args: Any, **kwargs: Any) -> Any:
+                return await adapter._rest_accounting.call(adapter_request, route, *args, **kwargs)
+
+            adapter.request = adapter_counted
+            adapter._rest_counted = True
+
+        for name in ("disnake.http", "disnake.webhook.async_"):
+            if _rate_limit_filter not in logging.getLogger(name).filters:
+                logging.getLogger(name).addFilter(_rate_limit_filter)
+
+    async def call(
+        self, request: Callable[..., Awaitable[Any]], route, *args: Any, **kwargs: Any
+    ) -> Any:
+        """Make `request` through the accounting, charged to the current origin"""
+        origin = current_origin() or UNATTRIBUTED
+        key = (origin.cog, origin.name, f"{route.method} {route.path}")
+        self.calls[key] += 1
+
+        bucket = self.budgets.get(origin.cog)
+        if bucket is not None and not route.path.startswith("/interactions/"):
+            bucket.consume(time.monotonic())
+
+        token = _request.set((self, key))
+        try:
+            return await request(route, *args, **kwargs)
+        finally:
+            _request.reset(token)
+
+    def record_rate_limit(self, key: CallKey, retry_after: float) -> None:
+        self.rate_limits[key] += 1
+        self.retry_after[key] += retry_after
+
+    def wait_time(self, cog: str) -> float:
+        """Seconds until `cog` is within its budget again, 0 if it is or has no budget"""
+        if (bucket := self.budgets.get(cog)) is None:
+            return 0.0
+
+        return bucket.wait_time(time.monotonic())
+
+    def over_budget(self, cog: str) -> bool:
+        return self.wait_time(cog) > 0
+
+    def record_shed(self, cog: str) -> None:
+        """Count a piece of work `cog` skipped or held back because it was over budget"""
+        self.shed[cog] += 1
+
+    def by_cog(self) -> dict[str, dict[str, float]]:
+        """Calls, 429s and seconds waited per cog"""
+        totals: defaultdict[str, dict[str, float]] = defaultdict(
+            lambda: {"calls": 0, "rate_limits": 0, "retry_after": 0.0}
+        )
+
+        for (cog, _, _), count in self.calls.items():
+            totals[cog]["calls"] += count
+        for (cog, _, _), count in self.rate_limits.items():
+            totals[cog]["rate_limits"] += count
+        for (cog, _, _), seconds in self.retry_after.items():
+            totals[cog]["retry_after"] += seconds
+
+        return dict(totals)
+
+    def collect(self) -> list[MetricFamily]:
+        """Metric families for `Metrics.add_collector`"""
+        labels = ("cog", "origin", "route")
+        for bucket in self.budgets.values():
+            bucket.wait_time(time.monotonic())  # refills it
+
+        return [
+            MetricFamily(
+                "discord_rest_calls_total",
+                "counter",
+                "REST calls by the cog and callback they were made for, and route",
+                [("", dict(zip(labels, key)), count) for key, count in self.calls.items()],
+            ),
+            MetricFamily(
+                "discord_rest_rate_limited_total",
+                "counter",
+                "REST calls answered with a 429 and retried",
+                [("", dict(zip(labels, key)), count) for key, count in self.rate_limits.items()],
+            ),
+            MetricFamily(
+                "discord_rest_retry_after_seconds_total",
+                "counter",
+                "Time spent waiting out 429s before retrying",
+                [("", dict(zip(labels, key)), secs) for key, secs in self.retry_after.items()],
+            ),
+            MetricFamily(
+                "discord_rest_global_rate_limited_total",
+                "counter",
+                "Times the global rate limit was hit",
+                [("", {}, self.global_rate_limits)],
+            ),
+            MetricFamily(
+                "discord_rest_budget_remaining",
+                "gauge",
+                "REST calls left in each cog's budget, negative when over",
+                [("", {"cog": cog}, bucket.tokens) for cog, bucket in self.budgets.items()],
+            ),
+            MetricFamily(
+                "discord_rest_shed_total",
+                "counter",
+                "Non-essential work skipped or held back because the cog was over budget",
+                [("", {"cog": cog}, count) for cog, count in self.shed.items()],
+            ),
+        ]
+
+    def report(self, limit: int = 15) -> str:
+        """Per cog totals and the top callbacks/routes by calls, as a text table"""
+        lines = [f"{'cog':<20} {'calls':>8} {'429s':>6} {'waited s':>9} {'budget':>12} {'shed':>6}"]
+
+        cogs = sorted(self.by_cog().items(), key=lambda kv: kv[1]["calls"], reverse=True)
+        for cog, totals in cogs:
+            bucket = self.budgets.get(cog)
+            budget = f"{bucket.tokens:.0f}/{bucket.rate}" if bucket else "-"
+            lines.append(
+                f"{cog[:20]:<20} {totals['calls']:>8} {totals['rate_limits']:>6} "
+                f"{totals['retry_after']:>9.1f} {budget:>12} {self.shed[cog]:>6}"
+            )
+
+        if self.global_rate_limits:
+            lines.append(f"global rate limit hit {self.global_rate_limits} times")
+
+        lines += ["", f"{'origin':<36} {'route':<48} {'calls':>8} {'429s':>6}"]
+        for (cog, name, route), count in self.calls.most_common(limit):
+            lines.append(
+                f"{f'{cog} {name}'[:36]:<36} {route[:48]:<48} {count:>8} "
+                f"{self.rate_limits[(cog, name, route)]:>6}"
+            )
+
+        return "\n".join(lines)
+
+
+class _RateLimitFilter(logging.Filter):
+    """Picks up disnake's "rate limited, retrying in ..." warnings.  disnake handles 429s inside
+    its request methods and only logs them, the warning is logged in the context of the call"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if (request := _request.get()) is None or not isinstance(record.msg, str):
+            return True
+
+        accounting, key = request
+
+        if record.msg.startswith("Global rate limit has been hit"):
+            accounting.global_rate_limits += 1
+        elif "rate limited. Retrying in" in record.msg:
+            # (retry_after, bucket) from the bot's client, (webhook_id, retry_after) for webhooks
+            retry_after = record.args[0] if record.name == "disnake.http" else record.args[1]
+            accounting.record_rate_limit(key, float(retry_after))
+
+        return True
+
+
+_rate_limit_filter = _RateLimitFilter()
+
+
+def parse_budgets(value: str) -> dict[str, int]:
+    """Parse budgets from `Cog=calls, Cog=calls`, ie: from an environment variable"""
+    budgets = {}
+
+    for item in value.split(","):
+        if not item.strip():
+            continue
+
+        cog, _, calls = item.partition("=")
+        budgets[cog.strip()] = int(calls)
+
+    return budgets
+
+
+def get_rest_accounting(bot: disnake.Client) -> RestAccounting | None:
+    """Return the bot's REST accounting, if installed"""
+    return getattr(bot, "rest_accounting", None)
@@ -0,0 +1,136 @@
+"""
+A single task timer for anything that needs to happen at a point in the future
+(giveaway draws, punishment expiries, etc.)
+
+Rather than one sleeping task per item, every deadline goes into a heap and one
+background task sleeps until the earliest deadline is due.  Scheduling and
+cancelling are O(log n) / O(1), and the task only wakes when something is due or
+when a new deadline is earlier than the current one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Hashable
+
+import disnake
+from loguru import logger
+
+Callback = Callable[[Hashable], Awaitable[None]]
+
+
+class Scheduler:
+    """Calls `callback(key)` once each scheduled key is due"""
+
+    def __init__(self, callback: Callback, *, name: str = "scheduler") -> None:
+        self.callback: Callback = callback
+        self.name: str = name
+
+        # heap entries are (timestamp, tie breaker, key). Cancelled or rescheduled keys are
+        # left in the heap and skipped when they reach the top, `_deadlines` is the truth
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._deadlines: dict[Hashable, float] = {}
+        self._counter = itertools.count()
+
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def schedule(self, key: Hashable, when: datetime) -> None:
+        """Schedule `key` to fire at `when`, replacing any existing deadline for that key"""
+        timestamp = when.timestamp()
+        self._deadlines[key] = timestamp
+        heapq.heappush(self._heap, (timestamp, next(self._counter), key))
+
+        # only wake the runner if this is now the earliest deadline
+        if self._heap[0][2] == key:
+            self._wakeup.set()
+
+        # compact once stale entries make up most of the heap
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._deadlines):
+            self._compact()
+
+    def deadline(self, key: Hashable) -> datetime | None:
+        """When `key` is due, None if it is not scheduled"""
+        if (timestamp := self._deadlines.get(key)) is None:
+            return None
+
+        return datetime.fromtimestamp(timestamp, timezone.utc)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel a scheduled key, returns False if it was not scheduled"""
+        return self._deadlines.pop(key, None) is not None
+
+    def start(self) -> None:
+        """Start the background task if it is not already running"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    def stop(self) -> None:
+        """Stop the background task.  Pending deadlines are kept"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if self._deadlines.get(entry[2]) == entry[0]]
+        heapq.heapify(self._heap)
+
+    def _pop_due(self, now: float) -> list[Hashable]:
+        """Pop every key that is due, dropping stale entries along the way"""
+        due = []
+        heap = self._heap
+
+        while heap and heap[0][0] <= now:
+            timestamp, _, key = heapq.heappop(heap)
+            if self._deadlines.get(key) != timestamp:
+                continue
+
+            del self._deadlines[key]
+            due.append(key)
+
+        return due
+
+    def _next_deadline(self) -> float | None:
+        heap = self._heap
+
+        while heap and self._deadlines.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+
+        return heap[0][0] if heap else None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+
+            for key in self._pop_due(disnake.utils.utcnow().timestamp()):
+                task = asyncio.create_task(self._fire(key))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            deadline = self._next_deadline()
+            timeout = (
+                None
+                if deadline is None
+                else max(deadline - disnake.utils.utcnow().timestamp(), 0)
+            )
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, key: Hashable) -> None:
+        try:
+            await self.callback(key)
+        except Exception:
+            logger.exception(f"{self.name} callback failed for {key!r}")
@@ -0,0 +1,392 @@
+"""
+A small async key/value store for cog state, with pluggable backends.
+
+Values are strings (callers encode them, usually as JSON).  Besides plain keys there are hashes
+(a key holding a map of fields) so large collections, like a poll's voters, can be updated one
+field at a time instead of rewriting the whole value.
+
+Backends, picked by URL (see `open_state_store`):
+- `memory://` - a dict, nothing survives a restart
+- `sqlite:///path/to/state.db` - SQLite in WAL mode.  Writes are batched and committed together
+  in a background thread every `SQLITE_WRITE_INTERVAL` seconds (or once `SQLITE_BATCH_SIZE`
+  writes are waiting)
+- `redis://host:port/db` - anything speaking the Redis protocol, shareable between shard processes
+
+The bot's store comes from `get_state_store(bot)`, configured with the `STATE_STORE_URL`
+environment variable (default `sqlite:///state.db`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from urllib.parse import urlparse
+
+import disnake
+
+DEFAULT_STATE_STORE_URL = "sqlite:///state.db"
+
+# seconds between SQLite batch commits, and the number of queued writes that forces one early
+SQLITE_WRITE_INTERVAL = 0.5
+SQLITE_BATCH_SIZE = 1000
+
+
+class StateStore(ABC):
+    """Async key/value and hash store"""
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Delete keys, including hashes"""
+
+    @abstractmethod
+    async def keys(self, prefix: str = "") -> list[str]:
+        """Return all keys (including hashes) starting with `prefix`"""
+
+    @abstractmethod
+    async def hget(self, key: str, field: str) -> str | None:
+        ...
+
+    @abstractmethod
+    async def hset(self, key: str, mapping: dict[str, str]) -> None:
+        """Set one or more fields of a hash"""
+
+    @abstractmethod
+    async def hdel(self, key: str, *fields: str) -> None:
+        ...
+
+    @abstractmethod
+    async def hgetall(self, key: str) -> dict[str, str]:
+        ...
+
+    async def flush(self) -> None:
+        """Make sure every write so far has been persisted"""
+
+    async def close(self) -> None:
+        await self.flush()
+
+
+class MemoryStore(StateStore):
+    """Keeps everything in dicts, useful for testing or when nothing needs to persist"""
+
+    def __init__(self) -> None:
+        self.values: dict[str, str] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    async def get(self, key: str) -> str | None:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: str) -> None:
+        self.values[key] = value
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.values.pop(key, None)
+            self.hashes.pop(key, None)
+
+    async def keys(self, prefix: str = "") -> list[str]:
+        return [k for k in (*self.values, *self.hashes) if k.startswith(prefix)]
+
+    async def hget(self, key: str, field: str) -> str | None:
+        return self.hashes.get(key, {}).get(field)
+
+    async def hset(self, key: str, mapping: dict[str, str]) -> None:
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    async def hdel(self, key: str, *fields: str) -> None:
+        if hash_ := self.hashes.get(key):
+            for field in fields:
+                hash_.pop(field, None)
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        return dict(self.hashes.get(key, {}))
+
+
+class SQLiteStore(StateStore):
+    """SQLite backed store.  All database work happens on one background thread, writes are
+    queued and committed in batches, reads flush the queue first so they always see prior writes"""
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.connection: sqlite3.Connection | None = None
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-store")
+        self._pending: list[tuple[str, tuple]] = []
+        self._flush_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.executescript(
+                """
+                PRAGMA journal_mode = WAL;
+                PRAGMA synchronous = NORMAL;
+                CREATE TABLE IF NOT EXISTS state (
+                    key TEXT NOT NULL,
+                    field TEXT NOT NULL DEFAULT '',
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (key, field)
+                ) WITHOUT ROWID;
+                """
+            )
+
+        return self.connection
+
+    async def _run(self, fn, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _write(self, statement: str, params: tuple) -> None:
+        self._pending.append((statement, params))
+
+        if len(self._pending) >= SQLITE_BATCH_SIZE:
+            self._flush_task = asyncio.create_task(self.flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(SQLITE_WRITE_INTERVAL)
+        await self.flush()
+
+    def _commit(self, batch: list[tuple[str, tuple]]) -> None:
+        connection = self._connect()
+
+        with connection:
+            for statement, params in batch:
+                connection.execute(statement, params)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._pending:
+                return
+
+            batch, self._pending = self._pending, []
+            await self._run(self._commit, batch)
+
+    async def _read(self, statement: str, params: tuple) -> list[tuple]:
+        await self.flush()
+        return await self._run(lambda: self._connect().execute(statement, params).fetchall())
+
+    async def get(self, key: str) -> str | None:
+        rows = await self._read("SELECT value FROM state WHERE key = ? AND field = ''", (key,))
+        return rows[0][0] if rows else None
+
+    async def set(self, key: str, value: str) -> None:
+        self._write("INSERT OR REPLACE INTO state VALUES (?, '', ?)", (key, value))
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._write("DELETE FROM state WHERE key = ?", (key,))
+
+    async def keys(self, prefix: str = "") -> list[str]:
+        # range scan on the primary key rather than LIKE, which would need escaping
+        rows = await self._read(
+            "SELECT DISTINCT key FROM state WHERE key >= ? AND key < ?",
+            (prefix, prefix + "\U0010ffff"),
+        )
+        return [row[0] for row in rows]
+
+    async def hget(self, key: str, field: str) -> str | None:
+        rows = await self._read(
+            "SELECT value FROM state WHERE key = ? AND field = ?", (key, "." + field)
+        )
+        return rows[0][0] if rows else None
+
+    async def hset(self, key: str, mapping: dict[str, str]) -> None:
+        # hash fields are prefixed so they can never collide with the plain value's empty field
+        for field, value in mapping.items():
+            self._write("INSERT OR REPLACE INTO state VALUES (?, ?, ?)", (key, "." + field, value))
+
+    async def hdel(self, key: str, *fields: str) -> None:
+        for field in fields:
+            self._write("DELETE FROM state WHERE key = ? AND field = ?", (key, "." + field))
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        rows = await self._read("SELECT field, value FROM state WHERE key = ? AND field != ''", (key,))
+        return {field[1:]: value for field, value in rows}
+
+    async def close(self) -> None:
+        await self.flush()
+
+        if self.connection is not None:
+            await self._run(self.connection.close)
+            self.connection = None
+
+        self._executor.shutdown(wait=False)
+
+
+class RedisError(Exception):
+    """An error reply from the Redis server"""
+
+
+class RedisStore(StateStore):
+    """A minimal Redis protocol (RESP2) client covering the commands the store needs.  Commands
+    are pipelined over a single connection and replies are matched to them in order"""
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0) -> None:
+        self.host: str = host
+        self.port: int = port
+        self.db: int = db
+
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._connecting: asyncio.Lock = asyncio.Lock()
+        self._replies: asyncio.Queue[asyncio.Future] = asyncio.Queue()
+        self._reader_task: asyncio.Task | None = None
+
+    async def _connect(self) -> None:
+        async with self._connecting:
+            if self._writer is not None:
+                return
+
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            self._reader_task = asyncio.create_task(self._read_replies())
+
+            if self.db:
+                await self.execute("SELECT", self.db)
+
+    @staticmethod
+    def _encode(args: tuple) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+
+        kind, body = line[:1], line[1:-2]
+
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            return RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            if (length := int(body)) == -1:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            if (length := int(body)) == -1:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+
+        raise ConnectionError(f"Unexpected reply from Redis: {line!r}")
+
+    async def _read_replies(self) -> None:
+        try:
+            while True:
+                reply = await self._read_reply()
+                future = self._replies.get_nowait()
+
+                if isinstance(reply, RedisError):
+                    future.set_exception(reply)
+                else:
+                    future.set_result(reply)
+        except Exception as e:
+            while not self._replies.empty():
+                self._replies.get_nowait().set_exception(ConnectionError(str(e)))
+            self._writer = None
+
+    async def execute(self, *args: Any) -> Any:
+        """Send a command and wait for its reply"""
+        if self._writer is None:
+            await self._connect()
+
+        future = asyncio.get_running_loop().create_future()
+        self._replies.put_nowait(future)
+        self._writer.write(self._encode(args))
+
+        return await future
+
+    async def get(self, key: str) -> str | None:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: str) -> None:
+        await self.execute("SET", key, value)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.execute("DEL", *keys)
+
+    async def keys(self, prefix: str = "") -> list[str]:
+        pattern = "".join(f"\\{c}" if c in "*?[]\\" else c for c in prefix) + "*"
+        found, cursor = [], "0"
+
+        while True:
+            cursor, batch = await self.execute("SCAN", cursor, "MATCH", pattern, "COUNT", 1000)
+            found.extend(batch)
+            if cursor == "0":
+                return found
+
+    async def hget(self, key: str, field: str) -> str | None:
+        return await self.execute("HGET", key, field)
+
+    async def hset(self, key: str, mapping: dict[str, str]) -> None:
+        if mapping:
+            await self.execute("HSET", key, *(x for pair in mapping.items() for x in pair))
+
+    async def hdel(self, key: str, *fields: str) -> None:
+        if fields:
+            await self.execute("HDEL", key, *fields)
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        flat = await self.execute("HGETALL", key)
+        return dict(zip(flat[::2], flat[1::2]))
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close()
+            await writer.wait_closed()
+
+
+def open_state_store(url: str) -> StateStore:
+    """Create a store from a URL, ie: `memory://`, `sqlite:///state.db`, `redis://localhost:6379/0`"""
+    parsed = urlparse(url)
+
+    if parsed.scheme == "memory":
+        return MemoryStore()
+
+    if parsed.scheme == "sqlite":
+        return SQLiteStore(parsed.path[1:] or ":memory:")
+
+    if parsed.scheme == "redis":
+        return RedisStore(
+            parsed.hostname or "localhost",
+            parsed.port or 6379,
+            int(parsed.path.lstrip("/") or 0),
+        )
+
+    raise ValueError(f"Unsupported state store URL: {url}")
+
+
+def get_state_store(bot: disnake.Client) -> StateStore:
+    """Return the bot's shared state store, creating it from `STATE_STORE_URL` on first use"""
+    store = getattr(bot, "state_store", None)
+
+    if store is None:
+        store = bot.state_store = open_state_store(
+            os.getenv("STATE_STORE_URL", DEFAULT_STATE_STORE_URL)
+        )
+
+    return store
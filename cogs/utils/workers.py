@@ -0,0 +1,213 @@
+"""
+A process pool for CPU heavy work.
+
+Anything that keeps the event loop busy for long (chart rendering, big draws) delays every other
+callback and the gateway heartbeat.  `WorkerPool` runs such jobs in separate processes, so they
+use the other cores while the bot keeps answering:
+
+    workers = get_worker_pool(bot)
+    png = await workers.submit("poll_chart", build_plot, options, counts)
+
+Jobs are plain functions called with picklable arguments, defined at module level so a worker
+can import them.  They are sent by module and name, so a job submitted by a cog's old module
+right after it was reloaded still runs.  A worker imports the module on its first job and keeps
+it, reloading a cog doesn't update it - recycle the pool so new workers import the new code
+(`main.MyBot` does).
+
+At most `max_pending` jobs are queued or running at once.  Beyond that `submit` waits for a slot
+(backpressure), or with `wait=False` raises `WorkerPoolFull` so optional work can be skipped.
+Per job type it records jobs, failures, rejections, the time spent waiting for a worker and
+running, `collect()` returns them as families for `metrics.Metrics`.
+
+With `processes=0` jobs run inline on the event loop, as if there was no pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import multiprocessing
+import os
+import signal
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, TypeVar
+
+import disnake
+from loguru import logger
+
+from .metrics import DURATION_BUCKETS, Histogram, MetricFamily
+
+T = TypeVar("T")
+
+# leave a core for the event loop
+DEFAULT_PROCESSES = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+# jobs queued or running at once before `submit` applies backpressure
+MAX_PENDING_JOBS = 64
+
+
+class WorkerPoolFull(Exception):
+    """Raised by `submit(..., wait=False)` when `max_pending` jobs are already queued or running"""
+
+
+def _init_worker() -> None:
+    # Ctrl+C is for the bot to handle, it shuts the pool down when it is done
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _run_job(module: str, name: str, args: tuple) -> tuple[Any, float]:
+    """Runs in a worker - call the job and time it"""
+    fn = getattr(importlib.import_module(module), name)
+
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class WorkerPool:
+    def __init__(
+        self, processes: int = DEFAULT_PROCESSES, max_pending: int = MAX_PENDING_JOBS
+    ) -> None:
+        self.processes: int = processes
+        self.max_pending: int = max_pending
+
+        self.pending: int = 0
+        self._slots: asyncio.Semaphore | None = None
+        self._executor: ProcessPoolExecutor | None = None
+
+        # by job type
+        self.jobs: Counter[str] = Counter()
+        self.failed: Counter[str] = Counter()
+        self.rejected: Counter[str] = Counter()
+        self.queued: dict[str, Histogram] = {}
+        self.run_time: dict[str, Histogram] = {}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """The process pool, workers are started as jobs come in"""
+        if self._executor is None:
+            # spawned rather than forked, the bot process has threads (sqlite writer, watchdog)
+            self._executor = ProcessPoolExecutor(
+                self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+
+        return self._executor
+
+    async def submit(
+        self, job_type: str, fn: Callable[..., T], /, *args: Any, wait: bool = True
+    ) -> T:
+        """Run `fn(*args)` in a worker and return its result, recorded under `job_type`"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        if not wait and self._slots.locked():
+            self.rejected[job_type] += 1
+            raise WorkerPoolFull(f"{self.pending} jobs are already pending")
+
+        submitted = time.perf_counter()
+        async with self._slots:
+            self.pending += 1
+            try:
+                if self.processes:
+                    loop = asyncio.get_running_loop()
+                    result, run_time = await loop.run_in_executor(
+                        self.executor, _run_job, fn.__module__, fn.__name__, args
+                    )
+                else:
+                    started = time.perf_counter()
+                    result = fn(*args)
+                    run_time = time.perf_counter() - started
+            except BrokenProcessPool:
+                # a worker died (ie: killed for memory), start over with a fresh pool
+                logger.error(f"A worker process died running a {job_type} job, restarting the pool")
+                self.failed[job_type] += 1
+                self.recycle()
+                raise
+            except Exception:
+                self.failed[job_type] += 1
+                raise
+            finally:
+                self.pending -= 1
+
+        self.record(job_type, time.perf_counter() - submitted - run_time, run_time)
+        return result
+
+    def record(self, job_type: str, queued: float, run_time: float) -> None:
+        if job_type not in self.queued:
+            self.queued[job_type] = Histogram(DURATION_BUCKETS)
+            self.run_time[job_type] = Histogram(DURATION_BUCKETS)
+
+        self.jobs[job_type] += 1
+        self.queued[job_type].observe(max(queued, 0.0))
+        self.run_time[job_type].observe(run_time)
+
+    def recycle(self) -> None:
+        """Replace the workers, ie: after reloading the modules jobs are defined in.  Running jobs
+        finish in the old workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def close(self) -> None:
+        """Stop the workers, jobs that haven't started are cancelled"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def collect(self) -> list[MetricFamily]:
+        """Metric families for `Metrics.add_collector`"""
+        label = ("job",)
+
+        return [
+            MetricFamily(
+                "discord_worker_jobs_total",
+                "counter",
+                "Jobs completed by the worker pool",
+                [("", {"job": job}, count) for job, count in self.jobs.items()],
+            ),
+            MetricFamily(
+                "discord_worker_jobs_failed_total",
+                "counter",
+                "Jobs that raised, or whose worker died",
+                [("", {"job": job}, count) for job, count in self.failed.items()],
+            ),
+            MetricFamily(
+                "discord_worker_jobs_rejected_total",
+                "counter",
+                "Jobs turned away because the pool was full",
+                [("", {"job": job}, count) for job, count in self.rejected.items()],
+            ),
+            MetricFamily(
+                "discord_worker_jobs_pending",
+                "gauge",
+                "Jobs queued or running right now",
+                [("", {}, self.pending)],
+            ),
+            MetricFamily.from_histogram(
+                "discord_worker_queue_seconds",
+                "Time jobs waited for a worker, including sending their arguments over",
+                {(job,): histogram for job, histogram in self.queued.items()},
+                label,
+            ),
+            MetricFamily.from_histogram(
+                "discord_worker_run_seconds",
+                "Time jobs ran in a worker",
+                {(job,): histogram for job, histogram in self.run_time.items()},
+                label,
+            ),
+        ]
+
+
+def get_worker_pool(bot: disnake.Client) -> WorkerPool:
+    """Return the bot's worker pool, creating it on first use"""
+    pool = getattr(bot, "worker_pool", None)
+
+    if pool is None:
+        pool = bot.worker_pool = WorkerPool()
+
+    return pool
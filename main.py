@@ -7,19 +7,59 @@ More for my testing and not really for your use
 
 import asyncio
 import os
+import signal
 import sys
+import time
 
 import disnake
 from disnake.ext import commands
 from dotenv import load_dotenv
 from loguru import logger
 
+from cogs.utils.metrics import Metrics, MetricsServer, Origin, attributed, mark_failed, origin_for
+from cogs.utils.monitor import LoopMonitor, callback_name
+from cogs.utils.rest import RestAccounting, parse_budgets
+from cogs.utils.workers import DEFAULT_PROCESSES, MAX_PENDING_JOBS, WorkerPool
+
 load_dotenv(".env", override=True)
 
 
 INTENTS = disnake.Intents.all()
 TOKEN = os.getenv("TOKEN")
 
+# Prometheus metrics are served on http://METRICS_HOST:METRICS_PORT/metrics, set the port to 0 to disable
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9100))
+
+# REST calls per cog per minute, ie: "SimplePoll=120, Giveaway=60".  Cogs over their budget hold
+# back non-essential edits (chart refreshes, entry counters), see cogs/utils/rest.py
+REST_BUDGETS = parse_budgets(os.getenv("REST_BUDGETS", ""))
+
+# processes for CPU heavy jobs (chart rendering, big draws) and how many jobs may be queued before
+# cogs have to wait, see cogs/utils/workers.py.  0 processes runs the jobs on the event loop
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", DEFAULT_PROCESSES))
+WORKER_MAX_PENDING = int(os.getenv("WORKER_MAX_PENDING", MAX_PENDING_JOBS))
+
+# seconds a graceful shutdown (SIGTERM/SIGINT) may take to drain callbacks, save cog state and
+# send pending edits before the bot closes anyway.  A second signal closes right away
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", 20))
+
+# reply to interactions that come in while shutting down
+SHUTDOWN_MESSAGE = "The bot is restarting, please try again in a moment."
+
+# events dispatched for an interaction, dropped while shutting down
+INTERACTION_EVENTS = frozenset(
+    {
+        "interaction",
+        "application_command",
+        "application_command_autocomplete",
+        "message_interaction",
+        "button_click",
+        "dropdown",
+        "modal_submit",
+    }
+)
+
 
 class MyBot(commands.InteractionBot):
     """base bot instance"""
@@ -27,8 +67,256 @@ class MyBot(commands.InteractionBot):
     def __init__(self, **kwargs) -> None:
         super().__init__(**kwargs)
 
+        # times every listener, slash command and component callback, see cogs/utils/monitor.py
+        self.loop_monitor: LoopMonitor = LoopMonitor()
+
+        # latency, error and REST call histograms, see cogs/utils/metrics.py
+        self.metrics: Metrics = Metrics()
+        self.metrics.install(self)
+        self.metrics.add_collector(self.loop_monitor.collect)
+        self.metrics_server: MetricsServer | None = None
+
+        # REST calls and 429s by cog and callback, see cogs/utils/rest.py
+        self.rest_accounting: RestAccounting = RestAccounting(REST_BUDGETS)
+        self.rest_accounting.install(self)
+        self.metrics.add_collector(self.rest_accounting.collect)
+
+        # CPU heavy work runs in other processes, see cogs/utils/workers.py
+        self.worker_pool: WorkerPool = WorkerPool(WORKER_PROCESSES, WORKER_MAX_PENDING)
+        self.metrics.add_collector(self.worker_pool.collect)
+
+        # listener tasks running right now, waited for when shutting down
+        self.in_flight: set[asyncio.Task] = set()
+        self.draining: bool = False
+        self.shutdown_stats: dict[str, float] = {}
+        self._shutdown_task: asyncio.Task | None = None
+
+        # how long the first connection took, logged once ready
+        self.started_at: float | None = None
+        self.startup_stats: dict[str, float] = {}
+
+    async def on_connect(self) -> None:
+        # dispatched once READY is received, before the guilds are streamed in
+        if self.started_at is not None and not self.startup_stats:
+            self.startup_stats["identify_seconds"] = time.monotonic() - self.started_at
+
     async def on_ready(self) -> None:
-        print("Ready")
+        # also dispatched after reconnecting with a new session, only the startup is timed
+        if self.started_at is None or "ready_seconds" in self.startup_stats:
+            return logger.info("Ready")
+
+        stats = self.startup_stats
+        stats["ready_seconds"] = time.monotonic() - self.started_at
+        stats["guild_stream_seconds"] = stats["ready_seconds"] - stats.get("identify_seconds", 0)
+        stats["guilds"] = len(self.guilds)
+        logger.info(
+            f"Ready in {stats['ready_seconds']:.2f}s: identified in "
+            f"{stats.get('identify_seconds', 0):.2f}s, streamed and chunked {stats['guilds']} "
+            f"guild(s) in {stats['guild_stream_seconds']:.2f}s"
+        )
+
+    async def start(self, *args, **kwargs) -> None:
+        self.started_at = time.monotonic()
+        self.loop_monitor.start()
+
+        if METRICS_PORT:
+            self.metrics_server = MetricsServer(self.metrics, METRICS_HOST, METRICS_PORT)
+            await self.metrics_server.start()
+
+        await super().start(*args, **kwargs)
+
+    async def close(self) -> None:
+        self.loop_monitor.stop()
+
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+
+        # writes to the state store may still be batched up, see cogs/utils/state.py
+        if (store := getattr(self, "state_store", None)) is not None:
+            await store.close()
+
+        self.worker_pool.close()
+        await super().close()
+
+    def begin_shutdown(self) -> asyncio.Task:
+        """Start a graceful shutdown, ie: from a signal handler.  Called again while it is
+        running, close right away"""
+        if self._shutdown_task is None:
+            self._shutdown_task = asyncio.create_task(self.shutdown(), name="shutdown")
+        elif not self.is_closed():
+            logger.warning("Shutdown requested again, closing without waiting")
+            asyncio.create_task(self.close())
+
+        return self._shutdown_task
+
+    async def shutdown(self, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """Shut down without losing work:
+
+        - stop accepting interactions, new ones are told the bot is restarting
+        - wait for the listeners, slash commands and component callbacks already running
+        - await each cog's `save_state` coroutine, if it has one, to persist what it keeps in memory
+        - send every pending message edit
+        - close the bot, which flushes and closes the state store
+
+        All within `timeout` seconds, whatever isn't done by then is dropped."""
+        started = time.monotonic()
+        deadline = started + timeout
+        self.draining = True
+        logger.info(f"Shutting down, waiting up to {timeout:.0f}s for in-flight work")
+
+        # only what is running now, events keep coming in until the gateway is closed
+        in_flight = self.in_flight - {asyncio.current_task()}
+        if in_flight:
+            await asyncio.wait(in_flight, timeout=max(deadline - time.monotonic(), 0))
+        drained_at = time.monotonic()
+        cut_off = sum(not task.done() for task in in_flight)
+
+        for name, cog in list(self.cogs.items()):
+            if (save_state := getattr(cog, "save_state", None)) is None:
+                continue
+
+            try:
+                await asyncio.wait_for(save_state(), timeout=max(deadline - time.monotonic(), 0))
+            except Exception:
+                logger.exception(f"Failed to save the state of {name}")
+        saved_at = time.monotonic()
+
+        pending_edits = dropped_edits = 0
+        if (edits := getattr(self, "edit_scheduler", None)) is not None:
+            pending_edits = edits.queue_depth + len(edits.sending)
+            await edits.drain(timeout=max(deadline - time.monotonic(), 0))
+            dropped_edits = edits.queue_depth
+        flushed_at = time.monotonic()
+
+        await self.close()
+
+        self.shutdown_stats = stats = {
+            "callbacks": len(in_flight),
+            "callbacks_cut_off": cut_off,
+            "drain_seconds": drained_at - started,
+            "save_seconds": saved_at - drained_at,
+            "edits": pending_edits,
+            "edits_dropped": dropped_edits,
+            "edit_seconds": flushed_at - saved_at,
+            "total_seconds": time.monotonic() - started,
+        }
+        logger.info(
+            f"Shut down in {stats['total_seconds']:.2f}s: drained {len(in_flight)} callbacks "
+            f"in {stats['drain_seconds']:.2f}s ({cut_off} cut off), saved cog state in "
+            f"{stats['save_seconds']:.2f}s, sent {pending_edits} pending edits in "
+            f"{stats['edit_seconds']:.2f}s ({dropped_edits} dropped)"
+        )
+
+    def dispatch(self, event_name: str, *args, **kwargs) -> None:
+        if self.draining and event_name in INTERACTION_EVENTS:
+            # "interaction" is dispatched last for every interaction, answer it from there
+            interaction = args[0]
+            autocomplete = disnake.InteractionType.application_command_autocomplete
+            if event_name == "interaction" and interaction.type is not autocomplete:
+                task = asyncio.create_task(self.reject_interaction(interaction))
+                self.in_flight.add(task)
+                task.add_done_callback(self.in_flight.discard)
+            return
+
+        super().dispatch(event_name, *args, **kwargs)
+
+    async def reject_interaction(self, interaction: disnake.Interaction) -> None:
+        # a listener dispatched before draining started may have answered it already
+        if interaction.response.is_done():
+            return
+
+        try:
+            await interaction.response.send_message(SHUTDOWN_MESSAGE, ephemeral=True)
+        except (disnake.HTTPException, disnake.InteractionResponded):
+            pass
+
+    async def _run_event(self, coro, event_name: str, *args, **kwargs) -> None:
+        name = callback_name(coro, event_name)
+        origin = origin_for(self, coro, name)
+
+        async def run(*args, **kwargs) -> None:
+            task = asyncio.current_task()
+            self.in_flight.add(task)
+
+            # errors still propagate to _run_event's on_error handling
+            try:
+                with attributed(origin):
+                    await self.metrics.track(
+                        "listener", name, self.loop_monitor.timed(coro(*args, **kwargs), name)
+                    )
+            finally:
+                self.in_flight.discard(task)
+
+        await super()._run_event(run, event_name, *args, **kwargs)
+
+    async def process_application_commands(
+        self, interaction: disnake.ApplicationCommandInteraction
+    ) -> None:
+        name = f"/{interaction.data.name}"
+        command = self.get_slash_command(interaction.data.name)
+        origin = Origin(getattr(command, "cog_name", None) or "bot", name)
+
+        async def process() -> None:
+            processing = super(MyBot, self).process_application_commands(interaction)
+            await self.loop_monitor.timed(processing, name)
+
+            # command errors are handled (and replied to) inside disnake, they don't reach us
+            if interaction.command_failed:
+                mark_failed()
+
+        with attributed(origin):
+            await self.metrics.track("slash", name, process())
+
+    def reload_extension(self, name: str, *, package: str | None = None) -> list[str]:
+        """Reload an extension without losing what its cogs keep in memory.  `reload=True`
+        watches the extensions' files and reloads them through here as well.
+
+        Before the old module is unloaded, each of its cogs with an `export_state` method is asked
+        for its live state (active views, caches...) and once the new module is loaded the cog of
+        the same name gets it back through `import_state`, to rebuild it with the new code.  If the
+        new module fails to load, disnake sets the old one up again and the state goes back to it.
+
+        Returns the names of the cogs whose state was carried over."""
+        name = self._resolve_name(name, package)
+        started = time.monotonic()
+
+        states = {}
+        for cog_name, cog in list(self.cogs.items()):
+            module = type(cog).__module__
+            if module != name and not module.startswith(f"{name}."):
+                continue
+
+            if (export_state := getattr(cog, "export_state", None)) is None:
+                continue
+
+            try:
+                states[cog_name] = export_state()
+            except Exception:
+                logger.exception(f"Failed to export the state of {cog_name}, it will start empty")
+
+        migrated = []
+        try:
+            super().reload_extension(name)
+        finally:
+            # workers keep the modules they imported, new ones import the reloaded code
+            self.worker_pool.recycle()
+
+            for cog_name, state in states.items():
+                if (import_state := getattr(self.get_cog(cog_name), "import_state", None)) is None:
+                    logger.warning(f"{cog_name} is gone after reloading {name}, its state is lost")
+                    continue
+
+                try:
+                    import_state(state)
+                    migrated.append(cog_name)
+                except Exception:
+                    logger.exception(f"Failed to import the state of {cog_name}")
+
+        logger.info(
+            f"Reloaded {name} in {(time.monotonic() - started) * 1e3:.0f}ms"
+            + (f", carried over the state of {', '.join(migrated)}" if migrated else "")
+        )
+        return migrated
 
     def load_extensions(self, path: str) -> None:
 
@@ -55,9 +343,20 @@ async def main() -> None:
         await bot.close()
         raise
 
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, bot.begin_shutdown)
+        except NotImplementedError:  # Windows, Ctrl+C raises KeyboardInterrupt there instead
+            pass
+
     logger.info("Starting bot")
     await bot.start(TOKEN or "")
 
+    # start returns as soon as the bot is closed, let the shutdown finish its report
+    if bot._shutdown_task is not None:
+        await bot._shutdown_task
+
 
 if __name__ == "__main__":
     sys.exit(asyncio.run(main()))
@@ -0,0 +1,5 @@
+"""
+Tests for the shared cog helpers.  Run them from the repo root:
+
+    python -m pytest tests
+"""
@@ -0,0 +1,115 @@
+"""
+Long timeouts in `cogs.admin`, driven through `benchmarks.simulation`.  A timeout longer than
+Discord allows is renewed by the cog's scheduler, a bulk removal or shorter timeout must stop that.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import disnake
+import pytest
+
+from benchmarks.simulation import SimulatedDiscord
+from cogs.admin import EXPIRY_RETRY_DELAY, MAX_TIMEOUT
+
+
+async def long_timeout_then_bulk(duration: str) -> tuple[object, object]:
+    sim = SimulatedDiscord(members=10, latency=0)
+    sim.load_extensions("cogs.admin")
+    await sim.ready()
+
+    cog = sim.bot.get_cog("Moderation")
+    member_id = sim.member_ids[1]
+    key = (sim.guild_id, member_id, "timeout")
+
+    try:
+        await sim.interact(
+            sim.slash_command(
+                "timeout", sim.owner_id, member=disnake.Object(member_id), duration="40d"
+            )
+        )
+        assert cog.scheduler.deadline(key) is not None
+        assert cog.expiries.get(*key) is not None
+
+        await sim.interact(
+            sim.slash_command(
+                "bulk",
+                sim.owner_id,
+                sub_command="timeout",
+                duration=duration,
+                members=str(member_id),
+            )
+        )
+        return cog.scheduler.deadline(key), cog.expiries.get(*key)
+    finally:
+        await sim.close()
+
+
+@pytest.mark.parametrize("duration", ["none", "5m"])
+def test_bulk_timeout_cancels_long_timeout(duration: str, tmp_path, monkeypatch) -> None:
+    # cog databases go to the temporary directory, state to memory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("STATE_STORE_URL", "memory://")
+
+    deadline, expires_at = asyncio.run(long_timeout_then_bulk(duration))
+
+    assert deadline is None
+    assert expires_at is None
+
+
+async def long_timeout_then(event: str, monkeypatch) -> tuple[object, object]:
+    sim = SimulatedDiscord(members=10, latency=0)
+    sim.load_extensions("cogs.admin")
+    await sim.ready()
+
+    cog = sim.bot.get_cog("Moderation")
+    guild = sim.bot.get_guild(sim.guild_id)
+    member = guild.get_member(sim.member_ids[1])
+    key = (sim.guild_id, member.id, "timeout")
+
+    try:
+        await sim.interact(
+            sim.slash_command(
+                "timeout", sim.owner_id, member=disnake.Object(member.id), duration="40d"
+            )
+        )
+
+        if event == "removed":
+            # removed in Discord, the gateway reports the member without a timeout
+            before = disnake.Member._copy(member)
+            before._communication_disabled_until = disnake.utils.utcnow() + MAX_TIMEOUT
+            member._communication_disabled_until = None
+            await cog.on_member_update(before, member)
+
+        elif event == "renewal failed":
+
+            async def timeout(self, **kwargs) -> None:
+                raise disnake.HTTPException(SimpleNamespace(status=500, reason="Error"), "")
+
+            monkeypatch.setattr(disnake.Member, "timeout", timeout)
+            await cog.on_expiry_due(key)
+
+        return cog.scheduler.deadline(key), cog.expiries.get(*key)
+    finally:
+        await sim.close()
+
+
+def test_timeout_removed_in_discord_cancels_long_timeout(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("STATE_STORE_URL", "memory://")
+
+    deadline, expires_at = asyncio.run(long_timeout_then("removed", monkeypatch))
+
+    assert deadline is None
+    assert expires_at is None
+
+
+def test_failed_renewal_is_retried(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("STATE_STORE_URL", "memory://")
+
+    deadline, expires_at = asyncio.run(long_timeout_then("renewal failed", monkeypatch))
+
+    assert deadline is not None
+    assert deadline <= disnake.utils.utcnow() + EXPIRY_RETRY_DELAY
+    assert expires_at is not None
@@ -0,0 +1,143 @@
+"""
+Property tests for `cogs.utils.duration.parse_duration`.  Durations are generated from random
+(w, d, h, m, s) values with a fixed seed, so failures reproduce.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from cogs.utils.duration import DurationError, parse_duration
+
+NOW = datetime(2022, 1, 1, tzinfo=timezone.utc)
+UNITS = ("w", "d", "h", "m", "s")
+RUNS = 1000
+
+
+def random_parts(rng: random.Random) -> dict[str, int]:
+    """A non-zero duration as {unit: value}, with a random subset of the units"""
+    while True:
+        parts = {unit: rng.randint(0, 1000) for unit in UNITS if rng.random() < 0.5}
+        if any(parts.values()):
+            return parts
+
+
+def expected(parts: dict[str, int]) -> timedelta:
+    return timedelta(
+        weeks=parts.get("w", 0),
+        days=parts.get("d", 0),
+        hours=parts.get("h", 0),
+        minutes=parts.get("m", 0),
+        seconds=parts.get("s", 0),
+    )
+
+
+def render(parts: dict[str, int], rng: random.Random) -> str:
+    """Largest unit first, with random case and whitespace around the parts"""
+
+    def space() -> str:
+        return rng.choice(["", "", " ", "  ", "\t"])
+
+    return space().join(
+        f"{space()}{value}{space()}{rng.choice([unit, unit.upper()])}{space()}"
+        for unit, value in parts.items()
+    )
+
+
+def test_round_trip() -> None:
+    rng = random.Random(0)
+
+    for _ in range(RUNS):
+        parts = random_parts(rng)
+        text = render(parts, rng)
+        duration = parse_duration(text, now=NOW)
+
+        assert duration.delta == expected(parts), text
+        assert duration.expires_at == NOW + expected(parts), text
+
+
+@pytest.mark.parametrize(
+    "text, delta",
+    [
+        ("30s", timedelta(seconds=30)),
+        ("1h30m", timedelta(hours=1, minutes=30)),
+        ("2d 12h", timedelta(days=2, hours=12)),
+        ("1w2d3h4m5s", timedelta(weeks=1, days=2, hours=3, minutes=4, seconds=5)),
+        ("1W 2D", timedelta(weeks=1, days=2)),
+        ("  90m  ", timedelta(minutes=90)),
+        ("0h5m", timedelta(minutes=5)),
+    ],
+)
+def test_compound(text: str, delta: timedelta) -> None:
+    assert parse_duration(text, now=NOW).delta == delta
+
+
+def test_reordered_units_are_rejected() -> None:
+    """Units go largest first, any other order (or a repeated unit) is malformed"""
+    rng = random.Random(1)
+
+    for _ in range(RUNS):
+        parts = random_parts(rng)
+        if len(parts) < 2:
+            continue
+
+        reordered = list(parts.items())
+        while reordered == list(parts.items()):
+            rng.shuffle(reordered)
+
+        with pytest.raises(DurationError):
+            parse_duration(render(dict(reordered), rng), now=NOW)
+
+    with pytest.raises(DurationError):
+        parse_duration("5m 5m", now=NOW)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "   ",
+        "m",
+        "5",
+        "5 minutes",
+        "ten minutes",
+        "1.5h",
+        "-5m",
+        "5x",
+        "1h-30m",
+        "h1",
+        "0s",
+        "0d 0h",
+    ],
+)
+def test_malformed(text: str) -> None:
+    with pytest.raises(DurationError):
+        parse_duration(text, now=NOW)
+
+
+def test_random_garbage_is_rejected_or_valid() -> None:
+    """Random strings either parse to what their parts add up to, or raise DurationError"""
+    rng = random.Random(2)
+    alphabet = "0123456789wdhmsWDHMS x.-"
+
+    for _ in range(RUNS):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        try:
+            duration = parse_duration(text, now=NOW)
+        except DurationError:
+            continue
+
+        assert duration.delta > timedelta(0), text
+        assert duration.expires_at == NOW + duration.delta, text
+
+
+def test_limits() -> None:
+    with pytest.raises(DurationError):
+        parse_duration("29d", max_duration=timedelta(days=28), now=NOW)
+
+    with pytest.raises(DurationError):
+        parse_duration("999999999w", now=NOW)
+
+    duration = parse_duration("28d", max_duration=timedelta(days=28), now=NOW)
+    assert duration.delta == timedelta(days=28)
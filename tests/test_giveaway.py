@@ -0,0 +1,102 @@
+"""
+Drawing and rerolling in `cogs.giveaway`, driven through `benchmarks.simulation`
+"""
+
+import asyncio
+
+from benchmarks.simulation import SimulatedDiscord
+from cogs.giveaway import FOOTER_UPDATE_INTERVAL
+
+
+async def drawn_giveaway(sim: SimulatedDiscord, entrants: int, winners: int):
+    sim.load_extensions("cogs.giveaway")
+    await sim.ready()
+
+    payload = sim.slash_command(
+        "giveaway", sim.owner_id, prize="Nitro", expires_in="1d", winners=winners
+    )
+    await sim.interact(payload)
+    message_id = sim.original_message_id(payload)
+
+    for member_id in sim.member_ids[:entrants]:
+        await sim.interact(sim.component(message_id, "giveaway:join", member_id))
+
+    view = sim.bot.get_cog("GiveAway").views[message_id]
+    await view.draw()
+    return message_id, view
+
+
+async def concurrent_rerolls() -> tuple[int, list[int]]:
+    sim = SimulatedDiscord(members=10, latency=0)
+    try:
+        message_id, view = await drawn_giveaway(sim, entrants=5, winners=1)
+
+        reroll = [sim.component(message_id, "giveaway:reroll", sim.owner_id) for _ in range(2)]
+        await asyncio.gather(*(sim.interact(payload, settle=False) for payload in reroll))
+        await sim.settle()
+        return view.winners, view.winner_ids
+    finally:
+        await sim.close()
+
+
+def test_concurrent_rerolls_draw_once(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("STATE_STORE_URL", "memory://")
+
+    winners, winner_ids = asyncio.run(concurrent_rerolls())
+
+    assert winners == 1
+    assert len(winner_ids) == 2
+    assert len(set(winner_ids)) == 2
+
+
+async def reroll_after_short_draw() -> tuple[int, str, int]:
+    sim = SimulatedDiscord(members=10, latency=0)
+    try:
+        message_id, view = await drawn_giveaway(sim, entrants=1, winners=3)
+
+        # an entrant that couldn't be resolved when the winners were drawn
+        view.add_entry(sim.member_ids[1])
+        await sim.interact(sim.component(message_id, "giveaway:reroll", sim.owner_id))
+
+        embed = view.create_winner_embed()
+        return view.winners, embed.fields[0].value, sim.member_ids[1]
+    finally:
+        await sim.close()
+
+
+def test_reroll_after_short_draw_is_not_a_main_winner(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("STATE_STORE_URL", "memory://")
+
+    winners, rerolled, member_id = asyncio.run(reroll_after_short_draw())
+
+    assert winners == 1
+    assert rerolled == f"<@{member_id}>"
+
+
+async def unload_with_pending_footer() -> bool:
+    sim = SimulatedDiscord(members=10, latency=0)
+    try:
+        sim.load_extensions("cogs.giveaway")
+        await sim.ready()
+
+        payload = sim.slash_command("giveaway", sim.owner_id, prize="Nitro", expires_in="1d")
+        await sim.interact(payload)
+        message_id = sim.original_message_id(payload)
+        await sim.interact(sim.component(message_id, "giveaway:join", sim.member_ids[1]))
+
+        task = sim.bot.get_cog("GiveAway").views[message_id]._footer_task
+        sim.bot.unload_extension("cogs.giveaway")
+        # left running, it would save the entries to the closed store
+        await asyncio.wait([task], timeout=FOOTER_UPDATE_INTERVAL + 1)
+        return task.cancelled()
+    finally:
+        await sim.close()
+
+
+def test_unload_stops_pending_footer_updates(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("STATE_STORE_URL", "memory://")
+
+    assert asyncio.run(unload_with_pending_footer())
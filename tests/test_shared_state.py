@@ -0,0 +1,76 @@
+"""
+Cogs sharing one state store between processes (ie: shards on Redis), driven through
+`benchmarks.simulation`.  A process restores what belongs to its guilds and leaves the rest alone.
+"""
+
+import asyncio
+import json
+
+from benchmarks.simulation import SimulatedDiscord
+
+
+async def restore_on_other_shard() -> tuple[list[str], list[str]]:
+    shard = SimulatedDiscord(members=10, latency=0)
+    shard.load_extensions("cogs.simplepoll", "cogs.matchmaker")
+    await shard.ready()
+
+    await shard.interact(shard.slash_command("poll", shard.owner_id, options="A, B"))
+    await shard.interact(shard.slash_command("matchmaker", shard.owner_id))
+    await shard.bot.get_cog("MatchMaker").save_state()
+    store = shard.bot.state_store
+
+    # a second process with its own guild, on the same store
+    other = SimulatedDiscord(members=10, latency=0)
+    other.bot.state_store = store
+    # a poll of its own, in a channel that has been deleted since
+    await store.set(
+        "poll:1", json.dumps({"guild_id": other.guild_id, "channel_id": 1, "options": []})
+    )
+
+    other.load_extensions("cogs.simplepoll", "cogs.matchmaker")
+    await other.ready()
+
+    try:
+        return await store.keys("poll:"), await store.keys("lobby:")
+    finally:
+        await other.close()
+        await shard.close()
+
+
+def test_other_shards_state_is_kept(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("STATE_STORE_URL", "memory://")
+
+    polls, lobbies = asyncio.run(restore_on_other_shard())
+
+    assert len([key for key in polls if not key.endswith(":votes")]) == 1
+    assert "poll:1" not in polls
+    assert len(lobbies) == 1
+
+
+async def snapshot_on_other_shard() -> tuple[list[str], int]:
+    shard = SimulatedDiscord(members=10, latency=0)
+    shard.load_extensions("cogs.invite_tracker")
+    await shard.ready()
+    await shard.bot.get_cog("Invites").save_state()
+    store = shard.bot.state_store
+
+    other = SimulatedDiscord(members=10, latency=0)
+    other.bot.state_store = store
+    other.load_extensions("cogs.invite_tracker")
+    await other.ready()
+
+    try:
+        return await store.keys("invites:snapshot:"), shard.guild_id
+    finally:
+        await other.close()
+        await shard.close()
+
+
+def test_invite_snapshot_is_kept_for_its_guild(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("STATE_STORE_URL", "memory://")
+
+    keys, guild_id = asyncio.run(snapshot_on_other_shard())
+
+    assert keys == [f"invites:snapshot:{guild_id}"]
@@ -0,0 +1,21 @@
+"""
+Vote counting of `cogs.simplepoll`
+"""
+
+from cogs.simplepoll import PollTally
+
+
+def test_vote_returns_previous_ballot() -> None:
+    tally = PollTally(["A", "B"])
+
+    assert tally.vote(1, (0,)) == ()
+    assert tally.vote(1, (1,)) == (0,)
+    assert list(tally.counts) == [0, 1]
+
+
+def test_same_vote_again_is_not_a_change() -> None:
+    tally = PollTally(["A", "B"])
+    tally.vote(1, (0,))
+
+    assert tally.vote(1, (0,)) is None
+    assert list(tally.counts) == [1, 0]